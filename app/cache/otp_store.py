@@ -0,0 +1,215 @@
+"""
+Storage for OTP codes, send throttling buckets and suppression counters.
+
+The in-memory store is enough for a single process. Set OTP_STORE_BACKEND=redis
+so every worker shares the same codes, buckets and counters.
+"""
+import time
+from typing import Optional
+
+from app.config import settings
+
+# Token bucket refill + take in one round trip so concurrent workers cannot
+# both spend the last token.
+_TAKE_TOKEN_LUA = """
+local capacity = tonumber(ARGV[1])
+local refill_seconds = tonumber(ARGV[2])
+local now = tonumber(ARGV[3])
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or capacity
+local ts = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + (now - ts) / refill_seconds)
+local allowed = 0
+local retry_after = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+    allowed = 1
+else
+    retry_after = (1 - tokens) * refill_seconds
+end
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+redis.call('EXPIRE', KEYS[1], math.ceil(capacity * refill_seconds))
+return {allowed, tostring(retry_after)}
+"""
+
+# Give back a token taken for a send that never went out, without passing capacity.
+_REFUND_TOKEN_LUA = """
+local tokens = tonumber(redis.call('HGET', KEYS[1], 'tokens'))
+if tokens then
+    redis.call('HSET', KEYS[1], 'tokens', math.min(tonumber(ARGV[1]), tokens + 1))
+end
+return 0
+"""
+
+# Count a wrong guess only while the code exists, so an expired key is not
+# recreated without a TTL.
+_FAIL_ATTEMPT_LUA = """
+if redis.call('EXISTS', KEYS[1]) == 0 then
+    return 0
+end
+return redis.call('HINCRBY', KEYS[1], 'attempts', 1)
+"""
+
+
+def email_key(email: str) -> str:
+    """Emails differing only in case share one code and one throttle bucket."""
+    return email.strip().lower()
+
+
+class InMemoryOTPStore:
+    """Process-local store. Limits only hold inside a single worker."""
+
+    # Expired codes and refilled buckets are dropped at most this often, on writes.
+    PRUNE_INTERVAL_SECONDS = 60
+
+    def __init__(self):
+        self._codes: dict[str, dict] = {}
+        # key -> (tokens, last update, time the bucket is full again and can be forgotten)
+        self._buckets: dict[str, tuple[float, float, float]] = {}
+        self._counters: dict[str, int] = {}
+        self._next_prune = 0.0
+
+    async def get_code(self, email: str) -> Optional[dict]:
+        key = email_key(email)
+        entry = self._codes.get(key)
+        if entry and entry["expires"] <= time.time():
+            self._codes.pop(key, None)
+            return None
+        return entry
+
+    async def set_code(self, email: str, code: str, ttl_seconds: int) -> dict:
+        now = time.time()
+        self._prune(now)
+        entry = {"code": code, "sent_at": now, "expires": now + ttl_seconds}
+        self._codes[email_key(email)] = entry
+        return entry
+
+    async def delete_code(self, email: str) -> None:
+        self._codes.pop(email_key(email), None)
+
+    async def fail_attempt(self, email: str) -> int:
+        """Count a wrong guess against the current code; return the failures so far."""
+        entry = await self.get_code(email)
+        if not entry:
+            return 0
+        entry["attempts"] = entry.get("attempts", 0) + 1
+        return entry["attempts"]
+
+    async def take_token(self, key: str, capacity: int, refill_seconds: float) -> tuple[bool, float]:
+        """Take one token from the bucket at *key*; return (allowed, retry_after_seconds)."""
+        now = time.time()
+        self._prune(now)
+        tokens, ts, _ = self._buckets.get(key, (float(capacity), now, now))
+        tokens = min(capacity, tokens + (now - ts) / refill_seconds)
+        allowed = tokens >= 1
+        if allowed:
+            tokens -= 1
+        self._buckets[key] = (tokens, now, now + (capacity - tokens) * refill_seconds)
+        return (True, 0.0) if allowed else (False, (1 - tokens) * refill_seconds)
+
+    async def refund_token(self, key: str, capacity: int, refill_seconds: float) -> None:
+        """Put back a token taken from the bucket at *key*."""
+        if key not in self._buckets:
+            return
+        tokens, ts, _ = self._buckets[key]
+        tokens = min(capacity, tokens + 1)
+        self._buckets[key] = (tokens, ts, ts + (capacity - tokens) * refill_seconds)
+
+    def _prune(self, now: float) -> None:
+        if now < self._next_prune:
+            return
+        self._next_prune = now + self.PRUNE_INTERVAL_SECONDS
+        self._codes = {key: entry for key, entry in self._codes.items() if entry["expires"] > now}
+        self._buckets = {key: bucket for key, bucket in self._buckets.items() if bucket[2] > now}
+
+    async def incr_counter(self, name: str) -> None:
+        self._counters[name] = self._counters.get(name, 0) + 1
+
+    async def get_counters(self) -> dict[str, int]:
+        return dict(self._counters)
+
+
+class RedisOTPStore:
+    """Redis-backed store shared by every worker."""
+
+    CODE_PREFIX = "otp:code:"
+    BUCKET_PREFIX = "otp:bucket:"
+    COUNTERS_KEY = "otp:counters"
+
+    def __init__(self):
+        self._take_token_script = None
+        self._refund_token_script = None
+        self._fail_attempt_script = None
+
+    async def _redis(self):
+        from app.cache.redis_cache import get_redis
+        return await get_redis()
+
+    async def get_code(self, email: str) -> Optional[dict]:
+        r = await self._redis()
+        entry = await r.hgetall(self.CODE_PREFIX + email_key(email))
+        if not entry:
+            return None
+        return {
+            "code": entry["code"],
+            "sent_at": float(entry["sent_at"]),
+            "expires": float(entry["expires"]),
+        }
+
+    async def set_code(self, email: str, code: str, ttl_seconds: int) -> dict:
+        r = await self._redis()
+        now = time.time()
+        entry = {"code": code, "sent_at": now, "expires": now + ttl_seconds}
+        key = self.CODE_PREFIX + email_key(email)
+        async with r.pipeline(transaction=True) as pipe:
+            pipe.hset(key, mapping=entry)
+            pipe.expire(key, ttl_seconds)
+            await pipe.execute()
+        return entry
+
+    async def delete_code(self, email: str) -> None:
+        r = await self._redis()
+        await r.delete(self.CODE_PREFIX + email_key(email))
+
+    async def fail_attempt(self, email: str) -> int:
+        r = await self._redis()
+        if self._fail_attempt_script is None:
+            self._fail_attempt_script = r.register_script(_FAIL_ATTEMPT_LUA)
+        return int(await self._fail_attempt_script(keys=[self.CODE_PREFIX + email_key(email)]))
+
+    async def take_token(self, key: str, capacity: int, refill_seconds: float) -> tuple[bool, float]:
+        r = await self._redis()
+        if self._take_token_script is None:
+            self._take_token_script = r.register_script(_TAKE_TOKEN_LUA)
+        allowed, retry_after = await self._take_token_script(
+            keys=[self.BUCKET_PREFIX + key], args=[capacity, refill_seconds, time.time()]
+        )
+        return bool(int(allowed)), float(retry_after)
+
+    async def refund_token(self, key: str, capacity: int, refill_seconds: float) -> None:
+        r = await self._redis()
+        if self._refund_token_script is None:
+            self._refund_token_script = r.register_script(_REFUND_TOKEN_LUA)
+        await self._refund_token_script(keys=[self.BUCKET_PREFIX + key], args=[capacity])
+
+    async def incr_counter(self, name: str) -> None:
+        r = await self._redis()
+        await r.hincrby(self.COUNTERS_KEY, name, 1)
+
+    async def get_counters(self) -> dict[str, int]:
+        r = await self._redis()
+        raw = await r.hgetall(self.COUNTERS_KEY)
+        return {name: int(value) for name, value in raw.items()}
+
+
+_otp_store = None
+
+
+def get_otp_store():
+    global _otp_store
+    if _otp_store is None:
+        if settings.OTP_STORE_BACKEND == "redis":
+            _otp_store = RedisOTPStore()
+        else:
+            _otp_store = InMemoryOTPStore()
+    return _otp_store
@@ -0,0 +1,103 @@
+"""
+Per-worker coalescing of identical concurrent reads.
+
+When many requests ask for the same thing at once, the first one (the
+leader) runs the read and the rest wait for it and return the same result,
+or a copy of the same exception. Nothing is kept once the leader finishes: a call
+that arrives afterwards starts a new read. Task routes are sync and run on
+the threadpool, so waiting blocks a worker thread just as running the query
+would, without the database work.
+
+A read may be coalesced only if all of these hold:
+
+- It has no side effects and does not depend on who is asking beyond the
+  key. The key is (operation, args, scope); *scope* names what the caller
+  is allowed to see, and callers with different scopes never share. Pass
+  the narrowest thing that decides visibility: the role while every user of
+  a role sees the same tasks, the user id for anything per user.
+- Its result is immutable and detached from any session: tuples and
+  NamedTuple rows, never ORM objects (they belong to the leader's session
+  and thread) or lists a caller could change for everyone.
+- Its args include the collection version read by the caller before
+  joining, so nobody gets a result that started before a write they could
+  already see.
+
+Writes are never coalesced. Set TASK_READ_COALESCING_ENABLED=False to run
+every read on its own.
+"""
+import copy
+import threading
+from typing import Callable, Dict, Hashable, Optional, Tuple, TypeVar
+
+from app.config import settings
+from app.common.constants.log import logger
+
+T = TypeVar("T")
+
+
+class _Flight:
+    __slots__ = ("done", "result", "error", "followers")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error: Optional[BaseException] = None
+        self.followers = 0
+
+
+def _follower_error(error: BaseException) -> BaseException:
+    """
+    A fresh exception for one follower. Raising the leader's object from
+    every follower thread would have them all write to its traceback.
+    """
+    try:
+        return copy.copy(error)
+    except Exception:
+        return RuntimeError(f"Shared read failed: {error!r}")
+
+
+class SingleFlight:
+    def __init__(self):
+        self._flights: Dict[Hashable, _Flight] = {}
+        self._lock = threading.Lock()
+
+    def do(self, operation: str, args: Tuple, scope: Hashable, read: Callable[[], T]) -> T:
+        """Run *read*, or wait for the identical one already running and return its result."""
+        if scope is None:
+            raise ValueError("A coalesced read needs the caller's visibility scope")
+        key = (operation, args, scope)
+        with self._lock:
+            flight = self._flights.get(key)
+            leading = flight is None
+            if leading:
+                flight = self._flights[key] = _Flight()
+            else:
+                flight.followers += 1
+        if not leading:
+            flight.done.wait()
+            if flight.error is not None:
+                raise _follower_error(flight.error) from flight.error
+            return flight.result
+        try:
+            flight.result = read()
+        except BaseException as error:
+            flight.error = error
+            raise
+        finally:
+            with self._lock:
+                del self._flights[key]
+            flight.done.set()
+        if flight.followers:
+            logger.debug(f"{operation}{args} shared with {flight.followers} concurrent callers")
+        return flight.result
+
+    def in_flight(self) -> int:
+        return len(self._flights)
+
+
+_single_flight = SingleFlight()
+
+
+def get_single_flight() -> Optional[SingleFlight]:
+    """This worker's SingleFlight, or None when coalescing is turned off."""
+    return _single_flight if settings.TASK_READ_COALESCING_ENABLED else None
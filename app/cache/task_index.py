@@ -0,0 +1,220 @@
+"""
+Per-worker columnar snapshot of the task fields that filters and counts use.
+
+Each worker keeps user_id, status and due_date of every task in NumPy arrays
+sorted by task id. Status strings are interned to small integer codes, due
+dates are stored as days since 1970-01-01. GET /tasks/filter and
+GET /tasks/counts then run as vectorised array operations. SQLite is only
+asked for the bodies of the tasks on the returned page.
+
+Memory: 18 bytes per task (8 id + 4 user_id + 2 status + 4 due date), about
+18 MB per million tasks. A refresh briefly holds a second copy, and each
+filter predicate allocates a 1-byte-per-task mask while it runs.
+
+Freshness: the task_counters "version" row, which triggers bump on every
+write, is checked at most every TASK_COLUMN_INDEX_REFRESH_SECONDS, and right
+away after this worker's own writes (TaskService calls invalidate()). On a
+change only tasks updated since the last refresh began (less
+TASK_CHANGES_SETTLE_SECONDS) and tombstones after the last seen seq are
+read. If tombstone compaction has passed that seq, the snapshot is rebuilt.
+
+NumPy is optional: without it (or with TASK_COLUMN_INDEX_ENABLED=False, or
+when tasks are sharded) get_task_index() returns None and the same queries
+run in SQL.
+"""
+import threading
+import time
+from datetime import date, datetime, timedelta
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # optional dependency
+    np = None
+
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.common.constants.log import logger
+from app.common.constants.task import TOMBSTONE_HORIZON_JOB
+from app.repository.job_repository import JobRepository
+from app.repository.task_repository import TaskRepository
+from app.repository.user_repository import UserRepository
+
+EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+NO_USER = -1
+NO_DUE_DATE = -(2 ** 31)
+
+
+class TaskColumns(NamedTuple):
+    ids: "np.ndarray"        # int64, ascending
+    user_ids: "np.ndarray"   # int32, NO_USER for tasks without an owner
+    statuses: "np.ndarray"   # int16 codes into TaskColumnIndex.status_names
+    due_days: "np.ndarray"   # int32 days since 1970-01-01, NO_DUE_DATE if unset
+
+
+def _day(value: Optional[date]) -> int:
+    return NO_DUE_DATE if value is None else value.toordinal() - EPOCH_ORDINAL
+
+
+class TaskColumnIndex:
+    def __init__(self, refresh_seconds: float):
+        self.refresh_seconds = refresh_seconds
+        self.status_names: List[str] = []
+        self._status_codes: Dict[str, int] = {}
+        self._columns: Optional[TaskColumns] = None
+        # Deleted users whose tasks are still waiting for the purge; left out of every query.
+        self._hidden_owners = np.zeros(0, dtype=np.int32) if np is not None else None
+        self._version: Optional[int] = None
+        self._tombstone_seq = 0
+        self._changed_since: Optional[datetime] = None
+        self._next_check = 0.0
+        self._lock = threading.Lock()
+
+    # ----- freshness -----
+
+    def invalidate(self) -> None:
+        """Check the version on the next query; called after this worker writes a task."""
+        self._next_check = 0.0
+
+    def snapshot(self, db: Session) -> TaskColumns:
+        if time.monotonic() >= self._next_check or self._columns is None:
+            with self._lock:
+                if time.monotonic() >= self._next_check or self._columns is None:
+                    self._next_check = time.monotonic() + self.refresh_seconds
+                    self._refresh(db)
+        return self._columns
+
+    def _refresh(self, db: Session) -> None:
+        repo = TaskRepository(db)
+        version = repo.get_tasks_version()
+        if self._columns is not None and version == self._version:
+            return
+        # Deleting a user bumps the version too (see schema.USER_DELETED_VERSION_DDL).
+        self._hidden_owners = np.asarray(UserRepository(db).get_deleted_user_ids(), dtype=np.int32)
+        horizon = int(JobRepository(db).get_watermark(TOMBSTONE_HORIZON_JOB) or 0)
+        if self._columns is None or horizon > self._tombstone_seq:
+            self._rebuild(repo, version, horizon)
+            return
+        started = datetime.utcnow()
+        # Tombstones first: a task deleted and re-created in between shows up in both.
+        deleted = repo.get_deleted_task_ids(self._tombstone_seq)
+        # Re-read a settle window: an older updated_at may commit after a newer one.
+        since = self._changed_since - timedelta(seconds=settings.TASK_CHANGES_SETTLE_SECONDS)
+        rows = repo.get_index_rows(since)
+        self._columns = self._apply(self._columns, rows, [task_id for _, task_id in deleted])
+        if deleted:
+            self._tombstone_seq = deleted[-1].seq
+        self._changed_since = started
+        self._version = version
+        logger.debug(f"Task index refreshed: {len(rows)} changed, {len(deleted)} deleted")
+
+    def _rebuild(self, repo: TaskRepository, version: int, horizon: int) -> None:
+        started = time.perf_counter()
+        self._changed_since = datetime.utcnow()
+        self._tombstone_seq = max(repo.get_last_tombstone_seq(), horizon)
+        rows = repo.get_index_rows()
+        self._columns = self._arrays(rows)
+        self._version = version
+        logger.info(f"Task index built with {len(rows)} tasks in {time.perf_counter() - started:.3f}s")
+
+    # ----- building arrays -----
+
+    def _code(self, status: str) -> int:
+        code = self._status_codes.get(status)
+        if code is None:
+            code = self._status_codes[status] = len(self.status_names)
+            self.status_names.append(status)
+        return code
+
+    def _arrays(self, rows) -> TaskColumns:
+        count = len(rows)
+        return TaskColumns(
+            np.fromiter((row.id for row in rows), np.int64, count),
+            np.fromiter((NO_USER if row.user_id is None else row.user_id for row in rows), np.int32, count),
+            np.fromiter((self._code(row.status) for row in rows), np.int16, count),
+            np.fromiter((_day(row.due_date) for row in rows), np.int32, count),
+        )
+
+    def _apply(self, columns: TaskColumns, rows, deleted_ids: List[int]) -> TaskColumns:
+        """New arrays with *rows* upserted and *deleted_ids* removed; readers keep the old ones."""
+        ids, user_ids, statuses, due_days = (array.copy() for array in columns)
+        changed = self._arrays(rows)
+        if len(changed.ids):
+            positions = np.searchsorted(ids, changed.ids)
+            present = np.zeros(len(changed.ids), dtype=bool)
+            if len(ids):
+                present = ids[np.minimum(positions, len(ids) - 1)] == changed.ids
+            at = positions[present]
+            user_ids[at] = changed.user_ids[present]
+            statuses[at] = changed.statuses[present]
+            due_days[at] = changed.due_days[present]
+            added = ~present
+            if added.any():
+                ids = np.concatenate([ids, changed.ids[added]])
+                user_ids = np.concatenate([user_ids, changed.user_ids[added]])
+                statuses = np.concatenate([statuses, changed.statuses[added]])
+                due_days = np.concatenate([due_days, changed.due_days[added]])
+                if len(ids) > 1 and (ids[1:] < ids[:-1]).any():
+                    order = np.argsort(ids, kind="stable")
+                    ids, user_ids, statuses, due_days = ids[order], user_ids[order], statuses[order], due_days[order]
+        if deleted_ids:
+            gone = np.setdiff1d(np.asarray(deleted_ids, dtype=np.int64), changed.ids)
+            if len(gone):
+                keep = ~np.isin(ids, gone)
+                ids, user_ids, statuses, due_days = ids[keep], user_ids[keep], statuses[keep], due_days[keep]
+        return TaskColumns(ids, user_ids, statuses, due_days)
+
+    # ----- queries -----
+
+    def _mask(self, columns: TaskColumns, user_id: Optional[int] = None, status: Optional[str] = None,
+              due_from: Optional[date] = None, due_to: Optional[date] = None):
+        mask = np.ones(len(columns.ids), dtype=bool)
+        if len(self._hidden_owners):
+            mask &= ~np.isin(columns.user_ids, self._hidden_owners)
+        if user_id is not None:
+            mask &= columns.user_ids == user_id
+        if status is not None:
+            code = self._status_codes.get(status)
+            if code is None:
+                return np.zeros(len(columns.ids), dtype=bool)
+            mask &= columns.statuses == code
+        if due_from is not None:
+            mask &= columns.due_days >= _day(due_from)
+        if due_to is not None:
+            mask &= (columns.due_days <= _day(due_to)) & (columns.due_days != NO_DUE_DATE)
+        return mask
+
+    def filter_ids(self, db: Session, limit: int, offset: int, **filters) -> Tuple[List[int], int]:
+        """Ids of one page of matching tasks in id order, and how many match in total."""
+        columns = self.snapshot(db)
+        matched = columns.ids[self._mask(columns, **filters)]
+        return matched[offset:offset + limit].tolist(), int(len(matched))
+
+    def count_by(self, db: Session, group_by: str, **filters) -> Dict[str, int]:
+        """Matching tasks per status or per user id (as a string, "" for no owner)."""
+        columns = self.snapshot(db)
+        mask = self._mask(columns, **filters)
+        if group_by == "status":
+            counts = np.bincount(columns.statuses[mask], minlength=len(self.status_names))
+            return {self.status_names[code]: int(n) for code, n in enumerate(counts) if n}
+        keys, counts = np.unique(columns.user_ids[mask], return_counts=True)
+        return {("" if key == NO_USER else str(key)): int(n) for key, n in zip(keys.tolist(), counts.tolist())}
+
+    @property
+    def nbytes(self) -> int:
+        return sum(array.nbytes for array in self._columns) if self._columns is not None else 0
+
+
+_task_index: Optional[TaskColumnIndex] = None
+
+
+def get_task_index() -> Optional[TaskColumnIndex]:
+    """This worker's index, or None when it is disabled, tasks are sharded or NumPy is not installed."""
+    global _task_index
+    if np is None or not settings.TASK_COLUMN_INDEX_ENABLED or settings.TASK_SHARD_URLS:
+        # Sharded tasks are not all in the database the index reads.
+        return None
+    if _task_index is None:
+        _task_index = TaskColumnIndex(settings.TASK_COLUMN_INDEX_REFRESH_SECONDS)
+    return _task_index
@@ -0,0 +1,163 @@
+"""
+Revoked token ids (the "jti" claim), kept until the token would expire anyway.
+
+The store holds the authoritative list. Set TOKEN_REVOCATION_BACKEND=redis so
+every worker sees revocations made by the others. Each worker checks tokens
+against a Bloom filter snapshot of the store first and asks the store only
+when the filter reports a possible hit. Every TOKEN_REVOCATION_REFRESH_SECONDS
+the snapshot pulls just the revocations added since its last refresh.
+"""
+import time
+from typing import List, Optional, Tuple
+
+from app.config import settings
+from app.common.constants.log import logger
+from app.utils.bloom import BloomFilter
+
+BLOOM_ERROR_RATE = 0.01
+
+
+class InMemoryRevocationStore:
+    """Process-local store. Revocations only hold inside a single worker."""
+
+    def __init__(self):
+        self._expiry: dict[str, float] = {}
+        self._log: List[Tuple[int, str, float]] = []
+        self._seq = 0
+
+    async def revoke(self, jti: str, expires_at: float) -> None:
+        self._prune(time.time())
+        self._seq += 1
+        self._expiry[jti] = expires_at
+        self._log.append((self._seq, jti, expires_at))
+
+    async def is_revoked(self, jti: str) -> bool:
+        return self._expiry.get(jti, 0) > time.time()
+
+    async def changes_since(self, cursor) -> Tuple[Optional[List[str]], object]:
+        """Return (jtis revoked after *cursor*, new cursor); (None, cursor) if the log no longer reaches back that far."""
+        if self._log and self._log[0][0] > cursor + 1:
+            return None, cursor
+        return [jti for seq, jti, _ in self._log if seq > cursor], self._seq
+
+    async def active(self) -> Tuple[List[str], object]:
+        """Every unexpired revoked jti and the cursor to continue from."""
+        now = time.time()
+        return [jti for jti, expires_at in self._expiry.items() if expires_at > now], self._seq
+
+    def _prune(self, now: float) -> None:
+        if self._log and self._log[0][2] <= now:
+            self._log = [entry for entry in self._log if entry[2] > now]
+            self._expiry = {jti: expires_at for jti, expires_at in self._expiry.items() if expires_at > now}
+
+
+class RedisRevocationStore:
+    """
+    Redis-backed store shared by every worker: one key per jti that expires
+    with the token, plus a capped stream of revocations for snapshot refreshes.
+    """
+
+    KEY_PREFIX = "revoked:jti:"
+    LOG_KEY = "revoked:log"
+    LOG_MAX_LENGTH = 10000
+
+    async def _redis(self):
+        from app.cache.redis_cache import get_redis
+        return await get_redis()
+
+    async def revoke(self, jti: str, expires_at: float) -> None:
+        r = await self._redis()
+        async with r.pipeline(transaction=True) as pipe:
+            pipe.set(self.KEY_PREFIX + jti, 1, exat=int(expires_at) + 1)
+            pipe.xadd(self.LOG_KEY, {"jti": jti}, maxlen=self.LOG_MAX_LENGTH, approximate=True)
+            await pipe.execute()
+
+    async def is_revoked(self, jti: str) -> bool:
+        r = await self._redis()
+        return bool(await r.exists(self.KEY_PREFIX + jti))
+
+    async def changes_since(self, cursor) -> Tuple[Optional[List[str]], object]:
+        r = await self._redis()
+        first = await r.xrange(self.LOG_KEY, count=1)
+        if first and _stream_id(first[0][0]) > _stream_id(cursor) and cursor != "0-0":
+            # Entries older than the first one may have been trimmed.
+            return None, cursor
+        entries = await r.xrange(self.LOG_KEY, min=f"({cursor}")
+        if not entries:
+            return [], cursor
+        return [fields["jti"] for _, fields in entries], entries[-1][0]
+
+    async def active(self) -> Tuple[List[str], object]:
+        r = await self._redis()
+        last = await r.xrevrange(self.LOG_KEY, count=1)
+        cursor = last[0][0] if last else "0-0"
+        prefix_length = len(self.KEY_PREFIX)
+        jtis = [key[prefix_length:] async for key in r.scan_iter(match=self.KEY_PREFIX + "*")]
+        return jtis, cursor
+
+
+def _stream_id(value: str) -> Tuple[int, int]:
+    millis, _, seq = value.partition("-")
+    return int(millis), int(seq or 0)
+
+
+class RevocationChecker:
+    """A worker's Bloom filter snapshot of the revocation store."""
+
+    def __init__(self, store, refresh_seconds: float, capacity: int):
+        self.store = store
+        self.refresh_seconds = refresh_seconds
+        self.capacity = capacity
+        self._bloom = BloomFilter(capacity, BLOOM_ERROR_RATE)
+        self._cursor = None
+        self._next_refresh = 0.0
+
+    async def is_revoked(self, jti: str) -> bool:
+        await self._refresh()
+        if jti not in self._bloom:
+            return False
+        return await self.store.is_revoked(jti)
+
+    async def revoke(self, jti: str, expires_at: float) -> None:
+        await self.store.revoke(jti, expires_at)
+        self._bloom.add(jti)
+        logger.info(f"Revoked token {jti}")
+
+    async def _refresh(self) -> None:
+        now = time.monotonic()
+        if now < self._next_refresh:
+            return
+        self._next_refresh = now + self.refresh_seconds
+        if self._cursor is not None and self._bloom.count < self._bloom.capacity:
+            jtis, cursor = await self.store.changes_since(self._cursor)
+            if jtis is not None:
+                for jti in jtis:
+                    self._bloom.add(jti)
+                self._cursor = cursor
+                return
+        await self._rebuild()
+
+    async def _rebuild(self) -> None:
+        """Start a new filter from the unexpired revocations, sized for them."""
+        jtis, cursor = await self.store.active()
+        bloom = BloomFilter(max(self.capacity, 2 * len(jtis)), BLOOM_ERROR_RATE)
+        for jti in jtis:
+            bloom.add(jti)
+        self._bloom, self._cursor = bloom, cursor
+        logger.debug(f"Rebuilt token revocation filter with {len(jtis)} entries")
+
+
+_revocation_checker = None
+
+
+def get_revocation_checker() -> RevocationChecker:
+    global _revocation_checker
+    if _revocation_checker is None:
+        if settings.TOKEN_REVOCATION_BACKEND == "redis":
+            store = RedisRevocationStore()
+        else:
+            store = InMemoryRevocationStore()
+        _revocation_checker = RevocationChecker(
+            store, settings.TOKEN_REVOCATION_REFRESH_SECONDS, settings.TOKEN_REVOCATION_BLOOM_CAPACITY
+        )
+    return _revocation_checker
@@ -0,0 +1,44 @@
+"""
+Per-worker record of the newest token version seen for each user.
+
+Access tokens are trusted on their signature alone. This map only lets a
+worker turn away tokens it already knows are stale: ones older than a
+version it issued, read at refresh, or bumped itself. Other workers catch up
+when the client refreshes; /auth/refresh checks the version against the
+users row and refuses stale refresh tokens, so a password, role or username
+change is honoured everywhere within one access token lifetime.
+"""
+import sys
+import threading
+
+# Stored for deleted users: every token they hold is stale.
+REVOKED = sys.maxsize
+
+
+class TokenVersionCache:
+    def __init__(self):
+        self._versions: dict[int, int] = {}
+        self._lock = threading.Lock()
+
+    def note(self, user_id: int, version: int) -> None:
+        """Remember *version* for the user unless a newer one is already known."""
+        with self._lock:
+            if version > self._versions.get(user_id, -1):
+                self._versions[user_id] = version
+
+    def revoke(self, user_id: int) -> None:
+        self.note(user_id, REVOKED)
+
+    def is_stale(self, user_id: int, version: int) -> bool:
+        return version < self._versions.get(user_id, -1)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._versions.clear()
+
+
+_token_versions = TokenVersionCache()
+
+
+def get_token_versions() -> TokenVersionCache:
+    return _token_versions
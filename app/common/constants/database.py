@@ -1,5 +1,7 @@
+import os
+
 # SQLALCHEMY_DATABASE_URL = "sqlite:///app/database/database.db" #running till created and updated
-SQLALCHEMY_DATABASE_URL = "sqlite:///app/database/database1.db"
+SQLALCHEMY_DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///app/database/database1.db")
 
 # SQLALCHEMY_DATABASE_URL = "sqlite:///app/database/gmail.db"
 
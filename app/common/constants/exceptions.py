@@ -41,3 +41,75 @@ class TaskUnauthorizedAccessException(HTTPException):
 class TaskDeletionException(HTTPException):
     def __init__(self, task_id: int):
         super().__init__(status_code=404, detail=f"Task with ID {task_id} not found for deletion")
+
+
+class TaskRestoreConflictException(HTTPException):
+    def __init__(self, task_id: int):
+        super().__init__(status_code=409, detail=f"Task with ID {task_id} already exists; it cannot be restored")
+
+
+class OTPRateLimitException(HTTPException):
+    def __init__(self, retry_after: int):
+        super().__init__(
+            status_code=429,
+            detail="Too many OTP requests. Please try again later.",
+            headers={"Retry-After": str(retry_after)},
+        )
+
+
+class InvalidSyncCursorException(HTTPException):
+    def __init__(self):
+        super().__init__(status_code=400, detail="Invalid sync cursor")
+
+
+class SyncCursorExpiredException(HTTPException):
+    def __init__(self):
+        super().__init__(
+            status_code=410,
+            detail="Sync cursor is older than the deletion history. Download the full task list again.",
+        )
+
+
+class ExportNotFoundException(HTTPException):
+    def __init__(self, export_id: int):
+        super().__init__(status_code=404, detail=f"Export with ID {export_id} not found")
+
+
+class ExportFormatUnavailableException(HTTPException):
+    def __init__(self, file_format: str, available: list):
+        super().__init__(
+            status_code=400,
+            detail=f"Export format '{file_format}' is not available. Use one of: {', '.join(available)}",
+        )
+
+
+class ExportLimitException(HTTPException):
+    def __init__(self, limit: int):
+        super().__init__(
+            status_code=429,
+            detail=f"At most {limit} exports may be in progress per user. Try again when one finishes.",
+        )
+
+
+class ExportNotReadyException(HTTPException):
+    def __init__(self, status: str):
+        super().__init__(status_code=409, detail=f"Export is {status}, not ready for download")
+
+
+class ExportExpiredException(HTTPException):
+    def __init__(self):
+        super().__init__(status_code=410, detail="Export has expired. Request it again.")
+
+
+class TaskShardMovingException(HTTPException):
+    def __init__(self, retry_after: int):
+        super().__init__(
+            status_code=503,
+            detail="This user's tasks are being moved to another database. Try again shortly.",
+            headers={"Retry-After": str(retry_after)},
+        )
+
+
+class TaskShardingUnsupportedException(HTTPException):
+    def __init__(self, feature: str):
+        super().__init__(status_code=501, detail=f"{feature} is not available while tasks are sharded")
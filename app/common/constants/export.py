@@ -0,0 +1,34 @@
+# Export job lifecycle: queued -> running -> done -> expired, or failed.
+EXPORT_QUEUED = "queued"
+EXPORT_RUNNING = "running"
+EXPORT_DONE = "done"
+EXPORT_FAILED = "failed"
+EXPORT_EXPIRED = "expired"
+EXPORT_ACTIVE_STATUSES = (EXPORT_QUEUED, EXPORT_RUNNING)
+
+# Columns of each report, in file order, with the type written to columnar files.
+EXPORT_REPORTS = {
+    "tasks": [
+        ("task_id", "int"),
+        ("title", "str"),
+        ("status", "str"),
+        ("due_date", "date"),
+        ("overdue_at", "datetime"),
+        ("created_at", "datetime"),
+        ("updated_at", "datetime"),
+        ("owner_id", "int"),
+        ("owner_username", "str"),
+        ("owner_name", "str"),
+        ("owner_email", "str"),
+    ],
+    "users": [
+        ("user_id", "int"),
+        ("username", "str"),
+        ("name", "str"),
+        ("email", "str"),
+        ("role", "str"),
+        ("phone_number", "str"),
+        ("created_at", "datetime"),
+        ("task_count", "int"),
+    ],
+}
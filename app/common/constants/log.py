@@ -36,5 +36,14 @@ LOGGING_CONFIG = {
     },
 }
 
-logging.config.dictConfig(LOGGING_CONFIG)
 logger = logging.getLogger("fastapi")
+
+_logging_configured = False
+
+
+def configure_logging():
+    """Apply LOGGING_CONFIG once; called from the app lifespan and CLI entry points."""
+    global _logging_configured
+    if not _logging_configured:
+        logging.config.dictConfig(LOGGING_CONFIG)
+        _logging_configured = True
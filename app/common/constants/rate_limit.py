@@ -0,0 +1,13 @@
+# Per-route request limits applied by RateLimitMiddleware.
+# Each rule is (method, path, limit). "*" matches any method, a trailing "*"
+# in the path matches by prefix, and a limit of None exempts the route.
+# The first matching rule wins; unmatched requests use RATE_LIMIT_DEFAULT.
+RATE_LIMIT_RULES = [
+    ("*", "/", None),
+    ("*", "/health/*", None),
+    ("POST", "/auth/signin", "10/minute"),
+    ("POST", "/auth/refresh", "30/minute"),
+    ("POST", "/auth/signup", "5/minute"),
+    ("POST", "/auth/resend-signup-otp", "5/minute"),
+    ("GET", "/tasks/", "120/minute"),
+]
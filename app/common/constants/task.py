@@ -0,0 +1,16 @@
+# Task statuses are free text; these spellings count as finished work.
+TASK_DONE_STATUSES = tuple(
+    variant
+    for status in ("done", "completed", "successful")
+    for variant in (status, status.capitalize(), status.upper())
+)
+# The same condition as literal SQL. ix_tasks_open_due is partial on it, and SQLite
+# only uses a partial index when the query repeats the condition with literal values.
+TASK_OPEN_SQL = "status NOT IN (" + ", ".join(f"'{status}'" for status in TASK_DONE_STATUSES) + ")"
+
+# Published with {"task_ids": [...]} each time the scanner flags a batch.
+TASK_OVERDUE_EVENT = "task.overdue"
+# Sequence number of the newest tombstone compaction has removed.
+TOMBSTONE_HORIZON_JOB = "task_tombstone_horizon"
+# Highest task id handed out to workers when tasks are sharded (app/database/shards.py).
+TASK_ID_ALLOCATOR_JOB = "task_id_high"
@@ -8,6 +8,8 @@ class UserRoleType(TypeDecorator):
     when binding parameters and uses `UserRole.from_string` on result values.
     """
     impl = String
+    # Stateless, so statements using it can go in SQLAlchemy's compiled cache.
+    cache_ok = True
 
     def process_bind_param(self, value, dialect):
         if value is None:
@@ -20,7 +20,13 @@ class Settings(BaseSettings):
 
     SECRET_KEY: str = os.getenv("SECRET_KEY", "supersecretkey")
     ALGORITHM: str = os.getenv("ALGORITHM", "HS256")
-    ACCESS_TOKEN_EXPIRE_MINUTES: int = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "30"))
+    ACCESS_TOKEN_EXPIRE_MINUTES: int = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "15"))
+    REFRESH_TOKEN_EXPIRE_DAYS: int = int(os.getenv("REFRESH_TOKEN_EXPIRE_DAYS", "7"))
+    TOKEN_REVOCATION_BACKEND: str = os.getenv("TOKEN_REVOCATION_BACKEND", "memory")
+    TOKEN_REVOCATION_REFRESH_SECONDS: float = float(os.getenv("TOKEN_REVOCATION_REFRESH_SECONDS", "2"))
+    TOKEN_REVOCATION_BLOOM_CAPACITY: int = int(os.getenv("TOKEN_REVOCATION_BLOOM_CAPACITY", "100000"))
+    PASSWORD_HASH_SCHEME: str = os.getenv("PASSWORD_HASH_SCHEME", "bcrypt")
+    PASSWORD_HASH_ROUNDS: int = int(os.getenv("PASSWORD_HASH_ROUNDS", "0"))  # 0 = scheme default; see calibrate-password-hash
 
     GOOGLE_CLIENT_ID: str = os.getenv("GOOGLE_CLIENT_ID", "")
     GOOGLE_CLIENT_SECRET: str = os.getenv("GOOGLE_CLIENT_SECRET", "")
@@ -36,5 +42,71 @@ class Settings(BaseSettings):
     USE_CREDENTIALS: bool = os.getenv("USE_CREDENTIALS", "True") in ["True", "true"]
     VALIDATE_CERTS: bool = os.getenv("VALIDATE_CERTS", "True") in ["True", "true"]
 
+    DB_CREATE_SCHEMA: bool = os.getenv("DB_CREATE_SCHEMA", "False") in ["True", "true"]
+    SEED_TEST_ADMIN: bool = os.getenv("SEED_TEST_ADMIN", "False") in ["True", "true"]
+    DB_POOL_WARM_CONNECTIONS: int = int(os.getenv("DB_POOL_WARM_CONNECTIONS", "1"))
+
+    SERVER_HOST: str = os.getenv("SERVER_HOST", "0.0.0.0")
+    SERVER_PORT: int = int(os.getenv("SERVER_PORT", "8000"))
+    WEB_CONCURRENCY: int = int(os.getenv("WEB_CONCURRENCY", "0"))  # 0 = one worker per CPU
+    KEEP_ALIVE_SECONDS: int = int(os.getenv("KEEP_ALIVE_SECONDS", "75"))
+    SOCKET_BACKLOG: int = int(os.getenv("SOCKET_BACKLOG", "2048"))
+    GRACEFUL_SHUTDOWN_SECONDS: int = int(os.getenv("GRACEFUL_SHUTDOWN_SECONDS", "30"))
+    WORKER_BOOT_GRACE_SECONDS: float = float(os.getenv("WORKER_BOOT_GRACE_SECONDS", "2"))
+
+    OTP_STORE_BACKEND: str = os.getenv("OTP_STORE_BACKEND", "memory")
+    OTP_EXPIRE_SECONDS: int = int(os.getenv("OTP_EXPIRE_SECONDS", "300"))
+    OTP_REUSE_WINDOW_SECONDS: int = int(os.getenv("OTP_REUSE_WINDOW_SECONDS", "60"))
+    OTP_MAX_ATTEMPTS: int = int(os.getenv("OTP_MAX_ATTEMPTS", "5"))
+    OTP_EMAIL_BUCKET_CAPACITY: int = int(os.getenv("OTP_EMAIL_BUCKET_CAPACITY", "3"))
+    OTP_EMAIL_REFILL_SECONDS: float = float(os.getenv("OTP_EMAIL_REFILL_SECONDS", "120"))
+    OTP_IP_BUCKET_CAPACITY: int = int(os.getenv("OTP_IP_BUCKET_CAPACITY", "10"))
+    OTP_IP_REFILL_SECONDS: float = float(os.getenv("OTP_IP_REFILL_SECONDS", "30"))
+
+    RATE_LIMIT_ENABLED: bool = os.getenv("RATE_LIMIT_ENABLED", "True") in ["True", "true"]
+    RATE_LIMIT_BACKEND: str = os.getenv("RATE_LIMIT_BACKEND", "memory")
+    RATE_LIMIT_DEFAULT: str = os.getenv("RATE_LIMIT_DEFAULT", "300/minute")
+
+    OVERDUE_SCAN_ENABLED: bool = os.getenv("OVERDUE_SCAN_ENABLED", "True") in ["True", "true"]
+    OVERDUE_SCAN_INTERVAL_SECONDS: int = int(os.getenv("OVERDUE_SCAN_INTERVAL_SECONDS", "300"))
+    OVERDUE_SCAN_BATCH_SIZE: int = int(os.getenv("OVERDUE_SCAN_BATCH_SIZE", "500"))
+    OVERDUE_SCAN_MAX_BATCHES: int = int(os.getenv("OVERDUE_SCAN_MAX_BATCHES", "100"))
+
+    TASK_CHANGES_SETTLE_SECONDS: float = float(os.getenv("TASK_CHANGES_SETTLE_SECONDS", "1"))
+    TASK_COLUMN_INDEX_ENABLED: bool = os.getenv("TASK_COLUMN_INDEX_ENABLED", "True") in ["True", "true"]  # needs numpy
+    TASK_COLUMN_INDEX_REFRESH_SECONDS: float = float(os.getenv("TASK_COLUMN_INDEX_REFRESH_SECONDS", "1"))
+    TASK_READ_COALESCING_ENABLED: bool = os.getenv("TASK_READ_COALESCING_ENABLED", "True") in ["True", "true"]
+    TASK_TOMBSTONE_RETENTION_DAYS: int = int(os.getenv("TASK_TOMBSTONE_RETENTION_DAYS", "30"))
+    TOMBSTONE_COMPACTION_ENABLED: bool = os.getenv("TOMBSTONE_COMPACTION_ENABLED", "True") in ["True", "true"]
+    TOMBSTONE_COMPACTION_INTERVAL_SECONDS: int = int(os.getenv("TOMBSTONE_COMPACTION_INTERVAL_SECONDS", "3600"))
+
+    # Comma-separated database URLs for task shards 1..N; shard 0 is DATABASE_URL. Empty = no sharding.
+    TASK_SHARD_URLS: str = os.getenv("TASK_SHARD_URLS", "")
+    TASK_SHARD_ID_BLOCK_SIZE: int = int(os.getenv("TASK_SHARD_ID_BLOCK_SIZE", "100"))
+    TASK_SHARD_MOVE_BATCH_SIZE: int = int(os.getenv("TASK_SHARD_MOVE_BATCH_SIZE", "1000"))
+    TASK_SHARD_MOVE_SETTLE_SECONDS: float = float(os.getenv("TASK_SHARD_MOVE_SETTLE_SECONDS", "2"))
+    # Threads per extra shard for cross-shard reads, shared by all requests; each engine pools up to 15 connections.
+    TASK_SHARD_THREADS_PER_SHARD: int = int(os.getenv("TASK_SHARD_THREADS_PER_SHARD", "10"))
+
+    TASK_ARCHIVE_ENABLED: bool = os.getenv("TASK_ARCHIVE_ENABLED", "True") in ["True", "true"]
+    TASK_ARCHIVE_INTERVAL_SECONDS: int = int(os.getenv("TASK_ARCHIVE_INTERVAL_SECONDS", "3600"))
+    TASK_ARCHIVE_AFTER_DAYS: int = int(os.getenv("TASK_ARCHIVE_AFTER_DAYS", "90"))
+    TASK_ARCHIVE_BATCH_SIZE: int = int(os.getenv("TASK_ARCHIVE_BATCH_SIZE", "500"))
+    TASK_ARCHIVE_MAX_BATCHES: int = int(os.getenv("TASK_ARCHIVE_MAX_BATCHES", "100"))
+
+    USER_PURGE_ENABLED: bool = os.getenv("USER_PURGE_ENABLED", "True") in ["True", "true"]
+    USER_PURGE_INTERVAL_SECONDS: int = int(os.getenv("USER_PURGE_INTERVAL_SECONDS", "300"))
+    USER_PURGE_CHUNK_SIZE: int = int(os.getenv("USER_PURGE_CHUNK_SIZE", "500"))
+
+    BATCH_FETCH_MAX_IDS: int = int(os.getenv("BATCH_FETCH_MAX_IDS", "100"))
+
+    EXPORT_DIR: str = os.getenv("EXPORT_DIR", "exports")
+    EXPORT_WORKERS: int = int(os.getenv("EXPORT_WORKERS", "2"))
+    EXPORT_BATCH_SIZE: int = int(os.getenv("EXPORT_BATCH_SIZE", "1000"))
+    EXPORT_MAX_ACTIVE_PER_USER: int = int(os.getenv("EXPORT_MAX_ACTIVE_PER_USER", "2"))
+    EXPORT_TTL_HOURS: int = int(os.getenv("EXPORT_TTL_HOURS", "24"))
+    EXPORT_CLEANUP_ENABLED: bool = os.getenv("EXPORT_CLEANUP_ENABLED", "True") in ["True", "true"]
+    EXPORT_CLEANUP_INTERVAL_SECONDS: int = int(os.getenv("EXPORT_CLEANUP_INTERVAL_SECONDS", "600"))
+
     model_config = SettingsConfigDict(env_file=".env", env_file_encoding="utf-8")
 settings = Settings()
@@ -1,11 +1,16 @@
 import os
-from sqlalchemy import create_engine
-from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import Session, sessionmaker
 
 from app.models.base import Base
 from app.models.user import User
 from app.models.task import Task
+from app.models.task_counter import TaskCounter
+from app.models.job_watermark import JobWatermark
+from app.models.task_tombstone import TaskTombstone
+from app.models.task_shard import TaskShardAssignment
+from app.models.archived_task import ArchivedTask
+from app.database import schema  # registers the SQLite extras installed by create_all
 from app.common.constants.database import SQLALCHEMY_DATABASE_URL
 from app.common.constants.log import logger
 
@@ -14,20 +19,76 @@ BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
 DATABASE_DIR = os.path.join(BASE_DIR, "database")
 
 DB_PATH = os.path.join(DATABASE_DIR, "database.db")  
-logger.info(f"Initializing database engine with URL: {SQLALCHEMY_DATABASE_URL}")
-
-try:
-    engine = create_engine(
-        SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False}
-    )
-    logger.info("Database engine initialized successfully.")
-except Exception as e:
-    logger.error(f"Error initializing database engine: {e}")
-    raise
-
-try:
-    SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
-    logger.info("SessionLocal created successfully.")
-except Exception as e:
-    logger.error(f"Error creating SessionLocal: {e}")
-    raise
\ No newline at end of file
+
+SessionLocal = sessionmaker(autocommit=False, autoflush=False)
+
+_engine = None
+
+
+def commit_without_expiry(db: Session):
+    """
+    Commit without expiring loaded objects. For writes whose RETURNING
+    already loaded the row, so reading it afterwards needs no SELECT.
+    """
+    expire_on_commit, db.expire_on_commit = db.expire_on_commit, False
+    try:
+        db.commit()
+    finally:
+        db.expire_on_commit = expire_on_commit
+
+
+def enable_sqlite_foreign_keys(dbapi_connection, connection_record):
+    # SQLite ignores foreign keys (and so ON DELETE CASCADE) unless asked per connection.
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA foreign_keys=ON")
+    cursor.close()
+
+
+def get_engine():
+    """Create the engine on first use and bind SessionLocal to it."""
+    global _engine
+    if _engine is None:
+        logger.info(f"Initializing database engine with URL: {SQLALCHEMY_DATABASE_URL}")
+        try:
+            _engine = create_engine(
+                SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False}
+            )
+            if _engine.dialect.name == "sqlite":
+                event.listen(_engine, "connect", enable_sqlite_foreign_keys)
+            SessionLocal.configure(bind=_engine)
+            logger.info("Database engine initialized successfully.")
+        except Exception as e:
+            logger.error(f"Error initializing database engine: {e}")
+            raise
+    return _engine
+
+
+def warm_up_pool(connections: int = 1):
+    """Open and return *connections* pooled connections so the first requests skip the connect cost."""
+    engine = get_engine()
+    opened = [engine.connect() for _ in range(connections)]
+    try:
+        for conn in opened:
+            conn.exec_driver_sql("SELECT 1")
+    finally:
+        for conn in opened:
+            conn.close()
+    logger.info(f"Database pool warmed with {connections} connection(s).")
+
+
+def dispose_engine():
+    """Close pooled connections; the engine is rebuilt on the next get_engine() call."""
+    global _engine
+    if _engine is not None:
+        _engine.dispose()
+        _engine = None
+
+
+def _dispose_after_fork():
+    # A forked child must not reuse the parent's pooled connections.
+    if _engine is not None:
+        _engine.dispose(close=False)
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_dispose_after_fork)
@@ -0,0 +1,267 @@
+"""
+SQLite-specific schema that SQLAlchemy's create_all cannot express
+(FTS5 virtual tables and triggers), plus columns and indexes added to
+tables that already exist. It is installed right after
+Base.metadata.create_all and can be (re)applied to an existing database with
+`python -m app.manage`.
+"""
+from sqlalchemy import event, text
+
+from app.models.base import Base
+from app.models.task import Task
+from app.models.task_counter import TaskCounter
+from app.models.task_tombstone import TaskTombstone
+from app.common.constants.log import logger
+
+TASK_SEARCH_DDL = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS tasks_fts USING fts5(
+        title, description,
+        content='tasks', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS tasks_fts_ai AFTER INSERT ON tasks BEGIN
+        INSERT INTO tasks_fts(rowid, title, description) VALUES (new.id, new.title, new.description);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS tasks_fts_ad AFTER DELETE ON tasks BEGIN
+        INSERT INTO tasks_fts(tasks_fts, rowid, title, description)
+        VALUES ('delete', old.id, old.title, old.description);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS tasks_fts_au AFTER UPDATE OF title, description ON tasks BEGIN
+        INSERT INTO tasks_fts(tasks_fts, rowid, title, description)
+        VALUES ('delete', old.id, old.title, old.description);
+        INSERT INTO tasks_fts(rowid, title, description) VALUES (new.id, new.title, new.description);
+    END
+    """,
+]
+
+
+_COUNTER_UPSERT = "ON CONFLICT (dimension, key) DO UPDATE SET count = count + excluded.count"
+
+TASK_COUNTERS_DDL = [
+    f"""
+    CREATE TRIGGER IF NOT EXISTS task_counters_ai AFTER INSERT ON tasks BEGIN
+        INSERT INTO task_counters (dimension, key, count) VALUES
+            ('total', '', 1), ('status', new.status, 1), ('user', COALESCE(new.user_id, ''), 1)
+        {_COUNTER_UPSERT};
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS task_counters_ad AFTER DELETE ON tasks BEGIN
+        INSERT INTO task_counters (dimension, key, count) VALUES
+            ('total', '', -1), ('status', old.status, -1), ('user', COALESCE(old.user_id, ''), -1)
+        {_COUNTER_UPSERT};
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS task_counters_au AFTER UPDATE OF status, user_id ON tasks
+    WHEN old.status IS NOT new.status OR old.user_id IS NOT new.user_id BEGIN
+        INSERT INTO task_counters (dimension, key, count) VALUES
+            ('status', old.status, -1), ('status', new.status, 1),
+            ('user', COALESCE(old.user_id, ''), -1), ('user', COALESCE(new.user_id, ''), 1)
+        {_COUNTER_UPSERT};
+    END
+    """,
+]
+
+# ('version', '') goes up on every write to tasks and backs the task list ETag.
+# It is never rebuilt: going back to an old value would revive stale ETags.
+TASK_VERSION_DDL = [
+    f"""
+    CREATE TRIGGER IF NOT EXISTS task_version_a{op} AFTER {event} ON tasks BEGIN
+        INSERT INTO task_counters (dimension, key, count) VALUES ('version', '', 1)
+        {_COUNTER_UPSERT};
+    END
+    """
+    for op, event in (("i", "INSERT"), ("u", "UPDATE"), ("d", "DELETE"))
+]
+
+# Deleting a user hides their tasks at once, before the purge removes them, so
+# it changes the task list as much as a task write does.
+USER_DELETED_VERSION_DDL = [
+    f"""
+    CREATE TRIGGER IF NOT EXISTS user_deleted_task_version AFTER UPDATE OF deleted_at ON users
+    WHEN old.deleted_at IS NULL AND new.deleted_at IS NOT NULL BEGIN
+        INSERT INTO task_counters (dimension, key, count) VALUES ('version', '', 1)
+        {_COUNTER_UPSERT};
+    END
+    """,
+]
+
+TASK_COUNTERS_REBUILD = [
+    "DELETE FROM task_counters WHERE dimension != 'version'",
+    "INSERT INTO task_counters (dimension, key, count) SELECT 'total', '', COUNT(*) FROM tasks",
+    "INSERT INTO task_counters (dimension, key, count) SELECT 'status', status, COUNT(*) FROM tasks GROUP BY status",
+    "INSERT INTO task_counters (dimension, key, count) "
+    "SELECT 'user', COALESCE(user_id, ''), COUNT(*) FROM tasks GROUP BY user_id",
+]
+
+
+# Covers TaskService.delete_task, ORM cascades from user deletion and raw SQL alike.
+TASK_TOMBSTONES_DDL = [
+    """
+    CREATE TRIGGER IF NOT EXISTS task_tombstones_ad AFTER DELETE ON tasks BEGIN
+        INSERT INTO task_tombstones (task_id, user_id, deleted_at)
+        VALUES (old.id, old.user_id, strftime('%Y-%m-%d %H:%M:%f', 'now'));
+    END
+    """,
+]
+
+
+def _table_exists(connection, name: str) -> bool:
+    return connection.execute(
+        text("SELECT 1 FROM sqlite_master WHERE name = :name"), {"name": name}
+    ).first() is not None
+
+
+def rebuild_task_search(connection):
+    """Re-index every row of `tasks` into tasks_fts."""
+    connection.execute(text("INSERT INTO tasks_fts(tasks_fts) VALUES ('rebuild')"))
+    logger.info("Task search index rebuilt.")
+
+
+def install_task_search(connection):
+    """Create the FTS5 index and its sync triggers, backfilling when the index is new."""
+    created = not _table_exists(connection, "tasks_fts")
+    for statement in TASK_SEARCH_DDL:
+        connection.execute(text(statement))
+    if created:
+        rebuild_task_search(connection)
+
+
+def rebuild_task_counters(connection):
+    """Recompute task_counters from scratch inside the caller's transaction."""
+    for statement in TASK_COUNTERS_REBUILD:
+        connection.execute(text(statement))
+    logger.info("Task counters rebuilt.")
+
+
+# An overdue counter once kept by triggers; the summary counts overdue tasks on ix_tasks_open_due.
+RETIRED_TRIGGERS = ["task_overdue_ai", "task_overdue_ad", "task_overdue_au"]
+
+
+def install_task_counters(connection):
+    """Create the counter table and triggers, filling the counters when the triggers are new."""
+    TaskCounter.__table__.create(connection, checkfirst=True)
+    for name in RETIRED_TRIGGERS:
+        connection.execute(text(f'DROP TRIGGER IF EXISTS "{name}"'))
+    connection.execute(text("DELETE FROM task_counters WHERE dimension = 'overdue'"))
+    created = not _table_exists(connection, "task_counters_ai")
+    for statement in TASK_COUNTERS_DDL + TASK_VERSION_DDL:
+        connection.execute(text(statement))
+    if _table_exists(connection, "users"):  # task shards have no users table
+        for statement in USER_DELETED_VERSION_DDL:
+            connection.execute(text(statement))
+    if created:
+        rebuild_task_counters(connection)
+
+
+def install_task_tombstones(connection):
+    TaskTombstone.__table__.create(connection, checkfirst=True)
+    for statement in TASK_TOMBSTONES_DDL:
+        connection.execute(text(statement))
+
+
+def ensure_columns(connection):
+    """
+    create_all never alters tables; add columns declared since a table was
+    created. A column qualifies if it is nullable or has a constant server default.
+    """
+    for table in Base.metadata.sorted_tables:
+        if not _table_exists(connection, table.name):
+            continue
+        existing = {row[1] for row in connection.execute(text(f'PRAGMA table_info("{table.name}")'))}
+        for column in table.columns:
+            if column.name in existing:
+                continue
+            default = getattr(column.server_default, "arg", None)
+            if column.server_default is not None and not isinstance(default, str):
+                continue  # e.g. now(): SQLite cannot add it to existing rows
+            if not column.nullable and default is None:
+                continue
+            column_type = column.type.compile(dialect=connection.dialect)
+            ddl = f'ALTER TABLE "{table.name}" ADD COLUMN "{column.name}" {column_type}'
+            if default is not None:
+                quoted = default.replace("'", "''")
+                ddl += f" DEFAULT '{quoted}'" if column.nullable else f" NOT NULL DEFAULT '{quoted}'"
+            connection.execute(text(ddl))
+            logger.info(f"Added column {table.name}.{column.name}")
+
+
+# Indexes no longer declared on a model; dropped so the planner cannot pick them.
+RETIRED_INDEXES = [
+    "ix_tasks_status_due_date",  # replaced by the partial ix_tasks_unflagged_due
+]
+
+
+def ensure_indexes(connection):
+    """
+    create_all only indexes new tables; add indexes declared since a table
+    was created and drop retired ones.
+    """
+    for table in Base.metadata.sorted_tables:
+        if _table_exists(connection, table.name):
+            for index in table.indexes:
+                index.create(connection, checkfirst=True)
+    for name in RETIRED_INDEXES:
+        connection.execute(text(f'DROP INDEX IF EXISTS "{name}"'))
+
+
+def ensure_task_autoincrement(connection):
+    """
+    Rebuild a `tasks` table created without AUTOINCREMENT. Without it SQLite
+    hands out max(id) + 1, reusing the ids of archived tasks once the tasks
+    above them are deleted. The old table's indexes and triggers go with it
+    and are recreated by the steps after this one.
+    """
+    row = connection.execute(text("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = 'tasks'")).first()
+    if row is None or "AUTOINCREMENT" in row.sql.upper():
+        return
+    connection.execute(text("ALTER TABLE tasks RENAME TO tasks_before_autoincrement"))
+    # Indexes keep their names when the table is renamed; free them for the new table.
+    for (index,) in connection.execute(text(
+        "SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = 'tasks_before_autoincrement' "
+        "AND sql IS NOT NULL"
+    )).all():
+        connection.execute(text(f'DROP INDEX "{index}"'))
+    Task.__table__.create(connection)
+    columns = ", ".join(f'"{column.name}"' for column in Task.__table__.columns)
+    connection.execute(text(f"INSERT INTO tasks ({columns}) SELECT {columns} FROM tasks_before_autoincrement"))
+    connection.execute(text("DROP TABLE tasks_before_autoincrement"))
+    logger.info("Rebuilt the tasks table with AUTOINCREMENT ids.")
+
+
+def reserve_archived_task_ids(connection):
+    """Keep the tasks id sequence above every archived id, so restores never collide."""
+    if not _table_exists(connection, "tasks_archive"):
+        return
+    connection.execute(text(
+        "UPDATE sqlite_sequence SET seq = (SELECT MAX(id) FROM tasks_archive) "
+        "WHERE name = 'tasks' AND seq < (SELECT MAX(id) FROM tasks_archive)"
+    ))
+    connection.execute(text(
+        "INSERT INTO sqlite_sequence (name, seq) SELECT 'tasks', MAX(id) FROM tasks_archive "
+        "HAVING MAX(id) IS NOT NULL AND NOT EXISTS (SELECT 1 FROM sqlite_sequence WHERE name = 'tasks')"
+    ))
+
+
+def install_sqlite_extras(connection):
+    ensure_task_autoincrement(connection)
+    reserve_archived_task_ids(connection)
+    ensure_columns(connection)
+    ensure_indexes(connection)
+    install_task_search(connection)
+    install_task_counters(connection)
+    install_task_tombstones(connection)
+
+
+@event.listens_for(Base.metadata, "after_create")
+def _after_create(target, connection, **kw):
+    if connection.dialect.name == "sqlite":
+        install_sqlite_extras(connection)
@@ -0,0 +1,307 @@
+"""
+Tasks partitioned by user across several databases.
+
+With TASK_SHARD_URLS unset all tasks live in the main database and nothing
+here is used. Otherwise shard 0 is the main database (DATABASE_URL) and each
+URL in TASK_SHARD_URLS adds a shard holding only the task tables: tasks with
+their counters, tombstones, search index, archive and job watermarks. Users stay in
+the main database, so tasks on shards 1..N have no foreign key to them.
+
+Placement: task_shard_assignments in the main database names the one shard
+holding all of a user's tasks. A user gets a row with their first task, on
+user_id % shard count, unless shard 0 still has tasks of theirs from before
+sharding. Users without a row are on shard 0. `move-user-tasks` and
+`rebalance-task-shards` (app/manage.py) move users between shards.
+
+Ids: new tasks take ids from blocks of TASK_SHARD_ID_BLOCK_SIZE reserved in the
+main database, so ids are unique across shards and survive moves. Workers
+interleave their blocks, so id order is close to, not exactly, creation order.
+"""
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from functools import wraps
+from typing import Callable, Dict, Iterator, List, NamedTuple, Optional
+
+from sqlalchemy import create_engine, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.config import settings
+from app.common.constants.exceptions import TaskShardMovingException
+from app.common.constants.log import logger
+from app.common.constants.task import TASK_ID_ALLOCATOR_JOB
+from app.models.base import Base
+from app.models.job_watermark import JobWatermark
+from app.models.task import Task
+from app.models.task_counter import TaskCounter
+from app.models.task_shard import TaskShardAssignment
+from app.models.task_tombstone import TaskTombstone
+from app.models.archived_task import ArchivedTask
+from app.repository.job_repository import JobRepository
+from app.repository.task_repository import TaskRepository
+from app.repository.user_repository import UserRepository
+
+# What a shard other than 0 holds; the SQLite triggers and FTS index come with tasks.
+SHARD_TABLES = [
+    Task.__table__, TaskCounter.__table__, TaskTombstone.__table__, ArchivedTask.__table__, JobWatermark.__table__,
+]
+
+
+class ShardMove(NamedTuple):
+    user_id: int
+    source: int
+    target: int
+    tasks: int
+
+
+class TaskShards:
+    def __init__(self, urls: List[str]):
+        self.engines = [create_engine(url, connect_args={"check_same_thread": False}) for url in urls]
+        # Shard sessions close as soon as on_shard returns, so objects a write
+        # committed must keep their loaded state rather than expire and detach.
+        self._sessions = [
+            sessionmaker(bind=engine, autocommit=False, autoflush=False, expire_on_commit=False)
+            for engine in self.engines
+        ]
+        # Only shards 1..N run here; shard 0 runs on the caller's thread with its session.
+        self._pool = ThreadPoolExecutor(
+            max_workers=max(1, len(urls) * settings.TASK_SHARD_THREADS_PER_SHARD), thread_name_prefix="task-shard"
+        )
+        self._next_id = 0
+        self._last_id = 0
+        self._id_lock = threading.Lock()
+
+    @property
+    def count(self) -> int:
+        return len(self.engines) + 1
+
+    def create_schema(self) -> None:
+        for engine in self.engines:
+            Base.metadata.create_all(bind=engine, tables=SHARD_TABLES)
+
+    def dispose(self, close: bool = True) -> None:
+        for engine in self.engines:
+            engine.dispose(close=close)
+        if close:
+            self._pool.shutdown(wait=True)
+
+    @contextmanager
+    def session(self, db: Session, shard: int) -> Iterator[Session]:
+        """A session on *shard*; shard 0 is *db* itself."""
+        if shard == 0:
+            yield db
+            return
+        session = self._sessions[shard - 1]()
+        try:
+            yield session
+        finally:
+            session.close()
+
+    def on_shard(self, db: Session, shard: int, func: Callable, hidden_owners: Optional[List[int]] = None):
+        """
+        Run *func(TaskRepository)* on one shard. Shards other than 0 have no
+        users table, so the ids of deleted users are read from *db* and handed
+        to the repository unless *hidden_owners* already lists them.
+        """
+        if shard == 0:
+            return func(TaskRepository(db))
+        if hidden_owners is None:
+            hidden_owners = UserRepository(db).get_deleted_user_ids()
+        with self.session(db, shard) as session:
+            return func(TaskRepository(session, hidden_owners))
+
+    def on_every_shard(self, db: Session, func: Callable) -> List:
+        """
+        Run *func(TaskRepository)* on every shard; results in shard order.
+        Shards 1..N run in the pool while shard 0 runs here: *db* is the
+        caller's session and must stay on the caller's thread.
+        """
+        hidden_owners = UserRepository(db).get_deleted_user_ids()
+        others = [
+            self._pool.submit(self.on_shard, db, shard, func, hidden_owners) for shard in range(1, self.count)
+        ]
+        first = func(TaskRepository(db))
+        return [first] + [future.result() for future in others]
+
+    # ----- placement -----
+
+    def _assignment(self, db: Session, user_id: int):
+        return db.execute(
+            select(TaskShardAssignment.shard, TaskShardAssignment.moving)
+            .where(TaskShardAssignment.user_id == user_id)
+        ).first()
+
+    def shard_for_user(self, db: Session, user_id: int, writing: bool = False) -> int:
+        """The shard holding *user_id*'s tasks. Writes are refused while they are being moved."""
+        assignment = self._assignment(db, user_id)
+        if assignment is None:
+            return 0
+        if writing and assignment.moving:
+            raise TaskShardMovingException(max(1, round(settings.TASK_SHARD_MOVE_SETTLE_SECONDS)))
+        return assignment.shard
+
+    def place_user(self, db: Session, user_id: int) -> int:
+        """The shard for a new task of *user_id*, giving the user a shard on their first task."""
+        if self._assignment(db, user_id) is None:
+            # Tasks from before sharding stay where they are until the user is moved.
+            shard = 0 if TaskRepository(db).user_has_tasks(user_id) else user_id % self.count
+            db.add(TaskShardAssignment(user_id=user_id, shard=shard))
+            try:
+                db.commit()
+            except IntegrityError:
+                # Another request placed the user first, or the user does not exist.
+                db.rollback()
+                if self._assignment(db, user_id) is None:
+                    raise
+        return self.shard_for_user(db, user_id, writing=True)
+
+    # ----- ids -----
+
+    def next_task_id(self, db: Session) -> int:
+        with self._id_lock:
+            if self._next_id >= self._last_id:
+                self._reserve_ids(db)
+            self._next_id += 1
+            return self._next_id
+
+    def _reserve_ids(self, db: Session) -> None:
+        jobs = JobRepository(db)
+        size = settings.TASK_SHARD_ID_BLOCK_SIZE
+        # Blocks start above every existing id, including any written while sharding was off.
+        floor = max(self.on_every_shard(db, lambda repo: repo.get_max_task_id()))
+        high = jobs.increment_watermark(TASK_ID_ALLOCATOR_JOB, size)
+        if high is None:
+            jobs.create_watermark(TASK_ID_ALLOCATOR_JOB, str(floor))
+            high = jobs.increment_watermark(TASK_ID_ALLOCATOR_JOB, size)
+        elif high - size < floor:
+            high = jobs.increment_watermark(TASK_ID_ALLOCATOR_JOB, floor - high + size)
+        self._next_id, self._last_id = high - size, high
+
+    # ----- moves -----
+
+    def move_user(self, db: Session, user_id: int, target: int, batch_size: Optional[int] = None) -> int:
+        """
+        Move a user's tasks to *target*; returns how many were copied.
+
+        The user's task writes get 503 from the start until the directory
+        points at *target*; reads keep going to the source until then. Safe
+        to rerun after a failure: copies left on the target are replaced and
+        leftovers on other shards are removed.
+        """
+        batch_size = batch_size or settings.TASK_SHARD_MOVE_BATCH_SIZE
+        source = self.shard_for_user(db, user_id)
+        db.merge(TaskShardAssignment(user_id=user_id, shard=source, moving=True))
+        db.commit()
+        # Let writes that looked up the shard just before the flag commit.
+        time.sleep(settings.TASK_SHARD_MOVE_SETTLE_SECONDS)
+
+        copied = 0
+        if source != target:
+            self._delete_user_tasks(db, user_id, [target], batch_size)
+            after = None
+            while True:
+                rows = self.on_shard(db, source, lambda repo: repo.get_user_task_rows(user_id, after, batch_size))
+                if not rows:
+                    break
+                self.on_shard(db, target, lambda repo: repo.insert_task_rows(rows))
+                copied += len(rows)
+                after = rows[-1]["id"]
+
+        db.merge(TaskShardAssignment(user_id=user_id, shard=target, moving=False))
+        db.commit()
+        self._delete_user_tasks(db, user_id, [shard for shard in range(self.count) if shard != target], batch_size)
+        logger.info(f"Moved {copied} tasks of user {user_id} from shard {source} to shard {target}")
+        return copied
+
+    def _delete_user_tasks(self, db: Session, user_id: int, shards: List[int], batch_size: int) -> None:
+        for shard in shards:
+            while self.on_shard(db, shard, lambda repo: repo.delete_user_tasks_chunk(user_id, batch_size)) == batch_size:
+                pass
+
+    def plan_rebalance(self, db: Session, tolerance: float = 0.1) -> List[ShardMove]:
+        """
+        Moves that bring every shard within *tolerance* of the mean task count.
+        Greedy: repeatedly send the largest user that still fits from the
+        fullest shard to the emptiest one. Counts come from task_counters.
+        """
+        users: List[Dict[int, int]] = []
+        for counters in self.on_every_shard(db, lambda repo: repo.get_task_counters()):
+            users.append({
+                int(counter.key): counter.count
+                for counter in counters
+                if counter.dimension == "user" and counter.key != "" and counter.count > 0
+            })
+        loads = [sum(shard_users.values()) for shard_users in users]
+        slack = tolerance * sum(loads) / self.count
+        moves: List[ShardMove] = []
+        while True:
+            fullest = max(range(self.count), key=loads.__getitem__)
+            emptiest = min(range(self.count), key=loads.__getitem__)
+            gap = loads[fullest] - loads[emptiest]
+            if gap <= 2 * slack:
+                break
+            # Moving n tasks narrows the gap only while n < gap.
+            fits = [(count, user_id) for user_id, count in users[fullest].items() if count < gap]
+            if not fits:
+                break
+            count, user_id = max(fits)
+            del users[fullest][user_id]
+            users[emptiest][user_id] = count
+            loads[fullest] -= count
+            loads[emptiest] += count
+            moves.append(ShardMove(user_id, fullest, emptiest, count))
+        return moves
+
+
+def each_task_database(db: Session) -> Iterator[Session]:
+    """Yield a session on every database holding tasks: *db* itself, then each extra shard."""
+    yield db
+    shards = get_task_shards()
+    if shards is not None:
+        for shard in range(1, shards.count):
+            with shards.session(db, shard) as session:
+                yield session
+
+
+def on_each_task_database(func: Callable) -> Callable:
+    """Wrap a job taking a session so it runs once per task database."""
+    @wraps(func)
+    def run(db: Session):
+        return [func(session) for session in each_task_database(db)]
+    return run
+
+
+_task_shards: Optional[TaskShards] = None
+
+
+def get_task_shards() -> Optional[TaskShards]:
+    """This worker's shards, or None when TASK_SHARD_URLS is empty."""
+    global _task_shards
+    urls = [url.strip() for url in settings.TASK_SHARD_URLS.split(",") if url.strip()]
+    if not urls:
+        return None
+    if _task_shards is None:
+        _task_shards = TaskShards(urls)
+    return _task_shards
+
+
+def dispose_task_shards() -> None:
+    global _task_shards
+    if _task_shards is not None:
+        _task_shards.dispose()
+        _task_shards = None
+
+
+def _forget_shards_after_fork():
+    # The parent's pooled connections and threads are not usable in a child.
+    global _task_shards
+    if _task_shards is not None:
+        _task_shards.dispose(close=False)
+        _task_shards = None
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_forget_shards_after_fork)
@@ -1,9 +1,12 @@
 #edit 4.0
-from fastapi import Depends, HTTPException, Request, status
-from jose import jwt, JWTError
+from typing import List
+from fastapi import Depends, HTTPException, Query, Request, status
+from jose import JWTError
 from app.config import settings
-from app.services.user_service import UserService
-from app.database.database import SessionLocal  
+from app.cache.token_revocations import get_revocation_checker
+from app.cache.token_versions import get_token_versions
+from app.database.database import SessionLocal
+from app.utils.security import AuthUtils, AuthenticatedUser
 def get_db():
     db = SessionLocal()
     try:
@@ -11,28 +14,34 @@ def get_db():
     finally:
         db.close()
 
-def get_current_user(request: Request, db = Depends(get_db)):
+async def _authenticate(request: Request, missing_detail: str) -> AuthenticatedUser:
     """
-    Retrieve the current user by decoding the JWT token stored as an HTTP-only cookie.
+    Authorize from the access token alone: its claims carry the user's id,
+    role and token version, so no user row is loaded. Revocation is checked
+    against the worker's in-memory filter first.
     """
     token = request.cookies.get("access_token")
     if not token:
-        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Not authenticated: Token missing.")
-    
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail=missing_detail)
     try:
-        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
-        username: str = payload.get("sub")
-        if username is None:
-            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token payload.")
+        payload = AuthUtils.decode_token(token)
+        principal = AuthenticatedUser.from_claims(payload)
+        jti = payload["jti"]
     except JWTError:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token.")
-    
-    user_service = UserService(db)
-    user = user_service.get_user_by_username(username)
-    if not user:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found.")
-    
-    return user
+    except (KeyError, ValueError):
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token payload.")
+    if get_token_versions().is_stale(principal.id, principal.token_version):
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Token is out of date; sign in again.")
+    if await get_revocation_checker().is_revoked(jti):
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Token has been revoked.")
+    return principal
+
+async def get_current_user(request: Request) -> AuthenticatedUser:
+    """
+    Retrieve the current user from the JWT token stored as an HTTP-only cookie.
+    """
+    return await _authenticate(request, "Not authenticated: Token missing.")
 
 def require_role(allowed_roles: list):
     """
@@ -48,20 +57,24 @@ def require_role(allowed_roles: list):
     return role_checker
 
 
-def require_valid_token(request: Request, db=Depends(get_db)):
-    token = request.cookies.get("access_token")
-    if not token:
-        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Authentication token missing.")
-    try:
-        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
-        username: str = payload.get("sub")
-        if not username:
-            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token: missing username.")
-    except JWTError as exc:
-        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token.") from exc
+async def require_valid_token(request: Request) -> AuthenticatedUser:
+    return await _authenticate(request, "Authentication token missing.")
 
-    user_service = UserService(db)
-    user = user_service.get_user_by_username(username)
-    if not user:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found.")
-    return user
\ No newline at end of file
+def batch_ids(ids: str = Query(..., description="Comma-separated ids, e.g. 3,1,2")) -> List[int]:
+    """
+    Parse the ids of a batch fetch, dropping repeats but keeping the order,
+    and enforce BATCH_FETCH_MAX_IDS.
+    """
+    try:
+        parsed = [int(part) for part in ids.split(",") if part.strip()]
+    except ValueError:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail="ids must be comma-separated integers.")
+    unique = list(dict.fromkeys(parsed))
+    if not unique:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail="ids must not be empty.")
+    if len(unique) > settings.BATCH_FETCH_MAX_IDS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {settings.BATCH_FETCH_MAX_IDS} ids per request.",
+        )
+    return unique
@@ -0,0 +1,132 @@
+"""
+Builds export files off the request path.
+
+POST /exports only records a queued job and hands its id to a small thread
+pool (EXPORT_WORKERS per server worker). The builder claims the job, pages
+through the report EXPORT_BATCH_SIZE rows at a time with keyset queries,
+appends each batch to a temporary file and records progress, then renames
+the file into place. Finished files are deleted by cleanup_exports once
+EXPORT_TTL_HOURS have passed.
+"""
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from functools import partial
+from typing import Optional
+
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.common.constants.log import logger
+from app.common.constants.export import EXPORT_REPORTS
+from app.jobs.scheduler import run_job
+from app.repository.export_repository import ExportRepository
+from app.repository.task_repository import TaskRepository
+from app.repository.user_repository import UserRepository
+from app.utils.export_writers import EXPORT_WRITERS
+
+_executor: Optional[ThreadPoolExecutor] = None
+
+
+def export_path(job_id: int, file_format: str) -> str:
+    return os.path.join(settings.EXPORT_DIR, f"export-{job_id}.{EXPORT_WRITERS[file_format].extension}")
+
+
+def _report_batches(db: Session, report: str, filters: dict, batch_size: int):
+    """Yield the report's rows batch by batch, each as a list of tuples in EXPORT_REPORTS order."""
+    if report == "tasks":
+        repo = TaskRepository(db)
+        after = None
+        while True:
+            rows = repo.get_export_tasks_batch(after, batch_size, **filters)
+            if not rows:
+                return
+            yield [tuple(row) for row in rows]
+            after = (rows[-1].user_id, rows[-1].id)
+    else:
+        repo = UserRepository(db)
+        after_id = None
+        while True:
+            rows = repo.get_export_users_batch(after_id, batch_size)
+            if not rows:
+                return
+            yield [tuple(row) for row in rows]
+            after_id = rows[-1].id
+
+
+def _count_rows(db: Session, report: str, filters: dict) -> int:
+    if report == "tasks":
+        return TaskRepository(db).count_export_tasks(**filters)
+    return UserRepository(db).count_export_users()
+
+
+def build_export(db: Session, job_id: int, batch_size: Optional[int] = None) -> bool:
+    """Build the file for a queued export job; False if the job was already taken."""
+    batch_size = batch_size or settings.EXPORT_BATCH_SIZE
+    repo = ExportRepository(db)
+    job = repo.get_job(job_id)
+    if job is None:
+        return False
+    filters = json.loads(job.filters)
+    if not repo.claim_job(job_id, _count_rows(db, job.report, filters)):
+        return False
+
+    final_path = export_path(job_id, job.format)
+    partial_path = final_path + ".part"
+    written = 0
+    try:
+        os.makedirs(settings.EXPORT_DIR, exist_ok=True)
+        writer = EXPORT_WRITERS[job.format](partial_path, EXPORT_REPORTS[job.report])
+        try:
+            for rows in _report_batches(db, job.report, filters, batch_size):
+                writer.write_batch(rows)
+                written += len(rows)
+                repo.record_progress(job_id, written)
+        finally:
+            writer.close()
+        os.replace(partial_path, final_path)
+    except Exception as e:
+        db.rollback()
+        if os.path.exists(partial_path):
+            os.remove(partial_path)
+        repo.mark_failed(job_id, str(e))
+        return True
+    repo.mark_done(job_id, final_path, written, datetime.utcnow() + timedelta(hours=settings.EXPORT_TTL_HOURS))
+    return True
+
+
+def submit_export(job_id: int) -> None:
+    """Queue a job on this worker's export pool."""
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=settings.EXPORT_WORKERS, thread_name_prefix="export")
+    _executor.submit(run_job, partial(build_export, job_id=job_id))
+
+
+def shutdown_export_pool() -> None:
+    """Stop taking jobs; unfinished ones are failed by cleanup_exports later."""
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+
+
+def cleanup_exports(db: Session, now: Optional[datetime] = None) -> int:
+    """
+    Delete the files of exports past expires_at and mark them expired. Jobs
+    queued for longer than EXPORT_TTL_HOURS were lost by a restart and are
+    marked failed. Returns how many files were removed.
+    """
+    now = now or datetime.utcnow()
+    repo = ExportRepository(db)
+    removed = 0
+    for job in repo.get_expired_jobs(now):
+        if job.file_path and os.path.exists(job.file_path):
+            os.remove(job.file_path)
+            removed += 1
+        repo.mark_expired(job.id)
+    stalled = repo.fail_stalled_jobs(now - timedelta(hours=settings.EXPORT_TTL_HOURS))
+    if removed or stalled:
+        logger.info(f"Export cleanup removed {removed} files and failed {stalled} stalled jobs")
+    return removed
@@ -0,0 +1,50 @@
+"""
+Flags tasks that became overdue and publishes their ids.
+
+Each run flags every open task due before today that is not flagged yet, in
+batches of OVERDUE_SCAN_BATCH_SIZE, whenever it was created or rescheduled.
+Unflagged tasks are found through the partial index ix_tasks_unflagged_due,
+which only holds rows with overdue_at IS NULL; finishing or rescheduling a
+task clears overdue_at again (TaskRepository.update_task). A batch is one
+UPDATE ... RETURNING, so concurrent workers never flag or announce the same
+task twice. A run that hits OVERDUE_SCAN_MAX_BATCHES stops and the next run
+carries on.
+"""
+from datetime import date, datetime
+from typing import List, Optional
+
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.common.constants.log import logger
+from app.common.constants.task import TASK_OVERDUE_EVENT
+from app.repository.task_repository import TaskRepository
+from app.services import events
+
+
+def scan_overdue_tasks(
+    db: Session,
+    today: Optional[date] = None,
+    batch_size: Optional[int] = None,
+    max_batches: Optional[int] = None,
+) -> List[int]:
+    """Flag open tasks due before *today* that are not flagged yet; return the flagged ids."""
+    today = today or date.today()
+    batch_size = batch_size or settings.OVERDUE_SCAN_BATCH_SIZE
+    max_batches = max_batches or settings.OVERDUE_SCAN_MAX_BATCHES
+    task_repo = TaskRepository(db)
+
+    statuses = task_repo.get_open_statuses()
+    flagged: List[int] = []
+    for _ in range(max_batches if statuses else 0):
+        task_ids = task_repo.flag_overdue_tasks(statuses, today, datetime.utcnow(), batch_size)
+        if task_ids:
+            flagged.extend(task_ids)
+            events.publish(TASK_OVERDUE_EVENT, {"task_ids": task_ids})
+        if len(task_ids) < batch_size:
+            break
+    else:
+        if statuses:
+            logger.warning(f"Overdue scan stopped after {max_batches} batches; resuming next run")
+    logger.info(f"Overdue scan flagged {len(flagged)} tasks due before {today}")
+    return flagged
@@ -0,0 +1,71 @@
+"""
+Runs blocking jobs on a fixed interval from inside the server process.
+
+Jobs execute in a worker thread with their own database session so they
+never block the event loop. Every worker runs its own scheduler; jobs must be
+safe to run concurrently (see app/jobs/overdue_scanner.py).
+"""
+import asyncio
+from typing import Callable, List
+
+from starlette.concurrency import run_in_threadpool
+
+from app.database.database import SessionLocal
+from app.common.constants.log import logger
+
+
+def run_job(func: Callable):
+    """Run *func(db)* with a session of its own; also used for one-off background work."""
+    db = SessionLocal()
+    try:
+        return func(db)
+    finally:
+        db.close()
+
+
+class PeriodicJob:
+    def __init__(self, name: str, func: Callable, interval_seconds: float):
+        self.name = name
+        self.func = func
+        self.interval_seconds = interval_seconds
+        self._task = None
+
+    async def _loop(self):
+        while True:
+            try:
+                await run_in_threadpool(run_job, self.func)
+            except Exception as e:
+                logger.error(f"Job {self.name} failed: {e}")
+            await asyncio.sleep(self.interval_seconds)
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._loop(), name=f"job:{self.name}")
+            logger.info(f"Scheduled job {self.name} every {self.interval_seconds}s")
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+class Scheduler:
+    def __init__(self):
+        self.jobs: List[PeriodicJob] = []
+
+    def add_job(self, name: str, func: Callable, interval_seconds: float) -> PeriodicJob:
+        job = PeriodicJob(name, func, interval_seconds)
+        self.jobs.append(job)
+        return job
+
+    def start(self):
+        for job in self.jobs:
+            job.start()
+
+    async def stop(self):
+        for job in self.jobs:
+            await job.stop()
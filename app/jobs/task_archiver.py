@@ -0,0 +1,44 @@
+"""
+Moves finished tasks out of the hot `tasks` table.
+
+Tasks in a done status (TASK_DONE_STATUSES) not updated for
+TASK_ARCHIVE_AFTER_DAYS go to tasks_archive, TASK_ARCHIVE_BATCH_SIZE at a
+time. Each batch is its own transaction, so other writers get the SQLite
+write lock in between; a run stops after TASK_ARCHIVE_MAX_BATCHES and the
+next run carries on. Archiving counts as a delete for the counters and the
+changes feed; restoring counts as a new write.
+"""
+from datetime import datetime, timedelta
+from typing import Optional
+
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.common.constants.log import logger
+from app.common.constants.task import TASK_DONE_STATUSES
+from app.repository.task_repository import TaskRepository
+
+
+def archive_done_tasks(
+    db: Session,
+    now: Optional[datetime] = None,
+    batch_size: Optional[int] = None,
+    max_batches: Optional[int] = None,
+) -> int:
+    """Archive done tasks older than the configured age; return how many were moved."""
+    now = now or datetime.utcnow()
+    batch_size = batch_size or settings.TASK_ARCHIVE_BATCH_SIZE
+    max_batches = max_batches or settings.TASK_ARCHIVE_MAX_BATCHES
+    cutoff = now - timedelta(days=settings.TASK_ARCHIVE_AFTER_DAYS)
+    task_repo = TaskRepository(db)
+
+    archived = 0
+    for _ in range(max_batches):
+        task_ids = task_repo.archive_done_tasks(list(TASK_DONE_STATUSES), cutoff, now, batch_size)
+        archived += len(task_ids)
+        if len(task_ids) < batch_size:
+            break
+    else:
+        logger.warning(f"Task archiving stopped after {max_batches} batches; resuming next run")
+    logger.info(f"Archived {archived} done tasks last updated before {cutoff}")
+    return archived
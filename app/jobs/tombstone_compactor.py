@@ -0,0 +1,29 @@
+"""
+Removes task tombstones older than TASK_TOMBSTONE_RETENTION_DAYS.
+
+The highest removed seq is stored as the horizon; GET /tasks/changes answers
+410 to cursors from before it, since deletions they missed are gone.
+"""
+from datetime import datetime, timedelta
+from typing import Optional
+
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.common.constants.task import TOMBSTONE_HORIZON_JOB
+from app.repository.job_repository import JobRepository
+from app.repository.task_repository import TaskRepository
+
+
+def compact_task_tombstones(db: Session, now: Optional[datetime] = None) -> int:
+    """Delete expired tombstones and advance the horizon; return how many were removed."""
+    now = now or datetime.utcnow()
+    cutoff = now - timedelta(days=settings.TASK_TOMBSTONE_RETENTION_DAYS)
+    task_repo = TaskRepository(db)
+    seq = task_repo.get_last_tombstone_seq_before(cutoff)
+    if not seq:
+        return 0
+    # Publish the horizon before deleting, so no cursor is ever accepted
+    # while the tombstones it still needs are being removed.
+    JobRepository(db).set_watermark(TOMBSTONE_HORIZON_JOB, str(seq))
+    return task_repo.delete_tombstones_up_to(seq)
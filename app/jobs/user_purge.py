@@ -0,0 +1,34 @@
+"""
+Finishes user deletions in the background.
+
+DELETE /users/{id} only sets users.deleted_at, so the user disappears from the
+API at once. This job then deletes the user's tasks USER_PURGE_CHUNK_SIZE
+rows at a time, committing after each chunk so other writers get the SQLite
+write lock in between, and finally removes the user row.
+"""
+from typing import Optional
+
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.common.constants.log import logger
+from app.repository.sharded_task_repository import get_task_repository
+from app.repository.user_repository import UserRepository
+
+
+def purge_deleted_users(db: Session, chunk_size: Optional[int] = None) -> int:
+    """Purge every user marked deleted; return how many were purged."""
+    chunk_size = chunk_size or settings.USER_PURGE_CHUNK_SIZE
+    task_repo = get_task_repository(db)
+    user_repo = UserRepository(db)
+    user_ids = user_repo.get_deleted_user_ids()
+    for user_id in user_ids:
+        removed = 0
+        while True:
+            deleted = task_repo.delete_user_tasks_chunk(user_id, chunk_size)
+            removed += deleted
+            if deleted < chunk_size:
+                break
+        user_repo.purge_user(user_id)
+        logger.info(f"Purged user {user_id} and {removed} tasks")
+    return len(user_ids)
@@ -1,33 +1,41 @@
+import time
+from contextlib import asynccontextmanager
+
 import uvicorn
 from fastapi import FastAPI
-from app.common.constants.log import logger
+from starlette.concurrency import run_in_threadpool
+from app.common.constants.log import logger, configure_logging
 
-from app.database.database import Base, engine, SessionLocal
+from app.database.database import Base, SessionLocal, get_engine, warm_up_pool, dispose_engine
 from app.routes.users import router as user_router
 from app.routes.tasks import router as task_router
 from app.routes.auth import router as auth_router
 from app.services.user_service import UserService 
 from app.routes.otp import router as otp_router
+from app.routes.health import router as health_router
+from app.routes.exports import router as export_router
+from app.middleware.rate_limit import RateLimitMiddleware
+from app.config import settings
+from app.cache.otp_store import get_otp_store
+from app.jobs.scheduler import Scheduler
+from app.jobs.overdue_scanner import scan_overdue_tasks
+from app.jobs.tombstone_compactor import compact_task_tombstones
+from app.jobs.user_purge import purge_deleted_users
+from app.jobs.task_archiver import archive_done_tasks
+from app.jobs.exports import cleanup_exports, shutdown_export_pool
+from app.database.shards import get_task_shards, dispose_task_shards, on_each_task_database
 
-logger.info("Creating database tables if they don't exist...")
-try:
-    Base.metadata.create_all(bind=engine)
-except Exception as e:
-    logger.error(f"Error creating database tables: {str(e)}")
-
-app = FastAPI(
-    title="Task & User Management API",
-    description="A simple CRUD API for tasks and users",
-    version="1.0.0",
-)
-
-logger.info("Starting the Task & User Management API...")
 
+def create_schema():
+    logger.info("Creating database tables if they don't exist...")
+    try:
+        Base.metadata.create_all(bind=get_engine())
+        shards = get_task_shards()
+        if shards is not None:
+            shards.create_schema()
+    except Exception as e:
+        logger.error(f"Error creating database tables: {str(e)}")
 
-app.include_router(auth_router)
-app.include_router(user_router)
-app.include_router(task_router)
-app.include_router(otp_router)
 
 def initialize_test_user():
     db = SessionLocal()
@@ -40,9 +48,85 @@ def initialize_test_user():
     finally:
         db.close()
 
-@app.on_event("startup")
-async def startup_event():
-    initialize_test_user()
+
+def build_scheduler() -> Scheduler:
+    scheduler = Scheduler()
+    if settings.OVERDUE_SCAN_ENABLED:
+        scheduler.add_job(
+            "overdue_scan", on_each_task_database(scan_overdue_tasks), settings.OVERDUE_SCAN_INTERVAL_SECONDS
+        )
+    if settings.TOMBSTONE_COMPACTION_ENABLED:
+        scheduler.add_job(
+            "tombstone_compaction", on_each_task_database(compact_task_tombstones),
+            settings.TOMBSTONE_COMPACTION_INTERVAL_SECONDS,
+        )
+    if settings.TASK_ARCHIVE_ENABLED:
+        scheduler.add_job(
+            "task_archive", on_each_task_database(archive_done_tasks), settings.TASK_ARCHIVE_INTERVAL_SECONDS
+        )
+    if settings.USER_PURGE_ENABLED:
+        # Picks up purges interrupted by a restart; deletions also start one right away.
+        scheduler.add_job("user_purge", purge_deleted_users, settings.USER_PURGE_INTERVAL_SECONDS)
+    if settings.EXPORT_CLEANUP_ENABLED:
+        scheduler.add_job("export_cleanup", cleanup_exports, settings.EXPORT_CLEANUP_INTERVAL_SECONDS)
+    return scheduler
+
+
+async def warm_up_caches():
+    get_otp_store()
+    if "redis" in (settings.OTP_STORE_BACKEND, settings.RATE_LIMIT_BACKEND):
+        from app.cache.redis_cache import get_redis
+        await (await get_redis()).ping()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Build resources when the server starts instead of at import time.
+    Schema creation and test-admin seeding only run when DB_CREATE_SCHEMA /
+    SEED_TEST_ADMIN are enabled; background jobs start and app.state.ready is
+    set once everything is warm.
+    """
+    started = time.perf_counter()
+    configure_logging()
+    logger.info("Starting the Task & User Management API...")
+    app.state.ready = False
+    get_engine()
+    if settings.DB_CREATE_SCHEMA:
+        await run_in_threadpool(create_schema)
+    if settings.SEED_TEST_ADMIN:
+        await run_in_threadpool(initialize_test_user)
+    await run_in_threadpool(warm_up_pool, settings.DB_POOL_WARM_CONNECTIONS)
+    await warm_up_caches()
+    scheduler = build_scheduler()
+    scheduler.start()
+    app.state.ready = True
+    logger.info(f"Startup complete in {time.perf_counter() - started:.3f}s")
+    yield
+    app.state.ready = False
+    await scheduler.stop()
+    shutdown_export_pool()
+    dispose_task_shards()
+    dispose_engine()
+    logger.info("Shut down the Task & User Management API.")
+
+
+app = FastAPI(
+    title="Task & User Management API",
+    description="A simple CRUD API for tasks and users",
+    version="1.0.0",
+    lifespan=lifespan,
+)
+
+if settings.RATE_LIMIT_ENABLED:
+    app.add_middleware(RateLimitMiddleware)
+
+app.include_router(auth_router)
+app.include_router(user_router)
+app.include_router(task_router)
+app.include_router(otp_router)
+app.include_router(health_router)
+app.include_router(export_router)
 
 @app.get("/")
 async def home():
@@ -0,0 +1,155 @@
+"""
+Maintenance commands.
+
+    python -m app.manage rebuild-search-index
+    python -m app.manage repair-task-counters
+    python -m app.manage scan-overdue
+    python -m app.manage archive-tasks
+    python -m app.manage move-user-tasks --user-id 42 --shard 2
+    python -m app.manage rebalance-task-shards [--apply]
+    python -m app.manage calibrate-password-hash --target-ms 250
+"""
+import argparse
+
+from app.common.constants.log import logger, configure_logging
+from app.config import settings
+from app.database.database import get_engine, SessionLocal
+from app.jobs.overdue_scanner import scan_overdue_tasks
+from app.jobs.task_archiver import archive_done_tasks
+from app.database.shards import get_task_shards, each_task_database
+from app.utils.security import calibrate_password_rounds
+from app.database.schema import (
+    install_task_search,
+    rebuild_task_search,
+    install_task_counters,
+    rebuild_task_counters,
+)
+
+
+def rebuild_search_index(args):
+    """Create the task search index if missing and re-index every existing task."""
+    with get_engine().begin() as connection:
+        install_task_search(connection)
+        rebuild_task_search(connection)
+
+
+def repair_task_counters(args):
+    """Rebuild the dashboard task counters from the tasks table."""
+    with get_engine().begin() as connection:
+        install_task_counters(connection)
+        rebuild_task_counters(connection)
+
+
+def scan_overdue(args):
+    """Flag every unfinished past-due task not flagged yet, as the scheduled job does."""
+    get_engine()
+    db = SessionLocal()
+    try:
+        task_ids = [task_id for session in each_task_database(db) for task_id in scan_overdue_tasks(session)]
+    finally:
+        db.close()
+    logger.info(f"Flagged {len(task_ids)} overdue tasks")
+
+
+def archive_tasks(args):
+    """Move old done tasks to the archive now, as the scheduled job does."""
+    get_engine()
+    db = SessionLocal()
+    try:
+        archived = sum(archive_done_tasks(session) for session in each_task_database(db))
+    finally:
+        db.close()
+    logger.info(f"Archived {archived} tasks")
+
+
+def _task_shards():
+    get_engine()
+    shards = get_task_shards()
+    if shards is None:
+        raise SystemExit("Tasks are not sharded: set TASK_SHARD_URLS first.")
+    shards.create_schema()
+    return shards
+
+
+def move_user_tasks(args):
+    """Move every task of one user to another shard; their task writes get 503 meanwhile."""
+    shards = _task_shards()
+    if not 0 <= args.shard < shards.count:
+        raise SystemExit(f"--shard must be between 0 and {shards.count - 1}")
+    db = SessionLocal()
+    try:
+        copied = shards.move_user(db, args.user_id, args.shard)
+    finally:
+        db.close()
+    logger.info(f"Moved {copied} tasks of user {args.user_id} to shard {args.shard}")
+
+
+def rebalance_task_shards(args):
+    """Plan moves that even out task counts across shards; --apply carries them out."""
+    shards = _task_shards()
+    db = SessionLocal()
+    try:
+        moves = shards.plan_rebalance(db, args.tolerance)
+        for move in moves:
+            logger.info(f"user {move.user_id}: {move.tasks} tasks, shard {move.source} -> {move.target}")
+            if args.apply:
+                shards.move_user(db, move.user_id, move.target)
+    finally:
+        db.close()
+    if not moves:
+        logger.info("Shards are balanced")
+    elif not args.apply:
+        logger.info("Dry run; pass --apply to move them")
+
+
+def calibrate_password_hash(args):
+    """Pick the password hash cost that takes about --target-ms on this machine."""
+    rounds, elapsed_ms = calibrate_password_rounds(args.scheme, args.target_ms)
+    logger.info(f"{args.scheme}: {elapsed_ms:.0f}ms per hash at rounds={rounds}")
+    logger.info(f"PASSWORD_HASH_SCHEME={args.scheme}")
+    logger.info(f"PASSWORD_HASH_ROUNDS={rounds}")
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Task & User Management API maintenance commands.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    subparsers.add_parser(
+        "rebuild-search-index", help=rebuild_search_index.__doc__
+    ).set_defaults(handler=rebuild_search_index)
+    subparsers.add_parser(
+        "repair-task-counters", help=repair_task_counters.__doc__
+    ).set_defaults(handler=repair_task_counters)
+    subparsers.add_parser(
+        "scan-overdue", help=scan_overdue.__doc__
+    ).set_defaults(handler=scan_overdue)
+    subparsers.add_parser(
+        "archive-tasks", help=archive_tasks.__doc__
+    ).set_defaults(handler=archive_tasks)
+    move = subparsers.add_parser("move-user-tasks", help=move_user_tasks.__doc__)
+    move.add_argument("--user-id", type=int, required=True)
+    move.add_argument("--shard", type=int, required=True)
+    move.set_defaults(handler=move_user_tasks)
+    rebalance = subparsers.add_parser("rebalance-task-shards", help=rebalance_task_shards.__doc__)
+    rebalance.add_argument("--tolerance", type=float, default=0.1, help="allowed deviation from the mean, 0.1 = 10%%")
+    rebalance.add_argument("--apply", action="store_true")
+    rebalance.set_defaults(handler=rebalance_task_shards)
+    calibrate = subparsers.add_parser(
+        "calibrate-password-hash", help=calibrate_password_hash.__doc__
+    )
+    calibrate.add_argument("--target-ms", type=float, default=250.0)
+    calibrate.add_argument("--scheme", default=settings.PASSWORD_HASH_SCHEME)
+    calibrate.set_defaults(handler=calibrate_password_hash)
+
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    configure_logging()
+    logger.info(f"Running maintenance command: {args.command}")
+    args.handler(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,214 @@
+"""
+Request admission control using GCRA (generic cell rate algorithm).
+
+Each (rule, principal) pair keeps one "theoretical arrival time" (TAT). A rule
+of N requests per period allows bursts of up to N requests and then one more
+every period / N seconds. The principal is the JWT subject when the request
+carries a valid access token, and the client IP otherwise.
+
+Use the in-memory backend for a single process and the Redis backend
+(RATE_LIMIT_BACKEND=redis) when several workers must share limits.
+"""
+import json
+import math
+import time
+from typing import NamedTuple, Optional
+
+from jose import jwt, JWTError
+
+from app.config import settings
+from app.common.constants.log import logger
+from app.common.constants.rate_limit import RATE_LIMIT_RULES
+
+_PERIODS = {"second": 1, "minute": 60, "hour": 3600, "day": 86400}
+
+
+class RateLimit(NamedTuple):
+    limit: int
+    period: int
+
+    @property
+    def emission_interval(self) -> float:
+        return self.period / self.limit
+
+
+class RateLimitResult(NamedTuple):
+    allowed: bool
+    limit: int
+    remaining: int
+    reset_after: float
+    retry_after: float
+
+
+def parse_rate_limit(value: str) -> RateLimit:
+    """Parse a limit such as "100/minute" into a RateLimit."""
+    count, _, period = value.partition("/")
+    if period not in _PERIODS:
+        raise ValueError(f"Invalid rate limit period in {value!r}; use one of {', '.join(_PERIODS)}")
+    return RateLimit(int(count), _PERIODS[period])
+
+
+def _result(rate: RateLimit, tat: float, now: float) -> RateLimitResult:
+    """Decide a hit given the stored TAT (already clamped to >= now)."""
+    interval = rate.emission_interval
+    burst = interval * (rate.limit - 1)
+    delay = tat - now
+    if delay > burst:
+        return RateLimitResult(False, rate.limit, 0, delay, delay - burst)
+    remaining = int((burst - delay) / interval)
+    return RateLimitResult(True, rate.limit, remaining, delay + interval, 0.0)
+
+
+class InMemoryRateLimitBackend:
+    """Per-process GCRA state; limits are not shared between workers."""
+
+    PRUNE_EVERY = 1000
+
+    def __init__(self):
+        self._tats: dict[str, float] = {}
+        self._hits = 0
+
+    async def hit(self, key: str, rate: RateLimit) -> RateLimitResult:
+        now = time.monotonic()
+        tat = max(self._tats.get(key, now), now)
+        result = _result(rate, tat, now)
+        if result.allowed:
+            self._tats[key] = tat + rate.emission_interval
+            self._hits += 1
+            if self._hits % self.PRUNE_EVERY == 0:
+                self._prune(now)
+        return result
+
+    def _prune(self, now: float) -> None:
+        expired = [key for key, tat in self._tats.items() if tat <= now]
+        for key in expired:
+            del self._tats[key]
+
+
+# Uses the Redis server clock so workers on different hosts agree on "now".
+_GCRA_LUA = """
+local interval = tonumber(ARGV[1])
+local limit = tonumber(ARGV[2])
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+local tat = tonumber(redis.call('GET', KEYS[1])) or now
+if tat < now then tat = now end
+if tat - now <= interval * (limit - 1) then
+    local new_tat = tat + interval
+    redis.call('SET', KEYS[1], tostring(new_tat), 'PX', math.ceil((new_tat - now) * 1000))
+end
+return {tostring(tat), tostring(now)}
+"""
+
+
+class RedisRateLimitBackend:
+    """GCRA state shared by every worker through an atomic Lua script."""
+
+    KEY_PREFIX = "ratelimit:"
+
+    def __init__(self):
+        self._script = None
+
+    async def hit(self, key: str, rate: RateLimit) -> RateLimitResult:
+        from app.cache.redis_cache import get_redis
+
+        r = await get_redis()
+        if self._script is None:
+            self._script = r.register_script(_GCRA_LUA)
+        tat, now = await self._script(
+            keys=[self.KEY_PREFIX + key], args=[rate.emission_interval, rate.limit]
+        )
+        return _result(rate, float(tat), float(now))
+
+
+def get_rate_limit_backend():
+    if settings.RATE_LIMIT_BACKEND == "redis":
+        return RedisRateLimitBackend()
+    return InMemoryRateLimitBackend()
+
+
+class RateLimitMiddleware:
+    """
+    ASGI middleware that answers 429 with Retry-After once a principal goes
+    over the limit for the matched route, and adds RateLimit-* headers to
+    every limited response.
+    """
+
+    def __init__(self, app, backend=None, rules=None, default_limit: Optional[str] = None):
+        self.app = app
+        self.backend = backend or get_rate_limit_backend()
+        self.rules = [
+            (method, path, parse_rate_limit(limit) if limit else None)
+            for method, path, limit in (RATE_LIMIT_RULES if rules is None else rules)
+        ]
+        self.default_limit = parse_rate_limit(default_limit or settings.RATE_LIMIT_DEFAULT)
+
+    def _match(self, method: str, path: str):
+        for rule_method, rule_path, rate in self.rules:
+            if rule_method != "*" and rule_method != method:
+                continue
+            if rule_path.endswith("*"):
+                if path.startswith(rule_path[:-1]):
+                    return f"{rule_method} {rule_path}", rate
+            elif path == rule_path:
+                return f"{rule_method} {rule_path}", rate
+        return "default", self.default_limit
+
+    @staticmethod
+    def _principal(scope) -> str:
+        for name, value in scope.get("headers", ()):
+            if name != b"cookie":
+                continue
+            for part in value.decode("latin-1").split(";"):
+                key, _, token = part.strip().partition("=")
+                if key != "access_token" or not token:
+                    continue
+                try:
+                    payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+                except JWTError:
+                    break
+                if payload.get("sub"):
+                    return f"user:{payload['sub']}"
+        client = scope.get("client")
+        return f"ip:{client[0] if client else 'unknown'}"
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        rule_id, rate = self._match(scope["method"], scope["path"])
+        if rate is None:
+            await self.app(scope, receive, send)
+            return
+
+        principal = self._principal(scope)
+        result = await self.backend.hit(f"{rule_id}:{principal}", rate)
+        headers = [
+            (b"ratelimit-limit", str(result.limit).encode()),
+            (b"ratelimit-remaining", str(result.remaining).encode()),
+            (b"ratelimit-reset", str(math.ceil(result.reset_after)).encode()),
+        ]
+
+        if not result.allowed:
+            logger.warning(f"Rate limit exceeded for {principal} on {rule_id}")
+            body = json.dumps({"detail": "Too many requests. Please try again later."}).encode()
+            await send({
+                "type": "http.response.start",
+                "status": 429,
+                "headers": headers + [
+                    (b"retry-after", str(math.ceil(result.retry_after)).encode()),
+                    (b"content-type", b"application/json"),
+                    (b"content-length", str(len(body)).encode()),
+                ],
+            })
+            await send({"type": "http.response.body", "body": body})
+            return
+
+        async def send_with_headers(message):
+            if message["type"] == "http.response.start":
+                message.setdefault("headers", [])
+                message["headers"] = list(message["headers"]) + headers
+            await send(message)
+
+        await self.app(scope, receive, send_with_headers)
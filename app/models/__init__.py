@@ -1,4 +1,10 @@
 # models/__init__.py
 from .base import Base
 from .user import User
-from .task import Task
\ No newline at end of file
+from .task import Task
+from .task_counter import TaskCounter
+from .job_watermark import JobWatermark
+from .task_tombstone import TaskTombstone
+from .export_job import ExportJob
+from .task_shard import TaskShardAssignment
+from .archived_task import ArchivedTask
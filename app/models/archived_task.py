@@ -0,0 +1,22 @@
+# models/archived_task.py
+from sqlalchemy import Column, Integer, String, Date, ForeignKey, DateTime
+from .base import Base
+
+class ArchivedTask(Base):
+    """
+    Done tasks moved out of `tasks` by app/jobs/task_archiver.py, keeping
+    their ids. The table has no triggers: counters, search, the column index
+    and the changes feed only ever see hot tasks.
+    """
+    __tablename__ = "tasks_archive"
+
+    id = Column(Integer, primary_key=True)
+    title = Column(String, nullable=False)
+    description = Column(String, nullable=True)
+    due_date = Column(Date, nullable=True)
+    status = Column(String, nullable=False)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), index=True)
+    created_at = Column(DateTime, nullable=False)
+    updated_at = Column(DateTime, nullable=True)
+    overdue_at = Column(DateTime, nullable=True)
+    archived_at = Column(DateTime, nullable=False, index=True)
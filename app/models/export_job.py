@@ -0,0 +1,33 @@
+from sqlalchemy import Column, Integer, String, Text, DateTime, func
+from .base import Base
+from app.common.constants.export import EXPORT_DONE
+
+class ExportJob(Base):
+    """
+    A report requested through POST /exports and built in the background by
+    app/jobs/exports.py. The file lives under EXPORT_DIR until expires_at.
+    """
+    __tablename__ = "export_jobs"
+
+    id = Column(Integer, primary_key=True)
+    requested_by = Column(Integer, nullable=False, index=True)
+    report = Column(String, nullable=False)
+    format = Column(String, nullable=False)
+    filters = Column(Text, nullable=False, default="{}")  # JSON
+    status = Column(String, nullable=False, index=True)
+    rows_written = Column(Integer, nullable=False, default=0)
+    rows_total = Column(Integer, nullable=True)
+    file_path = Column(String, nullable=True)
+    error = Column(String, nullable=True)
+    created_at = Column(DateTime, server_default=func.now(), nullable=False)
+    started_at = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
+    expires_at = Column(DateTime, nullable=True)
+
+    @property
+    def progress(self) -> float:
+        if self.status == EXPORT_DONE:
+            return 1.0
+        if not self.rows_total:
+            return 0.0
+        return min(self.rows_written / self.rows_total, 1.0)
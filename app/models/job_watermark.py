@@ -0,0 +1,10 @@
+from sqlalchemy import Column, String, DateTime, func
+from .base import Base
+
+class JobWatermark(Base):
+    """How far a background job got, so the next run resumes from there."""
+    __tablename__ = "job_watermarks"
+
+    name = Column(String, primary_key=True)
+    value = Column(String, nullable=True)
+    updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now(), nullable=True)
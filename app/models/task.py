@@ -1,19 +1,39 @@
 # models/task.py
-from sqlalchemy import Column, Integer, String, Date, ForeignKey, DateTime, func
+from sqlalchemy import Column, Integer, String, Date, ForeignKey, DateTime, Index, func, text
 from sqlalchemy.orm import relationship
+from datetime import datetime
 from .base import Base
+from app.common.constants.task import TASK_OPEN_SQL
 
 class Task(Base):
     __tablename__ = "tasks"
+    __table_args__ = (
+        # Lets the overdue scanner range-scan each open status by due date,
+        # over the tasks not flagged yet only.
+        Index("ix_tasks_unflagged_due", "status", "due_date", sqlite_where=text("overdue_at IS NULL")),
+        # Unfinished tasks by due date: the overdue count in /tasks/summary
+        # reads only the rows it counts.
+        Index("ix_tasks_open_due", "due_date", sqlite_where=text(TASK_OPEN_SQL)),
+        # Keyset order for GET /tasks/changes.
+        Index("ix_tasks_updated_at_id", "updated_at", "id"),
+        # Per-owner keyset order for the tasks export.
+        Index("ix_tasks_user_id_id", "user_id", "id"),
+        # Lets the archiver find old done tasks without scanning the table.
+        Index("ix_tasks_status_updated_at", "status", "updated_at"),
+        # Ids are never handed out twice, so an archived task can always be restored under its id.
+        {"sqlite_autoincrement": True},
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     title = Column(String, nullable=False)
     description = Column(String, nullable=True)
-    due_date = Column(Date, nullable=True)
+    due_date = Column(Date, nullable=True, index=True)
     status = Column(String, nullable=False, default="Pending")
-    user_id = Column(Integer, ForeignKey("users.id"))
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"))
     
     created_at = Column(DateTime, server_default=func.now(), nullable=False)
-    updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now(), nullable=True)
+    # Python-side timestamps keep microseconds, which the ETags rely on.
+    updated_at = Column(DateTime, default=datetime.utcnow, server_default=func.now(), onupdate=datetime.utcnow, nullable=True)
+    overdue_at = Column(DateTime, nullable=True)  # set by the overdue scanner
 
-    owner = relationship("User", back_populates="tasks")
\ No newline at end of file
+    owner = relationship("User", back_populates="tasks", lazy="raise_on_sql")
\ No newline at end of file
@@ -0,0 +1,15 @@
+# models/task_counter.py
+from sqlalchemy import Column, Integer, String
+from .base import Base
+
+class TaskCounter(Base):
+    """
+    Running task counts maintained by triggers on `tasks`
+    (see app/database/schema.py). Dimensions: 'total', 'status', 'user', and
+    'version' (bumped on every task write).
+    """
+    __tablename__ = "task_counters"
+
+    dimension = Column(String, primary_key=True)
+    key = Column(String, primary_key=True)
+    count = Column(Integer, nullable=False, default=0)
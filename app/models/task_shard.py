@@ -0,0 +1,14 @@
+from sqlalchemy import Column, Integer, Boolean, ForeignKey
+from .base import Base
+
+class TaskShardAssignment(Base):
+    """
+    Which task database holds a user's tasks when TASK_SHARD_URLS is set
+    (see app/database/shards.py). Users without a row are on shard 0.
+    """
+    __tablename__ = "task_shard_assignments"
+
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    shard = Column(Integer, nullable=False, index=True)
+    # Set while move-user-tasks copies the user's tasks; their task writes get 503 meanwhile.
+    moving = Column(Boolean, nullable=False, default=False, server_default="0")
@@ -0,0 +1,16 @@
+from sqlalchemy import Column, Integer, DateTime
+from .base import Base
+
+class TaskTombstone(Base):
+    """
+    One row per deleted task, written by a trigger on `tasks` (see
+    app/database/schema.py) so delta-sync clients can drop it too.
+    AUTOINCREMENT keeps seq from being reused after compaction.
+    """
+    __tablename__ = "task_tombstones"
+    __table_args__ = {"sqlite_autoincrement": True}
+
+    seq = Column(Integer, primary_key=True, autoincrement=True)
+    task_id = Column(Integer, nullable=False)
+    user_id = Column(Integer, nullable=True)
+    deleted_at = Column(DateTime, nullable=False, index=True)
@@ -8,6 +8,8 @@ from app.common.variables.types import UserRoleType
     
 class User(Base):
         __tablename__ = "users"
+        # Fetch id/created_at/updated_at with INSERT ... RETURNING instead of a refresh.
+        __mapper_args__ = {"eager_defaults": True}
 
         id = Column(Integer, primary_key=True, index=True)
         name = Column(String, nullable=False)
@@ -15,11 +17,22 @@ class User(Base):
         password = Column(String, nullable=False)
         role = Column(UserRoleType, default=UserRole.USER, nullable=False)
         created_at = Column(DateTime, server_default=func.now(), nullable=False)
-        updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now(), nullable=False)
+        updated_at = Column(DateTime, default=datetime.utcnow, server_default=func.now(), onupdate=datetime.utcnow, nullable=False)
 
         phone_number = Column(String, unique=True, nullable=True)
         address = Column(String, nullable=True)
         email = Column(String, unique=True, nullable=False, index=True)
-        tasks = relationship("Task", back_populates="owner", cascade="all, delete-orphan")
+        # Tasks are never loaded to delete a user: the purge job removes them in
+        # chunks, and ON DELETE CASCADE covers anything left when the row goes.
+        # Lazy loads raise; ask for tasks with selectinload (see UserRepository).
+        tasks = relationship(
+            "Task", back_populates="owner", cascade="all, delete-orphan",
+            passive_deletes=True, lazy="raise_on_sql",
+        )
         # edit2.0
-        is_verified = Column(Boolean, default=False, nullable=False)
\ No newline at end of file
+        is_verified = Column(Boolean, default=False, nullable=False)
+        # Set when the user is deleted; the row is purged later by app/jobs/user_purge.py.
+        deleted_at = Column(DateTime, nullable=True, index=True)
+        # Carried in every token as "ver"; bumped when the role, username or
+        # password changes so older tokens stop being honoured.
+        token_version = Column(Integer, default=0, server_default="0", nullable=False)
\ No newline at end of file
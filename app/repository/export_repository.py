@@ -0,0 +1,87 @@
+from datetime import datetime
+from typing import List, Optional
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+
+from app.models.export_job import ExportJob
+from app.common.constants.export import (
+    EXPORT_ACTIVE_STATUSES,
+    EXPORT_QUEUED,
+    EXPORT_RUNNING,
+    EXPORT_DONE,
+    EXPORT_FAILED,
+    EXPORT_EXPIRED,
+)
+from app.common.constants.log import logger
+
+
+class ExportRepository:
+    def __init__(self, db: Session):
+        self.db = db
+
+    def create_job(self, job: ExportJob) -> ExportJob:
+        self.db.add(job)
+        self.db.commit()
+        self.db.refresh(job)
+        logger.info(f"Export job {job.id} queued: {job.report} as {job.format}")
+        return job
+
+    def get_job(self, job_id: int) -> Optional[ExportJob]:
+        return self.db.get(ExportJob, job_id)
+
+    def count_active_jobs(self, user_id: int) -> int:
+        return self.db.query(ExportJob).filter(
+            ExportJob.requested_by == user_id, ExportJob.status.in_(EXPORT_ACTIVE_STATUSES)
+        ).count()
+
+    def _set(self, job_id: int, *criteria, **values) -> bool:
+        statement = (
+            update(ExportJob)
+            .where(ExportJob.id == job_id, *criteria)
+            .values(**values)
+            .execution_options(synchronize_session=False)
+        )
+        changed = self.db.execute(statement).rowcount == 1
+        self.db.commit()
+        return changed
+
+    def claim_job(self, job_id: int, rows_total: int) -> bool:
+        """Move a queued job to running; False if another worker already took it."""
+        return self._set(
+            job_id, ExportJob.status == EXPORT_QUEUED,
+            status=EXPORT_RUNNING, rows_total=rows_total, started_at=datetime.utcnow(),
+        )
+
+    def record_progress(self, job_id: int, rows_written: int) -> None:
+        self._set(job_id, rows_written=rows_written)
+
+    def mark_done(self, job_id: int, file_path: str, rows_written: int, expires_at: datetime) -> None:
+        self._set(
+            job_id, status=EXPORT_DONE, file_path=file_path, rows_written=rows_written,
+            finished_at=datetime.utcnow(), expires_at=expires_at,
+        )
+        logger.info(f"Export job {job_id} finished with {rows_written} rows")
+
+    def mark_failed(self, job_id: int, error: str) -> None:
+        self._set(job_id, status=EXPORT_FAILED, error=error[:500], finished_at=datetime.utcnow())
+        logger.error(f"Export job {job_id} failed: {error}")
+
+    def get_expired_jobs(self, now: datetime) -> List[ExportJob]:
+        return self.db.query(ExportJob).filter(
+            ExportJob.status == EXPORT_DONE, ExportJob.expires_at <= now
+        ).all()
+
+    def mark_expired(self, job_id: int) -> None:
+        self._set(job_id, status=EXPORT_EXPIRED, file_path=None)
+
+    def fail_stalled_jobs(self, created_before: datetime) -> int:
+        """Fail jobs still queued or running since before *created_before*; a restart lost them."""
+        statement = (
+            update(ExportJob)
+            .where(ExportJob.status.in_(EXPORT_ACTIVE_STATUSES), ExportJob.created_at < created_before)
+            .values(status=EXPORT_FAILED, error="Interrupted before it finished", finished_at=datetime.utcnow())
+            .execution_options(synchronize_session=False)
+        )
+        failed = self.db.execute(statement).rowcount
+        self.db.commit()
+        return failed
@@ -0,0 +1,45 @@
+from typing import Optional
+from sqlalchemy import update, cast, Integer, String
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.models.job_watermark import JobWatermark
+from app.common.constants.log import logger
+
+
+class JobRepository:
+    def __init__(self, db: Session):
+        self.db = db
+
+    def get_watermark(self, name: str) -> Optional[str]:
+        """Return where job *name* stopped last time, or None if it never completed a run."""
+        watermark = self.db.get(JobWatermark, name)
+        return watermark.value if watermark else None
+
+    def set_watermark(self, name: str, value: str) -> None:
+        self.db.merge(JobWatermark(name=name, value=value))
+        self.db.commit()
+        logger.info(f"Watermark for {name} moved to {value}")
+
+    def create_watermark(self, name: str, value: str) -> bool:
+        """Set *name* only if it does not exist yet; False if another writer got there first."""
+        self.db.add(JobWatermark(name=name, value=value))
+        try:
+            self.db.commit()
+        except IntegrityError:
+            self.db.rollback()
+            return False
+        return True
+
+    def increment_watermark(self, name: str, step: int) -> Optional[int]:
+        """Atomically add *step* to the integer watermark *name*; the new value, or None if it is unset."""
+        statement = (
+            update(JobWatermark)
+            .where(JobWatermark.name == name)
+            .values(value=cast(cast(JobWatermark.value, Integer) + step, String))
+            .returning(JobWatermark.value)
+            .execution_options(synchronize_session=False)
+        )
+        value = self.db.execute(statement).scalar_one_or_none()
+        self.db.commit()
+        return None if value is None else int(value)
@@ -0,0 +1,167 @@
+import heapq
+from collections import Counter
+from datetime import date, datetime
+from operator import attrgetter
+from typing import List, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.common.constants.exceptions import TaskShardingUnsupportedException
+from app.database.shards import TaskShards, get_task_shards
+from app.models.archived_task import ArchivedTask
+from app.models.task import Task
+from app.models.task_counter import TaskCounter
+from app.repository.task_repository import TaskRepository, TaskRow
+
+_by_id = attrgetter("id")
+
+
+def get_task_repository(db: Session):
+    """TaskRepository on *db*, or one spanning every shard when tasks are sharded."""
+    shards = get_task_shards()
+    return TaskRepository(db) if shards is None else ShardedTaskRepository(db, shards)
+
+
+class ShardedTaskRepository:
+    """
+    The TaskRepository interface over every task shard (app/database/shards.py).
+    Calls about one user's tasks go to that user's shard; the rest run on
+    every shard in parallel and merge the results in id order.
+    """
+
+    def __init__(self, db: Session, shards: TaskShards):
+        self.db = db
+        self.shards = shards
+
+    def _on_user_shard(self, user_id: int, func, writing: bool = False):
+        return self.shards.on_shard(self.db, self.shards.shard_for_user(self.db, user_id, writing), func)
+
+    def _on_every_shard(self, func) -> list:
+        return self.shards.on_every_shard(self.db, func)
+
+    # ----- writes -----
+
+    def create_task(self, task: Task) -> Task:
+        shard = self.shards.place_user(self.db, task.user_id)
+        task.id = self.shards.next_task_id(self.db)
+        return self.shards.on_shard(self.db, shard, lambda repo: repo.create_task(task))
+
+    def _owner_shard(self, task_id: int, is_admin: bool, user_id: int) -> Optional[int]:
+        """Where a write by the caller could apply: their own shard, or for admins the task owner's."""
+        if not is_admin:
+            return self.shards.shard_for_user(self.db, user_id, writing=True)
+        found = self.get_tasks_by_ids([task_id])
+        if not found:
+            return None
+        return self.shards.shard_for_user(self.db, found[0].user_id, writing=True)
+
+    def update_task(self, task_id: int, values: dict, is_admin: bool, user_id: int) -> Optional[Task]:
+        shard = self._owner_shard(task_id, is_admin, user_id)
+        if shard is None:
+            return None
+        return self.shards.on_shard(self.db, shard, lambda repo: repo.update_task(task_id, values, is_admin, user_id))
+
+    def delete_task(self, task_id: int, is_admin: bool, user_id: int) -> bool:
+        shard = self._owner_shard(task_id, is_admin, user_id)
+        if shard is None:
+            return False
+        return self.shards.on_shard(self.db, shard, lambda repo: repo.delete_task(task_id, is_admin, user_id))
+
+    def delete_user_tasks_chunk(self, user_id: int, limit: int) -> int:
+        # Every shard, so tasks left behind by an interrupted move go too.
+        return sum(self._on_every_shard(lambda repo: repo.delete_user_tasks_chunk(user_id, limit)))
+
+    # ----- reads -----
+
+    def get_task_by_id(self, task_id: int) -> Optional[Task]:
+        found = self.get_tasks_by_ids([task_id])
+        return found[0] if found else None
+
+    def get_task_row(self, task_id: int, include_archived: bool = False) -> Optional[TaskRow]:
+        rows = self._on_every_shard(lambda repo: repo.get_task_row(task_id, include_archived))
+        return next((row for row in rows if row is not None), None)
+
+    def get_tasks_by_ids(self, task_ids: List[int]) -> List[Task]:
+        return [task for tasks in self._on_every_shard(lambda repo: repo.get_tasks_by_ids(task_ids)) for task in tasks]
+
+    def get_task_updated_at(self, task_id: int) -> Optional[Tuple[datetime]]:
+        rows = self._on_every_shard(lambda repo: repo.get_task_updated_at(task_id))
+        return next((row for row in rows if row is not None), None)
+
+    def task_exists(self, task_id: int) -> bool:
+        return any(self._on_every_shard(lambda repo: repo.task_exists(task_id)))
+
+    def get_all_tasks(self, include_archived: bool = False) -> List[TaskRow]:
+        return list(heapq.merge(*self._on_every_shard(lambda repo: repo.get_all_tasks(include_archived)), key=_by_id))
+
+    def get_user_tasks(self, user_id: int) -> List[Task]:
+        return self._on_user_shard(user_id, lambda repo: repo.get_user_tasks(user_id))
+
+    def get_tasks_page(self, after_id: Optional[int], limit: int, **filters) -> List[Task]:
+        if filters.get("user_id") is not None:
+            return self._on_user_shard(filters["user_id"], lambda repo: repo.get_tasks_page(after_id, limit, **filters))
+        pages = self._on_every_shard(lambda repo: repo.get_tasks_page(after_id, limit, **filters))
+        return list(heapq.merge(*pages, key=_by_id))[:limit]
+
+    def filter_tasks(self, limit: int, offset: int, include_archived: bool = False, **filters) -> Tuple[List, int]:
+        if filters.get("user_id") is not None:
+            return self._on_user_shard(
+                filters["user_id"], lambda repo: repo.filter_tasks(limit, offset, include_archived, **filters)
+            )
+        # Each shard's first offset + limit rows hold the merged page; prefer get_tasks_page for deep pages.
+        results = self._on_every_shard(lambda repo: repo.filter_tasks(offset + limit, 0, include_archived, **filters))
+        tasks = list(heapq.merge(*(tasks for tasks, _ in results), key=_by_id))
+        return tasks[offset:offset + limit], sum(total for _, total in results)
+
+    def count_tasks_by(self, group_by: str, **filters) -> List[Tuple]:
+        if filters.get("user_id") is not None:
+            return self._on_user_shard(filters["user_id"], lambda repo: repo.count_tasks_by(group_by, **filters))
+        counts = Counter()
+        for rows in self._on_every_shard(lambda repo: repo.count_tasks_by(group_by, **filters)):
+            counts.update(dict(rows))
+        return list(counts.items())
+
+    def get_tasks_version(self) -> int:
+        # Each shard's version only goes up, so their sum does too.
+        return sum(self._on_every_shard(lambda repo: repo.get_tasks_version()))
+
+    def get_task_counters(self) -> List[TaskCounter]:
+        counts = Counter()
+        for counters in self._on_every_shard(lambda repo: repo.get_task_counters()):
+            counts.update({(counter.dimension, counter.key): counter.count for counter in counters})
+        return [TaskCounter(dimension=dimension, key=key, count=count) for (dimension, key), count in counts.items()]
+
+    def count_hidden_tasks(self) -> List[Tuple]:
+        return [row for rows in self._on_every_shard(lambda repo: repo.count_hidden_tasks()) for row in rows]
+
+    def count_overdue_tasks(self, today: date) -> int:
+        return sum(self._on_every_shard(lambda repo: repo.count_overdue_tasks(today)))
+
+    # ----- archive -----
+
+    def get_archived_tasks_by_ids(self, task_ids: List[int]) -> List[ArchivedTask]:
+        return [
+            task for tasks in self._on_every_shard(lambda repo: repo.get_archived_tasks_by_ids(task_ids))
+            for task in tasks
+        ]
+
+    def get_archived_task_updated_at(self, task_id: int) -> Optional[Tuple[datetime]]:
+        rows = self._on_every_shard(lambda repo: repo.get_archived_task_updated_at(task_id))
+        return next((row for row in rows if row is not None), None)
+
+    def restore_task(self, task_id: int, restored_at: datetime) -> Optional[Task]:
+        archived = self.get_archived_tasks_by_ids([task_id])
+        if not archived:
+            return None
+        return self._on_user_shard(archived[0].user_id, lambda repo: repo.restore_task(task_id, restored_at), writing=True)
+
+    # ----- single-database features -----
+
+    def search_tasks(self, match: str, limit: int, offset: int) -> List[Task]:
+        raise TaskShardingUnsupportedException("Task search")
+
+    def get_last_tombstone_seq(self) -> int:
+        raise TaskShardingUnsupportedException("The task changes feed")
+
+    def get_tombstones(self, after_seq: int, limit: int):
+        raise TaskShardingUnsupportedException("The task changes feed")
@@ -1,22 +1,98 @@
+from datetime import date, datetime
+from sqlalchemy import text, func, select, insert, update, delete, tuple_, or_, true, literal, union_all, bindparam, DateTime
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
-from typing import Optional, List
+from typing import NamedTuple, Optional, List, Tuple
+from app.database.database import commit_without_expiry
 from app.models.task import Task
+from app.models.user import User
+from app.models.task_counter import TaskCounter
+from app.models.task_tombstone import TaskTombstone
+from app.models.archived_task import ArchivedTask
+from app.common.constants.task import TASK_DONE_STATUSES, TASK_OPEN_SQL
 from app.schema.task_schema import TaskCreate, TaskUpdate
 from app.common.constants.log import logger
 
+class TaskRow(NamedTuple):
+    """The columns TaskRead serializes, read without building an ORM object."""
+    id: int
+    title: str
+    description: Optional[str]
+    due_date: Optional[date]
+    status: str
+    user_id: Optional[int]
+    created_at: datetime
+    updated_at: datetime
+    overdue_at: Optional[datetime]
+
+
+TASK_READ_COLUMNS = tuple(getattr(Task, field) for field in TaskRow._fields)
+ARCHIVED_READ_COLUMNS = tuple(getattr(ArchivedTask, field) for field in TaskRow._fields)
+# Columns copied between tasks and tasks_archive, in Task's order.
+_TASK_COLUMN_NAMES = [column.name for column in Task.__table__.columns]
+
+_DELETED_USER_IDS = select(User.id).where(User.deleted_at.isnot(None))
+
+
+def owner_visible(model=Task, hidden_owners: Optional[List[int]] = None):
+    """
+    Leave out tasks of users who are deleted but not purged yet. Without
+    *hidden_owners* their ids come from the users table in the same database.
+    """
+    if hidden_owners is not None and not hidden_owners:
+        return true()
+    hidden = _DELETED_USER_IDS if hidden_owners is None else hidden_owners
+    return or_(model.user_id.is_(None), model.user_id.notin_(hidden))
+
+
+# Built once for the per-request point lookups; only the bound values change per call.
+_TASK_BY_ID = select(Task).where(Task.id == bindparam("task_id"))
+_TASK_UPDATED_AT = select(Task.updated_at).where(Task.id == bindparam("task_id"), owner_visible())
+_TASK_EXISTS = select(Task.id).where(Task.id == bindparam("task_id"))
+_TASK_ROW = select(*TASK_READ_COLUMNS).where(Task.id == bindparam("task_id"), owner_visible())
+_ARCHIVED_TASK_ROW = select(*ARCHIVED_READ_COLUMNS).where(
+    ArchivedTask.id == bindparam("task_id"), owner_visible(ArchivedTask)
+)
+_SEARCH_TASKS = select(Task).from_statement(text(
+    "SELECT tasks.* FROM tasks_fts JOIN tasks ON tasks.id = tasks_fts.rowid "
+    "WHERE tasks_fts MATCH :match AND (tasks.user_id IS NULL OR tasks.user_id NOT IN "
+    "(SELECT id FROM users WHERE deleted_at IS NOT NULL)) "
+    "ORDER BY bm25(tasks_fts), tasks.id LIMIT :limit OFFSET :offset"
+))
+
 
 class TaskRepository:
-    def __init__(self, db: Session):
+    def __init__(self, db: Session, hidden_owners: Optional[List[int]] = None):
         """
-        Pass in a SQLAlchemy Session when creating an instance.
+        Pass in a SQLAlchemy Session when creating an instance. Reads leave
+        out the tasks of deleted users; on a database without the users table
+        (a task shard) pass their ids as *hidden_owners*.
         """
         self.db = db
+        self.hidden_owners = hidden_owners
+
+    def _visible(self, model=Task):
+        return owner_visible(model, self.hidden_owners)
+
+    def _point_lookup(self, prebuilt, columns, model=Task):
+        """The prebuilt lookup by id, or the same with this repository's hidden owners."""
+        if self.hidden_owners is None:
+            return prebuilt
+        return select(*columns).where(model.id == bindparam("task_id"), self._visible(model))
 
     def create_task(self, task: Task) -> Task:
-        """Insert a new task into the database."""
+        """
+        Insert a new task into the database. A foreign key violation (the
+        owner was purged meanwhile) is re-raised as IntegrityError after rollback.
+        """
         logger.info(f"Creating a new task with title: {task.title}")
         self.db.add(task)
-        self.db.commit()
+        try:
+            self.db.commit()
+        except IntegrityError:
+            self.db.rollback()
+            logger.warning(f"Task creation for user {task.user_id} hit a constraint")
+            raise
         self.db.refresh(task)
         logger.info(f"Task created successfully with ID: {task.id}")
         return task
@@ -24,50 +100,376 @@ class TaskRepository:
     def get_task_by_id(self, task_id: int) -> Optional[Task]:
         """Retrieve a task by ID."""
         logger.debug(f"Fetching task with ID: {task_id}" )
-        task = self.db.query(Task).filter(Task.id == task_id).first()
+        task = self.db.scalars(_TASK_BY_ID, {"task_id": task_id}).first()
         if task:
             logger.info(f"Task found: ID {task_id}")
         else:
             logger.warning(f"Task with ID {task_id} not found")
         return task
 
-    def get_all_tasks(self) -> List[Task]:
-        """Retrieve all tasks."""
+    def get_task_row(self, task_id: int, include_archived: bool = False) -> Optional[TaskRow]:
+        """A task as a read-only TaskRow, looked up in the archive too if asked."""
+        params = {"task_id": task_id}
+        row = self.db.execute(self._point_lookup(_TASK_ROW, TASK_READ_COLUMNS), params).first()
+        if row is None and include_archived:
+            statement = self._point_lookup(_ARCHIVED_TASK_ROW, ARCHIVED_READ_COLUMNS, ArchivedTask)
+            row = self.db.execute(statement, params).first()
+        return None if row is None else TaskRow._make(row)
+
+    def get_tasks_by_ids(self, task_ids: List[int]) -> List[Task]:
+        """Fetch many tasks with one IN query; rows come back in no particular order."""
+        return self.db.scalars(select(Task).where(Task.id.in_(task_ids), self._visible())).all()
+
+    def get_all_tasks(self, include_archived: bool = False) -> List[TaskRow]:
+        """
+        Retrieve all tasks as read-only TaskRows in id order, archived ones too
+        if asked. No ORM objects are built or tracked, so nothing can be changed
+        and saved back; use get_task_by_id for that.
+        """
         logger.debug("Fetching all tasks from the database.")
-        tasks = self.db.query(Task).all()
+        statement = select(*TASK_READ_COLUMNS).where(self._visible())
+        if include_archived:
+            statement = union_all(statement, select(*ARCHIVED_READ_COLUMNS).where(self._visible(ArchivedTask)))
+        statement = statement.order_by(statement.selected_columns.id)
+        tasks = list(map(TaskRow._make, self.db.execute(statement)))
         logger.info(f"Total tasks retrieved: {len(tasks)}" )
         return tasks
 
-    def update_task(self, task_id: int, task_data: TaskUpdate) -> Optional[Task]:
-        """Update a task's details."""
-        logger.info(f"Updating task with ID: {task_id}")
-        task = self.get_task_by_id(task_id)
-        if not task:
-            logger.warning(f"Task with ID {task_id} not found for update")
+    def search_tasks(self, match: str, limit: int, offset: int) -> List[Task]:
+        """Full-text search over title/description, best bm25 match first."""
+        logger.debug(f"Searching tasks with FTS query: {match}")
+        tasks = self.db.scalars(_SEARCH_TASKS, {"match": match, "limit": limit, "offset": offset}).all()
+        logger.info(f"Task search returned {len(tasks)} rows")
+        return tasks
+
+    def get_task_updated_at(self, task_id: int) -> Optional[Tuple[datetime]]:
+        """Return just (updated_at,) for a task, or None if it does not exist."""
+        statement = self._point_lookup(_TASK_UPDATED_AT, (Task.updated_at,))
+        return self.db.execute(statement, {"task_id": task_id}).first()
+
+    def get_tasks_version(self) -> int:
+        """Read the collection version that the triggers bump on every task write."""
+        version = self.db.get(TaskCounter, ("version", ""))
+        return version.count if version else 0
+
+    def get_changed_tasks(
+        self, after: Optional[Tuple[datetime, int]], until: datetime, limit: int
+    ) -> List[Task]:
+        """Tasks past the (updated_at, id) keyset *after* and updated before *until*, oldest first."""
+        statement = select(Task).where(Task.updated_at < until)
+        if after is not None:
+            statement = statement.where(tuple_(Task.updated_at, Task.id) > tuple_(*after))
+        return self.db.scalars(statement.order_by(Task.updated_at, Task.id).limit(limit)).all()
+
+    def get_index_rows(self, since: Optional[datetime] = None):
+        """(id, user_id, status, due_date, updated_at) of every task, or of those updated at or after *since*."""
+        statement = select(Task.id, Task.user_id, Task.status, Task.due_date, Task.updated_at)
+        if since is not None:
+            statement = statement.where(Task.updated_at >= since)
+        return self.db.execute(statement.order_by(Task.id)).all()
+
+    def get_deleted_task_ids(self, after_seq: int) -> List[Tuple[int, int]]:
+        """(seq, task_id) of every tombstone after *after_seq*."""
+        return self.db.execute(
+            select(TaskTombstone.seq, TaskTombstone.task_id)
+            .where(TaskTombstone.seq > after_seq)
+            .order_by(TaskTombstone.seq)
+        ).all()
+
+    def _filters(self, model, user_id: Optional[int] = None, status: Optional[str] = None,
+                 due_from: Optional[date] = None, due_to: Optional[date] = None) -> list:
+        """WHERE conditions for the task filters on Task or ArchivedTask."""
+        conditions = [self._visible(model)]
+        if user_id is not None:
+            conditions.append(model.user_id == user_id)
+        if status is not None:
+            conditions.append(model.status == status)
+        if due_from is not None:
+            conditions.append(model.due_date >= due_from)
+        if due_to is not None:
+            conditions.append(model.due_date <= due_to)
+        return conditions
+
+    def _filtered_tasks(self, statement, **filters):
+        return statement.where(*self._filters(Task, **filters))
+
+    def filter_tasks(self, limit: int, offset: int, include_archived: bool = False, **filters) -> Tuple[List, int]:
+        """One page of matching tasks in id order, and how many match in total."""
+        total = self.db.scalar(self._filtered_tasks(select(func.count(Task.id)), **filters))
+        if not include_archived:
+            statement = self._filtered_tasks(select(Task), **filters).order_by(Task.id).limit(limit).offset(offset)
+            return self.db.scalars(statement).all(), total
+        total += self.db.scalar(select(func.count(ArchivedTask.id)).where(*self._filters(ArchivedTask, **filters)))
+        statement = union_all(
+            select(*TASK_READ_COLUMNS).where(*self._filters(Task, **filters)),
+            select(*ARCHIVED_READ_COLUMNS).where(*self._filters(ArchivedTask, **filters)),
+        )
+        statement = statement.order_by(statement.selected_columns.id).limit(limit).offset(offset)
+        return list(map(TaskRow._make, self.db.execute(statement))), total
+
+    def get_tasks_page(self, after_id: Optional[int], limit: int, **filters) -> List[Task]:
+        """Up to *limit* matching tasks with ids above *after_id* (None = from the start), in id order."""
+        statement = self._filtered_tasks(select(Task), **filters)
+        if after_id is not None:
+            statement = statement.where(Task.id > after_id)
+        return self.db.scalars(statement.order_by(Task.id).limit(limit)).all()
+
+    def count_tasks_by(self, group_by: str, **filters) -> List[Tuple]:
+        """(key, count) of matching tasks per status or per user_id."""
+        column = Task.status if group_by == "status" else Task.user_id
+        statement = self._filtered_tasks(select(column, func.count(Task.id)), **filters)
+        return self.db.execute(statement.group_by(column)).all()
+
+    def get_tombstones(self, after_seq: int, limit: int) -> List[TaskTombstone]:
+        return self.db.scalars(
+            select(TaskTombstone).where(TaskTombstone.seq > after_seq).order_by(TaskTombstone.seq).limit(limit)
+        ).all()
+
+    def get_last_tombstone_seq(self) -> int:
+        return self.db.scalar(select(func.max(TaskTombstone.seq))) or 0
+
+    def get_last_tombstone_seq_before(self, cutoff: datetime) -> int:
+        return self.db.scalar(select(func.max(TaskTombstone.seq)).where(TaskTombstone.deleted_at < cutoff)) or 0
+
+    def delete_tombstones_up_to(self, seq: int) -> int:
+        """Drop tombstones with seq <= *seq*; return how many were removed."""
+        removed = self.db.execute(
+            delete(TaskTombstone).where(TaskTombstone.seq <= seq).execution_options(synchronize_session=False)
+        ).rowcount
+        self.db.commit()
+        logger.info(f"Compacted {removed} task tombstones up to seq {seq}")
+        return removed
+
+    def delete_user_tasks_chunk(self, user_id: int, limit: int) -> int:
+        """
+        Delete up to *limit* tasks of a user, hot ones first and then archived
+        ones, and commit, releasing the SQLite write lock between chunks.
+        Returns how many rows were deleted.
+        """
+        chunk = select(Task.id).where(Task.user_id == user_id).limit(limit).scalar_subquery()
+        deleted = self.db.execute(
+            delete(Task).where(Task.id.in_(chunk)).execution_options(synchronize_session=False)
+        ).rowcount
+        if deleted < limit:
+            archived = select(ArchivedTask.id).where(ArchivedTask.user_id == user_id).limit(limit - deleted)
+            deleted += self.db.execute(
+                delete(ArchivedTask)
+                .where(ArchivedTask.id.in_(archived.scalar_subquery()))
+                .execution_options(synchronize_session=False)
+            ).rowcount
+        self.db.commit()
+        return deleted
+
+    def archive_done_tasks(self, statuses: List[str], cutoff: datetime, archived_at: datetime, limit: int) -> List[int]:
+        """
+        Move up to *limit* tasks in a done status last updated before *cutoff*
+        to tasks_archive, and commit; returns their ids. tasks ids are
+        AUTOINCREMENT, so an archived id is never handed to a new task.
+        """
+        task_ids = list(self.db.execute(
+            select(Task.id)
+            .where(Task.status.in_(statuses), Task.updated_at < cutoff)
+            .order_by(Task.id)
+            .limit(limit)
+        ).scalars())
+        if not task_ids:
+            return []
+        self.db.execute(
+            insert(ArchivedTask.__table__).from_select(
+                _TASK_COLUMN_NAMES + ["archived_at"],
+                select(*Task.__table__.columns, literal(archived_at, DateTime)).where(Task.id.in_(task_ids)),
+            )
+        )
+        self.db.execute(delete(Task).where(Task.id.in_(task_ids)).execution_options(synchronize_session=False))
+        self.db.commit()
+        return task_ids
+
+    def get_archived_tasks_by_ids(self, task_ids: List[int]) -> List[ArchivedTask]:
+        return self.db.scalars(select(ArchivedTask).where(ArchivedTask.id.in_(task_ids))).all()
+
+    def get_archived_task_updated_at(self, task_id: int) -> Optional[Tuple[datetime]]:
+        return self.db.execute(select(ArchivedTask.updated_at).where(ArchivedTask.id == task_id)).first()
+
+    def restore_task(self, task_id: int, restored_at: datetime) -> Optional[Task]:
+        """
+        Move an archived task back to tasks and commit. updated_at becomes
+        *restored_at* so delta-sync clients pick the task up again. If a task
+        with the same id exists, IntegrityError is re-raised after rollback.
+        """
+        archive = ArchivedTask.__table__.c
+        columns = [literal(restored_at, DateTime) if name == "updated_at" else archive[name] for name in _TASK_COLUMN_NAMES]
+        try:
+            restored = self.db.execute(
+                insert(Task.__table__).from_select(_TASK_COLUMN_NAMES, select(*columns).where(archive.id == task_id))
+            ).rowcount
+        except IntegrityError:
+            self.db.rollback()
+            logger.warning(f"Restore of task {task_id} hit an existing task id")
+            raise
+        if not restored:
+            self.db.rollback()
             return None
+        self.db.execute(delete(ArchivedTask).where(ArchivedTask.id == task_id).execution_options(synchronize_session=False))
+        self.db.commit()
+        logger.info(f"Task with ID {task_id} restored from the archive")
+        return self.db.scalars(_TASK_BY_ID, {"task_id": task_id}).first()
 
-        if hasattr(task_data, "dict"):
-            updates = task_data.dict(exclude_unset=True)
-        else:
-            updates = task_data
+    def get_user_tasks(self, user_id: int) -> List[Task]:
+        return self.db.scalars(select(Task).where(Task.user_id == user_id).order_by(Task.id)).all()
 
-        for key, value in updates.items():
-            setattr(task, key, value)
+    def get_max_task_id(self) -> int:
+        return self.db.scalar(select(func.max(Task.id))) or 0
 
+    def user_has_tasks(self, user_id: int) -> bool:
+        return self.db.scalar(select(Task.id).where(Task.user_id == user_id).limit(1)) is not None
+
+    def get_user_task_rows(self, user_id: int, after_id: Optional[int], limit: int) -> List[dict]:
+        """Every column of up to *limit* of a user's tasks after *after_id*, for copying to another shard."""
+        statement = select(Task.__table__).where(Task.user_id == user_id)
+        if after_id is not None:
+            statement = statement.where(Task.id > after_id)
+        return [dict(row) for row in self.db.execute(statement.order_by(Task.id).limit(limit)).mappings()]
+
+    def insert_task_rows(self, rows: List[dict]) -> None:
+        """Insert rows from get_user_task_rows as they are, ids and timestamps included, and commit."""
+        self.db.execute(insert(Task.__table__), rows)
         self.db.commit()
-        self.db.refresh(task)
-        logger.info(f"Task with ID {task_id} updated successfully")
+
+    def _export_tasks_query(self, columns, status: Optional[str], user_id: Optional[int], overdue_only: bool):
+        statement = select(*columns).join_from(Task, User, User.id == Task.user_id).where(User.deleted_at.is_(None))
+        if status is not None:
+            statement = statement.where(Task.status == status)
+        if user_id is not None:
+            statement = statement.where(Task.user_id == user_id)
+        if overdue_only:
+            statement = statement.where(Task.overdue_at.isnot(None))
+        return statement
+
+    def count_export_tasks(self, status: Optional[str] = None, user_id: Optional[int] = None,
+                           overdue_only: bool = False) -> int:
+        return self.db.scalar(self._export_tasks_query([func.count(Task.id)], status, user_id, overdue_only))
+
+    def get_export_tasks_batch(self, after: Optional[Tuple[int, int]], limit: int, status: Optional[str] = None,
+                               user_id: Optional[int] = None, overdue_only: bool = False):
+        """
+        One batch of the tasks report with owner details, grouped by owner.
+        Keyset paging on (user_id, id) after the last row of the previous batch.
+        """
+        statement = self._export_tasks_query(
+            [Task.id, Task.title, Task.status, Task.due_date, Task.overdue_at, Task.created_at,
+             Task.updated_at, Task.user_id, User.username, User.name, User.email],
+            status, user_id, overdue_only,
+        )
+        if after is not None:
+            statement = statement.where(tuple_(Task.user_id, Task.id) > tuple_(*after))
+        return self.db.execute(statement.order_by(Task.user_id, Task.id).limit(limit)).all()
+
+    def get_task_counters(self) -> List[TaskCounter]:
+        """Read the trigger-maintained counters; cost depends on the number of statuses and users, not tasks."""
+        return self.db.scalars(select(TaskCounter).where(TaskCounter.count > 0)).all()
+
+    def count_overdue_tasks(self, today: date) -> int:
+        """
+        Count unfinished tasks due before *today* with a range scan on the
+        partial ix_tasks_open_due, which holds no finished tasks.
+        """
+        return self.db.scalar(select(func.count(Task.id)).where(
+            Task.due_date < today, text(TASK_OPEN_SQL), self._visible(),
+        ))
+
+    def count_hidden_tasks(self) -> List[Tuple]:
+        """(status, user_id, count) of the tasks of deleted users the purge has not removed yet."""
+        if self.hidden_owners == []:
+            return []
+        hidden = _DELETED_USER_IDS if self.hidden_owners is None else self.hidden_owners
+        return self.db.execute(
+            select(Task.status, Task.user_id, func.count(Task.id))
+            .where(Task.user_id.in_(hidden))
+            .group_by(Task.status, Task.user_id)
+        ).all()
+
+    def get_open_statuses(self) -> List[str]:
+        """Statuses that currently have tasks and do not mean finished, read from the counters."""
+        return list(self.db.scalars(select(TaskCounter.key).where(
+            TaskCounter.dimension == "status",
+            TaskCounter.count > 0,
+            TaskCounter.key.notin_(TASK_DONE_STATUSES),
+        )))
+
+    def flag_overdue_tasks(
+        self,
+        statuses: List[str],
+        due_before: date,
+        flagged_at: datetime,
+        limit: int,
+    ) -> List[int]:
+        """
+        Set overdue_at on up to *limit* unflagged tasks in *statuses* due
+        before *due_before* with one UPDATE ... RETURNING, and commit. The
+        candidate select is a range scan per status on the partial index
+        ix_tasks_unflagged_due, so flagged tasks are never read again.
+        """
+        candidates = select(Task.id).where(
+            Task.status.in_(statuses),
+            Task.due_date < due_before,
+            Task.overdue_at.is_(None),
+        )
+        statement = (
+            update(Task)
+            .where(Task.id.in_(candidates.limit(limit).scalar_subquery()))
+            .values(overdue_at=flagged_at)
+            .returning(Task.id)
+            .execution_options(synchronize_session=False)
+        )
+        task_ids = list(self.db.execute(statement).scalars())
+        self.db.commit()
+        logger.info(f"Flagged {len(task_ids)} overdue tasks")
+        return task_ids
+
+    def task_exists(self, task_id: int) -> bool:
+        return self.db.scalar(_TASK_EXISTS, {"task_id": task_id}) is not None
+
+    def _writable(self, task_id: int, is_admin: bool, user_id: int):
+        """WHERE clause for a task the caller may change: admins any, others only their own."""
+        return (Task.id == task_id, or_(literal(is_admin), Task.user_id == user_id))
+
+    def update_task(self, task_id: int, values: dict, is_admin: bool, user_id: int) -> Optional[Task]:
+        """
+        Apply *values* with one UPDATE ... RETURNING that also enforces
+        ownership, and commit. Returns None when no row matched (missing or
+        not the caller's; see task_exists). Finishing or rescheduling a task
+        clears overdue_at; the overdue scanner sets it again if still due.
+        """
+        logger.info(f"Updating task with ID: {task_id}")
+        if not values:
+            return self.db.scalars(select(Task).where(*self._writable(task_id, is_admin, user_id))).first()
+        if "due_date" in values or values.get("status") in TASK_DONE_STATUSES:
+            values = {**values, "overdue_at": None}
+        statement = (
+            update(Task)
+            .where(*self._writable(task_id, is_admin, user_id))
+            .values(**values)
+            .returning(Task)
+            .execution_options(synchronize_session=False, populate_existing=True)
+        )
+        task = self.db.execute(statement).scalar_one_or_none()
+        commit_without_expiry(self.db)
+        if task:
+            logger.info(f"Task with ID {task_id} updated successfully")
         return task
 
-    def delete_task(self, task_id: int) -> bool:
-        """Delete a task from the database."""
+    def delete_task(self, task_id: int, is_admin: bool, user_id: int) -> bool:
+        """Delete with one DELETE ... RETURNING that also enforces ownership, and commit."""
         logger.info(f"Deleting task with ID: {task_id}")
-        task = self.get_task_by_id(task_id)
-        if not task:
-            logger.warning(f"Task with ID {task_id} not found for deletion")
-            return False
-
-        self.db.delete(task)
+        statement = (
+            delete(Task)
+            .where(*self._writable(task_id, is_admin, user_id))
+            .returning(Task.id)
+            .execution_options(synchronize_session=False)
+        )
+        deleted = self.db.execute(statement).scalar_one_or_none()
         self.db.commit()
+        if deleted is None:
+            return False
         logger.info(f"Task with ID {task_id} deleted successfully")
         return True
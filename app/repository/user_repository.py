@@ -1,9 +1,79 @@
-from sqlalchemy.orm import Session
-from typing import Optional, List
+from sqlalchemy import update, delete, select, func, bindparam
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session, selectinload
+import uuid
+from collections import defaultdict
+from datetime import datetime
+from typing import NamedTuple, Optional, List, Tuple, Union
 
+from app.database.database import commit_without_expiry
 from app.models.user import User
+from app.models.task import Task
 from app.schema.user_schema import UserCreate, UserUpdate
 from app.common.constants.log import logger
+from app.common.enums.user_roles import UserRole
+from app.repository.task_repository import TASK_READ_COLUMNS, TaskRow
+
+
+_UNIQUE_USER_FIELDS = ("username", "email", "phone_number")
+
+
+def duplicate_user_field(error: IntegrityError) -> Optional[str]:
+    """Name the unique users column an IntegrityError is about, if any."""
+    message = str(error.orig)
+    for field in _UNIQUE_USER_FIELDS:
+        # SQLite: "UNIQUE constraint failed: users.email"; PostgreSQL: "Key (email)=..."
+        if f"users.{field}" in message or f"({field})" in message:
+            return field
+    return None
+
+
+class UserRow(NamedTuple):
+    """The columns UserRead serializes, read without building an ORM object."""
+    id: int
+    name: str
+    username: str
+    role: UserRole
+    created_at: datetime
+    updated_at: datetime
+    phone_number: Optional[str]
+    address: Optional[str]
+    email: str
+
+
+class UserTasksRow(NamedTuple):
+    """A UserRow plus the user's tasks, for UserWithTasks."""
+    id: int
+    name: str
+    username: str
+    role: UserRole
+    created_at: datetime
+    updated_at: datetime
+    phone_number: Optional[str]
+    address: Optional[str]
+    email: str
+    tasks: List[TaskRow]
+
+
+USER_READ_COLUMNS = tuple(getattr(User, field) for field in UserRow._fields)
+
+# Built once for the per-request point lookups (sign-in, ETags); only the bound values change per call.
+_LIVE_USER_BY_ID = (User.id == bindparam("user_id"), User.deleted_at.is_(None))
+_USER_BY_ID = select(User).where(*_LIVE_USER_BY_ID)
+_USER_WITH_TASKS_BY_ID = _USER_BY_ID.options(selectinload(User.tasks))
+_USER_UPDATED_AT = select(User.updated_at).where(*_LIVE_USER_BY_ID)
+_USER_EXISTS = select(User.id).where(*_LIVE_USER_BY_ID)
+_USER_BY_USERNAME = select(User).where(User.username == bindparam("username"), User.deleted_at.is_(None))
+
+
+def _released_user_fields() -> dict:
+    """
+    Values that free a deleted user's unique fields: the username is longer
+    than any UserCreate accepts and the email is not @gmail.com, so neither
+    can clash with a real user.
+    """
+    placeholder = f"deleted-{uuid.uuid4().hex}"
+    return {"username": placeholder, "email": f"{placeholder}@deleted.invalid", "phone_number": None}
 
 
 class UserRepository:
@@ -14,79 +84,167 @@ class UserRepository:
         self.db = db
 
     def create_user(self, user: User) -> User:
-        """Insert a new user into the database."""
+        """
+        Insert a new user with a single INSERT ... RETURNING. The unique
+        constraints are the duplicate check: an IntegrityError is re-raised
+        after rollback (see duplicate_user_field).
+        """
         logger.info(f"Creating a new user with username: {user.username}")
         self.db.add(user)
-        self.db.commit()
-        self.db.refresh(user)
+        try:
+            commit_without_expiry(self.db)
+        except IntegrityError:
+            self.db.rollback()
+            logger.warning(f"User creation for {user.username} hit a unique constraint")
+            raise
         logger.info(f"User created successfully with ID: {user.id}")
         return user
 
-    def get_user_by_id(self, user_id: int) -> Optional[User]:
-        """Retrieve a user by ID."""
+    def user_exists(self, user_id: int) -> bool:
+        """Whether a user that is not deleted has this id, without loading the row."""
+        return self.db.scalar(_USER_EXISTS, {"user_id": user_id}) is not None
+
+    def get_user_by_id(self, user_id: int, with_tasks: bool = False) -> Optional[User]:
+        """Retrieve a user by ID; with_tasks loads their tasks in one extra query."""
         logger.debug(f"Fetching user with ID: {user_id}")
-        user = self.db.query(User).filter(User.id == user_id).first()
+        statement = _USER_WITH_TASKS_BY_ID if with_tasks else _USER_BY_ID
+        user = self.db.scalars(statement, {"user_id": user_id}).first()
         if user:
             logger.info(f"User found: ID {user_id}")
         else:
             logger.warning(f"User with ID {user_id} not found")
         return user
 
+    def get_user_updated_at(self, user_id: int) -> Optional[Tuple[datetime]]:
+        """Return just (updated_at,) for a user, or None if it does not exist."""
+        return self.db.execute(_USER_UPDATED_AT, {"user_id": user_id}).first()
+
     def get_user_by_username(self, username: str) -> Optional[User]:
         """Retrieve a user by username."""
         logger.debug(f"Fetching user with username: {username}")
-        user = self.db.query(User).filter(User.username == username).first()
+        user = self.db.scalars(_USER_BY_USERNAME, {"username": username}).first()
         if user:
             logger.info(f"User found: Username {username}")
         else:
             logger.warning(f"User with username {username} not found")
         return user
 
-    def get_all_users(self) -> List[User]:
-        """Retrieve all users."""
+    def get_users_by_ids(self, user_ids: List[int]) -> List[User]:
+        """Fetch many users with one IN query; rows come back in no particular order."""
+        return self.db.scalars(select(User).where(User.id.in_(user_ids), User.deleted_at.is_(None))).all()
+
+    def get_all_users(self, with_tasks: bool = False) -> Union[List[UserRow], List[UserTasksRow]]:
+        """
+        Retrieve all users as read-only UserRows; with_tasks reads every live
+        user's tasks in one extra query and returns UserTasksRows instead.
+        No ORM objects are built or tracked.
+        """
         logger.debug("Fetching all users from the database.")
-        users = self.db.query(User).all()
+        users = self.db.execute(select(*USER_READ_COLUMNS).where(User.deleted_at.is_(None))).all()
+        if with_tasks:
+            tasks_by_user = defaultdict(list)
+            live_users = select(User.id).where(User.deleted_at.is_(None))
+            for task in self.db.execute(select(*TASK_READ_COLUMNS).where(Task.user_id.in_(live_users))):
+                tasks_by_user[task.user_id].append(TaskRow._make(task))
+            users = [UserTasksRow(*user, tasks_by_user[user.id]) for user in users]
+        else:
+            users = list(map(UserRow._make, users))
         logger.info(f"Total users retrieved: {len(users)}")
         return users
 
-    def update_user(self, user_id: int, user_data: UserUpdate) -> Optional[User]:
-        """Update user details."""
+    def update_user(self, user_id: int, values: dict) -> Optional[User]:
+        """
+        Apply *values* with one UPDATE ... RETURNING and commit. Returns None
+        if the user does not exist; unique violations raise IntegrityError
+        after rollback, as in create_user.
+        """
         logger.info(f"Updating user with ID: {user_id}")
-        user = self.get_user_by_id(user_id)
-        if not user:
-            logger.warning(f"User with ID {user_id} not found for update")
-            return None
-
-        # updates = user_data.dict(exclude_unset=True)
-        for key, value in user_data.items():
-            setattr(user, key, value)
+        if not values:
+            return self.get_user_by_id(user_id)
+        statement = (
+            update(User)
+            .where(User.id == user_id, User.deleted_at.is_(None))
+            .values(**values)
+            .returning(User)
+            .execution_options(synchronize_session=False, populate_existing=True)
+        )
+        try:
+            user = self.db.execute(statement).scalar_one_or_none()
+            commit_without_expiry(self.db)
+        except IntegrityError:
+            self.db.rollback()
+            logger.warning(f"Update of user {user_id} hit a unique constraint")
+            raise
+        if user:
+            logger.info(f"User with ID {user_id} updated successfully")
+        return user
 
+    def replace_password_hash(self, user_id: int, old_hash: str, new_hash: str) -> bool:
+        """
+        Swap a stale password hash for a fresh one, only if the password was
+        not changed meanwhile. updated_at is left alone: the user did not change.
+        """
+        statement = (
+            update(User)
+            .where(User.id == user_id, User.password == old_hash)
+            .values(password=new_hash, updated_at=User.updated_at)
+            .execution_options(synchronize_session=False)
+        )
+        replaced = self.db.execute(statement).rowcount == 1
         self.db.commit()
-        self.db.refresh(user)
-        logger.info(f"User with ID {user_id} updated successfully")
-        return user
+        return replaced
 
     def delete_user(self, user_id: int) -> bool:
-        """Delete a user from the database."""
+        """
+        Mark a user deleted. From now on the user and their tasks are hidden
+        everywhere; the purge job removes both later. The username, email and
+        phone number are released at once, so they can sign up again.
+        """
         logger.info(f"Deleting user with ID: {user_id}")
-        user = self.get_user_by_id(user_id)
-        if not user:
+        marked = self.db.execute(
+            update(User)
+            .where(User.id == user_id, User.deleted_at.is_(None))
+            .values(deleted_at=datetime.utcnow(), **_released_user_fields())
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        self.db.commit()
+        if not marked:
             logger.warning(f"User with ID {user_id} not found for deletion")
             return False
-
-        self.db.delete(user)
-        self.db.commit()
-        logger.info(f"User with ID {user_id} deleted successfully")
+        logger.info(f"User with ID {user_id} marked deleted; purge pending")
         return True
-    
-    def get_user_by_phone(self, phone_number: str):
-        return self.db.query(User).filter(User.phone_number == phone_number).first()
 
-    def get_user_by_email(self, email: str):
-        return self.db.query(User).filter(User.email == email).first()
+    def count_export_users(self) -> int:
+        return self.db.scalar(select(func.count(User.id)).where(User.deleted_at.is_(None)))
+
+    def get_export_users_batch(self, after_id: Optional[int], limit: int):
+        """One batch of the users report, with each user's task count, in id order."""
+        task_count = (
+            select(func.count(Task.id)).where(Task.user_id == User.id).correlate(User).scalar_subquery()
+        )
+        statement = select(
+            User.id, User.username, User.name, User.email, User.role, User.phone_number,
+            User.created_at, task_count,
+        ).where(User.deleted_at.is_(None))
+        if after_id is not None:
+            statement = statement.where(User.id > after_id)
+        return self.db.execute(statement.order_by(User.id).limit(limit)).all()
+
+    def get_deleted_user_ids(self) -> List[int]:
+        return list(self.db.scalars(select(User.id).where(User.deleted_at.isnot(None))))
+
+    def purge_user(self, user_id: int) -> None:
+        """Remove a deleted user's row once the purge job has cleared their tasks."""
+        self.db.execute(
+            delete(User)
+            .where(User.id == user_id, User.deleted_at.isnot(None))
+            .execution_options(synchronize_session=False)
+        )
+        self.db.commit()
+        logger.info(f"User with ID {user_id} purged")
 
     def get_user_by_phone(self, phone_number: str):
-            return self.db.query(User).filter(User.phone_number == phone_number).first()
+        return self.db.scalars(select(User).where(User.phone_number == phone_number)).first()
 
     def get_user_by_email(self, email: str):
-        return self.db.query(User).filter(User.email == email).first()
+        return self.db.scalars(select(User).where(User.email == email)).first()
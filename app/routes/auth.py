@@ -14,6 +14,8 @@ from app.schema.otp_schema import OTPVerify
 from app.schema.user_schema import UserCreate
 from app.common.enums.user_roles import UserRole
 from app.schema.otp_schema import ResendOTPRequest
+from app.utils.security import AuthUtils, ACCESS_TOKEN, REFRESH_TOKEN
+from app.cache.token_revocations import get_revocation_checker
 
 router = APIRouter(prefix="/auth", tags=["authentication"])
 
@@ -21,7 +23,7 @@ router = APIRouter(prefix="/auth", tags=["authentication"])
 # Signup Endpoints
 ###############################
 @router.post("/signup", status_code=status.HTTP_201_CREATED)
-async def signup(user_data: UserCreate, db: Session = Depends(get_db)):
+async def signup(user_data: UserCreate, request: Request, db: Session = Depends(get_db)):
     """
     Register a new user.
     The user is created with is_verified=False and an OTP is sent to their email.
@@ -38,7 +40,7 @@ async def signup(user_data: UserCreate, db: Session = Depends(get_db)):
     if not user:
         raise HTTPException(status_code=400, detail="User creation failed")
     
-    await send_otp(user.email)
+    await send_otp(user.email, request.client.host if request.client else None)
     logger.info(f"Signup OTP sent to {user.email}")
     return {"message": "User registered successfully. Please verify OTP sent to your email."}
 
@@ -53,7 +55,7 @@ async def verify_signup_otp(otp_data: OTPVerify, username: str, db: Session = De
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     
-    if verify_otp(user.email, otp_data.otp):
+    if await verify_otp(user.email, otp_data.otp):
         user.is_verified = True
         db.commit()
         logger.info(f"Signup OTP verified for user {user.username}")
@@ -65,13 +67,14 @@ async def verify_signup_otp(otp_data: OTPVerify, username: str, db: Session = De
 @router.post("/resend-signup-otp")
 async def resend_signup_otp(
     payload: ResendOTPRequest,
+    request: Request,
     db: Session = Depends(get_db),
 ):
     auth_service = AuthService(db)
     user = auth_service.get_user_by_username(payload.username)
     if user.is_verified:
         raise HTTPException(status_code=400, detail="Account already verified.")
-    await send_otp(user.email)
+    await send_otp(user.email, request.client.host if request.client else None)
     logger.info(f"Resent signup OTP to {user.email}")
     return {"message": "OTP resent to your registered email."}
 
@@ -98,25 +101,77 @@ def signin(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect username or password"
         )
-    access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
-    access_token = auth_service.create_access_token({"sub": user.username}, access_token_expires)
+    set_auth_cookies(response, auth_service, user)
     logger.info(f"User {user.username} signed in successfully.")
+    return {"message": "Signin successful; token set in cookie."}
+
+@router.post("/refresh")
+async def refresh(request: Request, response: Response, db: Session = Depends(get_db)):
+    """
+    Exchange the refresh token cookie for a new access token carrying the
+    user's current role and token version. The refresh token is rotated:
+    the one presented here is revoked. Refresh tokens issued before a
+    password, role or username change are refused; the user signs in again.
+    """
+    token = request.cookies.get("refresh_token")
+    if not token:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Refresh token missing.")
+    try:
+        claims = AuthUtils.decode_token(token, REFRESH_TOKEN)
+        jti = claims["jti"]
+    except (JWTError, KeyError):
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid refresh token.")
+    revocations = get_revocation_checker()
+    if await revocations.is_revoked(jti):
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Refresh token has been revoked.")
+    auth_service = AuthService(db)
+    user = auth_service.get_user_for_refresh(claims)
+    if not user:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid refresh token.")
+    await revocations.revoke(jti, claims["exp"])
+    set_auth_cookies(response, auth_service, user)
+    logger.info(f"Tokens refreshed for user {user.username}")
+    return {"message": "Token refreshed."}
+
+def set_auth_cookies(response: Response, auth_service: AuthService, user):
+    """Set the short-lived access token and the refresh token, which is only sent to /auth."""
+    claims = AuthUtils.user_claims(user)
+    access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
+    refresh_token_expires = timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS)
     response.set_cookie(
         key="access_token",
-        value=access_token,
+        value=auth_service.create_access_token(claims, access_token_expires),
         httponly=True,
-        max_age=access_token_expires.seconds
+        max_age=int(access_token_expires.total_seconds())
+    )
+    response.set_cookie(
+        key="refresh_token",
+        value=auth_service.create_refresh_token(claims, refresh_token_expires),
+        httponly=True,
+        max_age=int(refresh_token_expires.total_seconds()),
+        path="/auth"
     )
-    return {"message": "Signin successful; token set in cookie."}
 
 ###############################
 # Logout Endpoint
 ###############################
 @router.post("/logout")
-def logout(response: Response):
+async def logout(request: Request, response: Response):
     """
-    Logout the user by deleting the authentication cookie.
+    Logout the user by revoking both tokens and deleting the authentication cookies.
     """
+    revocations = get_revocation_checker()
+    for cookie, token_type in (("access_token", ACCESS_TOKEN), ("refresh_token", REFRESH_TOKEN)):
+        token = request.cookies.get(cookie)
+        if not token:
+            continue
+        try:
+            claims = AuthUtils.decode_token(token, token_type)
+        except JWTError:
+            continue  # expired or forged: nothing to revoke
+        if claims.get("jti"):
+            await revocations.revoke(claims["jti"], claims["exp"])
     response.delete_cookie("access_token")
+    response.delete_cookie("refresh_token", path="/auth")
     logger.info("User logged out successfully")
     return {"message": "Logged out successfully."}
@@ -0,0 +1,38 @@
+from fastapi import APIRouter, Depends, status
+from fastapi.responses import FileResponse
+from sqlalchemy.orm import Session
+
+from app.dependencies import get_db, get_current_user, require_role, require_valid_token
+from app.schema.export_schema import ExportCreate, ExportRead
+from app.services.export_service import ExportService
+from app.common.enums.user_roles import UserRole
+from app.jobs.exports import submit_export
+
+router = APIRouter(prefix="/exports", tags=["exports"])
+
+ADMIN_ONLY = [Depends(require_valid_token), Depends(require_role([UserRole.ADMIN]))]
+
+
+@router.post("/", response_model=ExportRead, status_code=status.HTTP_202_ACCEPTED, dependencies=ADMIN_ONLY)
+def create_export(export_data: ExportCreate, db: Session = Depends(get_db), current_user = Depends(get_current_user)):
+    """
+    Queue a report export; it is built in the background.
+    Poll GET /exports/{id} for progress, then download it.
+    """
+    service = ExportService(db)
+    job = service.create_export(export_data, current_user)
+    submit_export(job.id)
+    return job
+
+@router.get("/{export_id}", response_model=ExportRead, dependencies=ADMIN_ONLY)
+def get_export(export_id: int, db: Session = Depends(get_db), current_user = Depends(get_current_user)):
+    """Status and progress of one of your exports."""
+    service = ExportService(db)
+    return service.get_export(export_id, current_user)
+
+@router.get("/{export_id}/download", dependencies=ADMIN_ONLY)
+def download_export(export_id: int, db: Session = Depends(get_db), current_user = Depends(get_current_user)):
+    """Stream a finished export from disk."""
+    service = ExportService(db)
+    path, filename, media_type = service.get_export_file(export_id, current_user)
+    return FileResponse(path, media_type=media_type, filename=filename)
@@ -0,0 +1,31 @@
+from fastapi import APIRouter, HTTPException, Request, status
+from starlette.concurrency import run_in_threadpool
+
+from app.database.database import get_engine
+from app.common.constants.log import logger
+
+router = APIRouter(prefix="/health", tags=["health"])
+
+
+def _ping_database():
+    with get_engine().connect() as conn:
+        conn.exec_driver_sql("SELECT 1")
+
+
+@router.get("/live")
+async def liveness():
+    """The worker's event loop is running."""
+    return {"status": "alive"}
+
+
+@router.get("/ready")
+async def readiness(request: Request):
+    """The worker finished startup and can reach the database."""
+    if not getattr(request.app.state, "ready", False):
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Not ready")
+    try:
+        await run_in_threadpool(_ping_database)
+    except Exception as e:
+        logger.error(f"Readiness check failed: {e}")
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Database unavailable")
+    return {"status": "ready"}
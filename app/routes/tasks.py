@@ -1,16 +1,21 @@
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
 from sqlalchemy.orm import Session
-from typing import List
+from datetime import date
+from typing import List, Literal, Optional
 
-from app.dependencies import get_db, get_current_user, require_role, require_valid_token
-from app.schema.task_schema import TaskCreate, TaskUpdate, TaskRead
+from app.dependencies import get_db, get_current_user, require_role, require_valid_token, batch_ids
+from app.schema.task_schema import TaskCreate, TaskUpdate, TaskRead, TaskSearchPage, TaskSummary, TaskChanges, TaskBatch, TaskFilterPage, TaskKeysetPage, TaskCounts
 from app.services.task_service import TaskService
 from app.common.enums.user_roles import UserRole
 from app.common.constants.log import logger
+from app.common.constants.exceptions import TaskNotFoundException
+from app.utils.http_cache import etag_matches, apply_cache_headers, not_modified
 
 router = APIRouter(prefix="/tasks", tags=["tasks"])
 
+IncludeArchivedParam = Query(False, description="Also return done tasks moved to the archive.")
+
 @router.post("/", response_model=TaskRead,
     dependencies=[Depends(require_valid_token), Depends(require_role([UserRole.USER, UserRole.ADMIN]))]
 )
@@ -20,30 +25,159 @@ def create_task(task_data: TaskCreate, db: Session = Depends(get_db), current_us
     (Service logic should verify that a User can only create tasks for themselves.)
     """
     service = TaskService(db)
-    return service.create_task(task_data)
+    return service.create_task(task_data, current_user)
 
 @router.get("/", response_model=List[TaskRead],
     dependencies=[Depends(require_valid_token)]
 )
-def get_tasks(db: Session = Depends(get_db)):
+def get_tasks(request: Request, response: Response, include_archived: bool = IncludeArchivedParam,
+              db: Session = Depends(get_db), current_user = Depends(require_valid_token)):
     """
     All OTP-verified users (Admins, Users, Readers) may view tasks.
+    The ETag is the task collection version, so If-None-Match is answered
+    with 304 from a single counter lookup.
+    """
+    service = TaskService(db)
+    # One version read serves both the ETag and the coalesced read.
+    version = service.get_tasks_version()
+    etag = service.get_tasks_etag(include_archived, version)
+    if etag_matches(request, etag):
+        return not_modified(etag, current_user.role)
+    apply_cache_headers(response, etag, current_user.role)
+    return service.get_all_tasks(include_archived, scope=current_user.role, version=version)
+
+@router.get("/search", response_model=TaskSearchPage,
+    dependencies=[Depends(require_valid_token)]
+)
+def search_tasks(
+    q: str = Query(..., min_length=1, max_length=200),
+    limit: int = Query(20, ge=1, le=100),
+    offset: int = Query(0, ge=0),
+    db: Session = Depends(get_db),
+):
+    """
+    Keyword search over task titles and descriptions, best match first.
+    Words are ANDed; end a word with '*' for a prefix match (e.g. "rep*").
+    Visible to the same roles as the task list.
+    """
+    service = TaskService(db)
+    items, has_more = service.search_tasks(q, limit, offset)
+    return {"items": items, "limit": limit, "offset": offset, "has_more": has_more}
+
+@router.get("/batch", response_model=TaskBatch,
+    dependencies=[Depends(require_valid_token)]
+)
+def get_tasks_batch(ids: List[int] = Depends(batch_ids), db: Session = Depends(get_db)):
+    """
+    Fetch several tasks in one call, e.g. /tasks/batch?ids=3,1,2.
+    Items keep the requested order; ids that do not exist are listed in `missing`.
     """
     service = TaskService(db)
-    return service.get_all_tasks()
+    items, missing = service.get_tasks_by_ids(ids)
+    return {"items": items, "missing": missing}
+
+@router.get("/changes", response_model=TaskChanges,
+    dependencies=[Depends(require_valid_token)]
+)
+def get_task_changes(
+    since: Optional[str] = Query(None, max_length=512),
+    limit: int = Query(100, ge=1, le=500),
+    db: Session = Depends(get_db),
+):
+    """
+    Delta sync: tasks created or updated, and ids of tasks deleted, after the
+    `since` cursor. Omit `since` for a full download, then pass back the
+    returned cursor; keep paging while has_more is true.
+    Returns 410 once the cursor is older than the kept deletion history.
+    """
+    service = TaskService(db)
+    return service.get_task_changes(since, limit)
+
+def task_filters(
+    user_id: Optional[int] = Query(None),
+    status: Optional[str] = Query(None, max_length=100),
+    due_from: Optional[date] = Query(None, description="Due on or after this date"),
+    due_to: Optional[date] = Query(None, description="Due on or before this date"),
+) -> dict:
+    return {"user_id": user_id, "status": status, "due_from": due_from, "due_to": due_to}
+
+@router.get("/filter", response_model=TaskFilterPage,
+    dependencies=[Depends(require_valid_token)]
+)
+def filter_tasks(
+    filters: dict = Depends(task_filters),
+    limit: int = Query(50, ge=1, le=500),
+    offset: int = Query(0, ge=0),
+    include_archived: bool = IncludeArchivedParam,
+    db: Session = Depends(get_db),
+):
+    """
+    Tasks matching every given filter, in id order, with the total match count.
+    Visible to the same roles as the task list.
+    """
+    service = TaskService(db)
+    items, total = service.filter_tasks(limit, offset, include_archived, **filters)
+    return {"items": items, "total": total, "limit": limit, "offset": offset, "has_more": offset + len(items) < total}
+
+@router.get("/page", response_model=TaskKeysetPage,
+    dependencies=[Depends(require_valid_token)]
+)
+def get_tasks_page(
+    filters: dict = Depends(task_filters),
+    after: Optional[int] = Query(None, description="next_after from the previous page"),
+    limit: int = Query(100, ge=1, le=500),
+    db: Session = Depends(get_db),
+):
+    """
+    Tasks matching the filters in id order, one page at a time: pass the
+    returned next_after back as `after` while has_more is true. Unlike
+    /tasks/filter, deep pages cost the same as the first.
+    """
+    service = TaskService(db)
+    items, has_more = service.get_tasks_page(after, limit, **filters)
+    return {"items": items, "limit": limit, "next_after": items[-1].id if items else after, "has_more": has_more}
+
+@router.get("/counts", response_model=TaskCounts,
+    dependencies=[Depends(require_valid_token)]
+)
+def count_tasks(
+    group_by: Literal["status", "user"] = Query("status"),
+    filters: dict = Depends(task_filters),
+    db: Session = Depends(get_db),
+):
+    """Count tasks matching the filters per status or per user (keyed by user ID)."""
+    service = TaskService(db)
+    return service.count_tasks(group_by, **filters)
+
+@router.get("/summary", response_model=TaskSummary,
+    dependencies=[Depends(require_valid_token)]
+)
+def get_task_summary(db: Session = Depends(get_db)):
+    """
+    Dashboard counts per status and per user (keyed by user ID), plus overdue tasks.
+    Served from counters kept in step with every task write, so the cost does not grow with the table.
+    """
+    service = TaskService(db)
+    return service.get_task_summary()
 
 @router.get("/{task_id}", response_model=TaskRead,
     dependencies=[Depends(require_valid_token)]
 )
-def get_task(task_id: int, db: Session = Depends(get_db)):
+def get_task(task_id: int, request: Request, response: Response, include_archived: bool = IncludeArchivedParam,
+             db: Session = Depends(get_db), current_user = Depends(require_valid_token)):
     """
     All OTP-verified users may view a specific task.
+    A matching If-None-Match gets a 304 after reading only updated_at.
     """
     service = TaskService(db)
-    task = service.get_task_by_id(task_id)
-    if not task:
-        raise HTTPException(status_code=404, detail="Task not found")
-    return task
+    etag = service.get_task_etag(task_id, include_archived)
+    if etag is None:
+        raise TaskNotFoundException(task_id)
+    if etag_matches(request, etag):
+        return not_modified(etag, current_user.role)
+    apply_cache_headers(response, etag, current_user.role)
+    # Every verified role sees every task, so callers with the same role may share the read.
+    return service.get_task_by_id(task_id, include_archived, scope=current_user.role)
 
 @router.put("/{task_id}", response_model=TaskRead,
     dependencies=[Depends(require_valid_token), Depends(require_role([UserRole.USER, UserRole.ADMIN]))]
@@ -54,11 +188,22 @@ def update_task(task_id: int, task_data: TaskUpdate, db: Session = Depends(get_d
     For Users, the service should ensure that they can only update their own tasks.
     """
     service = TaskService(db)
-    updated_task = service.update_task(task_id, task_data.dict(), current_user)
+    updated_task = service.update_task(task_id, task_data.dict(exclude_unset=True), current_user)
     if not updated_task:
         raise HTTPException(status_code=404, detail="Task not found")
     return updated_task
 
+@router.post("/{task_id}/restore", response_model=TaskRead,
+    dependencies=[Depends(require_valid_token), Depends(require_role([UserRole.USER, UserRole.ADMIN]))]
+)
+def restore_task(task_id: int, db: Session = Depends(get_db), current_user = Depends(get_current_user)):
+    """
+    Move an archived task back to the active tasks. Admins may restore any
+    task, Users only their own.
+    """
+    service = TaskService(db)
+    return service.restore_task(task_id, current_user)
+
 @router.delete("/{task_id}",
     dependencies=[Depends(require_valid_token), Depends(require_role([UserRole.USER, UserRole.ADMIN]))]
 )
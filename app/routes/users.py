@@ -1,40 +1,80 @@
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query, Request, Response, status
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Literal, Optional, Union
 
-from app.dependencies import get_db, get_current_user, require_role, require_valid_token
-from app.schema.user_schema import UserCreate, UserRead, UserUpdate
+from app.dependencies import get_db, get_current_user, require_role, require_valid_token, batch_ids
+from app.schema.user_schema import UserCreate, UserRead, UserUpdate, UserBatch, UserWithTasks
 from app.services.user_service import UserService
 from app.common.enums.user_roles import UserRole
 from app.common.constants.log import logger
+from app.common.constants.exceptions import UserNotFoundException
+from app.utils.http_cache import etag_matches, apply_cache_headers, not_modified
+from app.jobs.scheduler import run_job
+from app.jobs.user_purge import purge_deleted_users
 
 router = APIRouter(prefix="/users", tags=["users"])
 
-@router.get("/", response_model=List[UserRead],
+IncludeParam = Query(None, description="Set to 'tasks' to embed each user's tasks.")
+
+
+def _user_schema(include: Optional[str]):
+    return UserWithTasks if include == "tasks" else UserRead
+
+@router.get("/", response_model=List[Union[UserWithTasks, UserRead]],
     dependencies=[Depends(require_valid_token), Depends(require_role([UserRole.ADMIN, UserRole.READER]))])
-def get_users(db: Session = Depends(get_db)):
+def get_users(include: Optional[Literal["tasks"]] = IncludeParam, db: Session = Depends(get_db)):
     """
     Only Admins and Readers can view all users.
+    With include=tasks all their tasks come from one extra query.
+    """
+    service = UserService(db)
+    schema = _user_schema(include)
+    return [schema.model_validate(user, from_attributes=True)
+            for user in service.get_all_users(include_tasks=include == "tasks")]
+
+@router.get("/batch", response_model=UserBatch,
+    dependencies=[Depends(require_valid_token)]
+)
+def get_users_batch(ids: List[int] = Depends(batch_ids), db: Session = Depends(get_db), current_user = Depends(get_current_user)):
+    """
+    Fetch several users in one call, e.g. /users/batch?ids=3,1,2.
+    Same visibility as GET /users/{id}: a regular user only gets their own
+    record, and other existing ids are listed in `forbidden`.
     """
     service = UserService(db)
-    return service.get_all_users()
+    items, missing, forbidden = service.get_users_by_ids(ids, current_user)
+    return {"items": items, "missing": missing, "forbidden": forbidden}
 
-@router.get("/{user_id}", response_model=UserRead,
+@router.get("/{user_id}", response_model=Union[UserWithTasks, UserRead],
     dependencies=[Depends(require_valid_token)]
 )
-def get_user(user_id: int, db: Session = Depends(get_db), current_user = Depends(get_current_user)):
+def get_user(
+    user_id: int,
+    request: Request,
+    response: Response,
+    include: Optional[Literal["tasks"]] = IncludeParam,
+    db: Session = Depends(get_db),
+    current_user = Depends(get_current_user),
+):
     """
     Allow an admin or reader to view any user.
     A regular user may view only their own record.
+    A matching If-None-Match gets a 304 after reading only updated_at.
+    With include=tasks the user's tasks come from one extra query.
     """
     service = UserService(db)
-    user = service.get_user_by_id(user_id)
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
+    include_tasks = include == "tasks"
+    etag = service.get_user_etag(user_id, include_tasks=include_tasks)
+    if etag is None:
+        raise UserNotFoundException()
     if current_user.role == UserRole.USER and current_user.id != user_id:
         raise HTTPException(status_code=403, detail="Not authorized to view this user")
-    return user
+    if etag_matches(request, etag):
+        return not_modified(etag, current_user.role)
+    apply_cache_headers(response, etag, current_user.role)
+    user = service.get_user_by_id(user_id, include_tasks=include_tasks)
+    return _user_schema(include).model_validate(user, from_attributes=True)
 
 @router.post("/", response_model=UserRead,
     dependencies=[Depends(require_valid_token), Depends(require_role([UserRole.ADMIN]))]
@@ -59,11 +99,14 @@ def update_user(user_id: int, user_data: UserUpdate, db: Session = Depends(get_d
 @router.delete("/{user_id}",
     dependencies=[Depends(require_valid_token), Depends(require_role([UserRole.ADMIN]))]
 )
-def delete_user(user_id: int, db: Session = Depends(get_db)):
+def delete_user(user_id: int, background_tasks: BackgroundTasks, db: Session = Depends(get_db)):
     """
     Only an OTP-verified Admin can delete a user.
+    The user is gone from the API immediately; their tasks are purged in the
+    background after the response is sent.
     """
     service = UserService(db)
     if not service.delete_user(user_id):
         raise HTTPException(status_code=404, detail="User not found")
+    background_tasks.add_task(run_job, purge_deleted_users)
     return {"message": f"User {user_id} deleted successfully"}
@@ -0,0 +1,29 @@
+from datetime import datetime
+from typing import Literal, Optional
+from pydantic import BaseModel, Field
+
+
+class ExportCreate(BaseModel):
+    report: Literal["tasks", "users"] = Field(..., example="tasks")
+    format: Literal["csv", "parquet"] = Field("csv", example="csv")
+    # Filters for the tasks report.
+    status: Optional[str] = Field(None, example="Pending")
+    user_id: Optional[int] = None
+    overdue_only: bool = False
+
+
+class ExportRead(BaseModel):
+    id: int
+    report: str
+    format: str
+    status: str
+    rows_written: int
+    rows_total: Optional[int] = None
+    progress: float
+    error: Optional[str] = None
+    created_at: datetime
+    finished_at: Optional[datetime] = None
+    expires_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
@@ -1,44 +1,90 @@
-from pydantic import BaseModel, Field, validator
+from pydantic import BaseModel, Field, field_validator
 from datetime import date, timedelta,timezone, datetime
-from typing import Optional
+from typing import Optional, List, Dict
+from app.utils.clock import today
 
 india_tz = timezone(timedelta(hours=5, minutes=30))
 
+class FutureDueDate(BaseModel):
+    """Shared due_date rule for TaskCreate and TaskUpdate."""
+
+    @field_validator("due_date", check_fields=False)
+    @classmethod
+    def due_date_must_be_future(cls, v):
+        if v is not None and v <= today():
+            raise ValueError("Due date must be greater than today's date.")
+        return v
+
 class TaskBase(BaseModel):
     title: str = Field(..., example="New Task")
     description: Optional[str] = Field(None)
     due_date: Optional[date] = Field(None, example="2025-12-31")
     status: str = Field("Pending", example="Pending/Done")
 
-class TaskCreate(TaskBase):
+class TaskCreate(TaskBase, FutureDueDate):
     user_id: int
 
-    @validator('due_date')
-    def due_date_must_be_future(cls, v):
-        if v is not None and v <= date.today():
-            raise ValueError("Due date must be greater than today's date.")
-        return v
-
-class TaskUpdate(BaseModel):
+class TaskUpdate(FutureDueDate):
     title: Optional[str] = Field(None, example="Update Title")
     description: Optional[str] = Field(None, example="Update Description")
     due_date: Optional[date] = Field(None, example="2025-12-31")
     status: Optional[str] = Field(None, example="Completed")
     
-    @validator('due_date')
-    def due_date_must_be_future(cls, v):
-        if v is not None and v <= date.today():
-            raise ValueError("Due date must be greater than today's date.")
-        return v
-
 class TaskRead(TaskBase):
     id: int
     user_id: int
     created_at: datetime
     updated_at: datetime
+    overdue_at: Optional[datetime] = None
 
     class Config:
         from_attributes = True
         json_encoders = {
             datetime: lambda v: v.astimezone(india_tz).strftime("%d-%m-%Y")
-        }
\ No newline at end of file
+        }
+
+class TaskSearchPage(BaseModel):
+    items: List[TaskRead]
+    limit: int
+    offset: int
+    has_more: bool
+
+
+class TaskFilterPage(BaseModel):
+    items: List[TaskRead]
+    total: int
+    limit: int
+    offset: int
+    has_more: bool
+
+
+class TaskKeysetPage(BaseModel):
+    items: List[TaskRead]
+    limit: int
+    next_after: Optional[int]
+    has_more: bool
+
+
+class TaskCounts(BaseModel):
+    group_by: str
+    total: int
+    counts: Dict[str, int]
+
+
+class TaskBatch(BaseModel):
+    items: List[TaskRead]
+    missing: List[int]
+
+
+class TaskChanges(BaseModel):
+    changes: List[TaskRead]
+    deleted: List[int]
+    cursor: str
+    has_more: bool
+
+
+class TaskSummary(BaseModel):
+    total: int
+    by_status: Dict[str, int]
+    by_user: Dict[str, int]
+    overdue: int
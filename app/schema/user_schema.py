@@ -1,14 +1,61 @@
-
-
-from pydantic import BaseModel, Field, validator
-from typing import Optional
+from pydantic import BaseModel, Field, field_validator
+from typing import List, Optional
 from datetime import datetime, timezone, timedelta
 from app.common.enums.user_roles import UserRole
+from app.schema.task_schema import TaskRead
 from pydantic.networks import EmailStr
 import re
+import string
 
 india_tz = timezone(timedelta(hours=5, minutes=30))
 
+_PHONE_NUMBER = re.compile(r"^\+91[6-9]\d{9}$")
+_UPPERCASE = frozenset(string.ascii_uppercase)
+_LOWERCASE = frozenset(string.ascii_lowercase)
+_DIGITS = frozenset(string.digits)
+_SPECIAL = frozenset('!@#$%^&*(),.?":{}|<>')
+
+
+def check_password_strength(v: str) -> str:
+    """Read the password once into a set of characters; every rule is then a set test."""
+    if len(v) < 8:
+        raise ValueError("Password must be at least 8 characters long")
+    chars = set(v)
+    if chars.isdisjoint(_UPPERCASE):
+        raise ValueError("Password must contain at least one uppercase letter")
+    if chars.isdisjoint(_LOWERCASE):
+        raise ValueError("Password must contain at least one lowercase letter")
+    # Like \d, any Unicode decimal digit counts.
+    if chars.isdisjoint(_DIGITS) and not any(c.isdecimal() for c in chars):
+        raise ValueError("Password must contain at least one digit")
+    if chars.isdisjoint(_SPECIAL):
+        raise ValueError("Password must contain at least one special character")
+    return v
+
+
+class UserFieldRules(BaseModel):
+    """Validators shared by UserCreate and UserUpdate; None means the field was not sent."""
+
+    @field_validator("password", check_fields=False)
+    @classmethod
+    def validate_strong_password(cls, v):
+        return v if v is None else check_password_strength(v)
+
+    @field_validator("email", check_fields=False)
+    @classmethod
+    def validate_gmail_email(cls, v):
+        if v is not None and not v.endswith("@gmail.com"):
+            raise ValueError("Email must have a '@gmail.com' domain")
+        return v
+
+    @field_validator("phone_number", check_fields=False)
+    @classmethod
+    def validate_phone_number(cls, v):
+        if v and not _PHONE_NUMBER.match(v):
+            raise ValueError("Invalid phone number format. Use '+919XXXXXXXXX'")
+        return v
+
+
 class UserBase(BaseModel):
     name: str = Field(..., min_length=2, max_length=50, example="Naman Bhatt")
     username: str = Field(..., min_length=3, max_length=30, example="NamanBhatt")
@@ -18,46 +65,20 @@ class UserBase(BaseModel):
         description="User role. Can be 'admin', 'user', or 'reader'."
     )
     
-    @validator("role", pre=True, always=True)
+    @field_validator("role", mode="before")
+    @classmethod
     def validate_role(cls, value):
         return UserRole.from_string(value)
 
 
-class UserCreate(UserBase):
+class UserCreate(UserBase, UserFieldRules):
     password: str = Field(..., min_length=2, max_length=100, example="strongpassword")
     phone_number: Optional[str] = Field(None, example="+919810000000")
     address: Optional[str] = Field(None, example="Greater Noida, India")
     email: EmailStr  
 
-    @validator("password")
-    def validate_strong_password(cls, v):
-        if len(v) < 8:
-            raise ValueError("Password must be at least 8 characters long")
-        if not re.search(r"[A-Z]", v):
-            raise ValueError("Password must contain at least one uppercase letter")
-        if not re.search(r"[a-z]", v):
-            raise ValueError("Password must contain at least one lowercase letter")
-        if not re.search(r"\d", v):
-            raise ValueError("Password must contain at least one digit")
-        if not re.search(r"[!@#$%^&*(),.?\":{}|<>]", v):
-            raise ValueError("Password must contain at least one special character")
-        return v
-    
-    @validator("email")
-    def validate_gmail_email(cls, v):
-        if not v.endswith("@gmail.com"):
-            raise ValueError("Email must have a '@gmail.com' domain")
-        return v
-    
-    @validator("phone_number")
-    def validate_phone_number(cls, v):
-        if v:
-            pattern = re.compile(r"^\+91[6-9]\d{9}$")
-            if not pattern.match(v):
-                raise ValueError("Invalid phone number format. Use '+919XXXXXXXXX'")
-        return v
     
-class UserUpdate(BaseModel):
+class UserUpdate(UserFieldRules):
     name: Optional[str] = Field(None, min_length=2, max_length=50, example="Updated Name")
     username: Optional[str] = Field(None, min_length=3, max_length=30, example="UpdatedUsername")
     password: Optional[str] = Field(None, min_length=3, max_length=100, example="NewStrongPassword")
@@ -66,35 +87,6 @@ class UserUpdate(BaseModel):
     address: Optional[str] = Field(None, example="Greater Noida, India")
     email: Optional[str] = None 
     
-
-    @validator("password")
-    def validate_strong_password(cls, v):
-        if len(v) < 8:
-            raise ValueError("Password must be at least 8 characters long")
-        if not re.search(r"[A-Z]", v):
-            raise ValueError("Password must contain at least one uppercase letter")
-        if not re.search(r"[a-z]", v):
-            raise ValueError("Password must contain at least one lowercase letter")
-        if not re.search(r"\d", v):
-            raise ValueError("Password must contain at least one digit")
-        if not re.search(r"[!@#$%^&*(),.?\":{}|<>]", v):
-            raise ValueError("Password must contain at least one special character")
-        return v
-
-    @validator("email")
-    def validate_gmail_email(cls, v):
-        if not v.endswith("@gmail.com"):
-            raise ValueError("Email must have a '@gmail.com' domain")
-        return v
-    
-    @validator("phone_number")
-    def validate_phone_number(cls, v):
-        if v:
-            pattern = re.compile(r"^\+91[6-9]\d{9}$")
-            if not pattern.match(v):
-                raise ValueError("Invalid phone number format. Use '+919XXXXXXXXX'")
-        return v
-    
 class UserRead(UserBase):
     id: int
     created_at: datetime
@@ -111,6 +103,15 @@ class UserRead(UserBase):
                 .strftime("%d-%m-%Y %H:%M:%S")
             )
         }
+
+class UserWithTasks(UserRead):
+    tasks: List[TaskRead]
+
+class UserBatch(BaseModel):
+    items: List[UserRead]
+    missing: List[int]
+    forbidden: List[int]
+
 class OTPVerification(BaseModel):
     email: EmailStr
     otp: str
\ No newline at end of file
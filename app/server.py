@@ -0,0 +1,82 @@
+"""
+Production entry point.
+
+    python -m app.server --workers 8
+
+Runs one uvicorn worker per CPU by default, using uvloop and httptools when they
+are installed. Send SIGHUP to the parent for a rolling restart, SIGTTIN/SIGTTOU
+to add or remove a worker, and SIGTERM for a graceful shutdown.
+"""
+import argparse
+import importlib.util
+import os
+import time
+
+import uvicorn
+from uvicorn.supervisors.multiprocess import Multiprocess, Process, logger as supervisor_logger
+
+from app.config import settings
+
+
+def _installed(module: str) -> bool:
+    return importlib.util.find_spec(module) is not None
+
+
+class RollingMultiprocess(Multiprocess):
+    """Multiprocess supervisor whose restart keeps every slot serving traffic."""
+
+    def restart_all(self) -> None:
+        for idx, old_process in enumerate(list(self.processes)):
+            new_process = Process(self.config, self.target, self.sockets)
+            new_process.start()
+            if not new_process.is_alive(timeout=settings.WORKER_BOOT_GRACE_SECONDS + 5):
+                supervisor_logger.error(f"Replacement worker [{new_process.pid}] did not start; keeping [{old_process.pid}]")
+                new_process.kill()
+                continue
+            # The worker answers pings before its lifespan finishes; give it time to warm up.
+            time.sleep(settings.WORKER_BOOT_GRACE_SECONDS)
+            self.processes[idx] = new_process
+            old_process.terminate()
+            old_process.join()
+
+
+def build_config(args) -> uvicorn.Config:
+    return uvicorn.Config(
+        "app.main:app",
+        host=args.host,
+        port=args.port,
+        workers=args.workers,
+        loop="uvloop" if _installed("uvloop") else "asyncio",
+        http="httptools" if _installed("httptools") else "h11",
+        timeout_keep_alive=args.keep_alive,
+        backlog=args.backlog,
+        timeout_graceful_shutdown=args.graceful_timeout,
+        proxy_headers=True,
+        access_log=False,
+    )
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Run the Task & User Management API in production.")
+    parser.add_argument("--host", default=settings.SERVER_HOST)
+    parser.add_argument("--port", type=int, default=settings.SERVER_PORT)
+    parser.add_argument("--workers", type=int, default=settings.WEB_CONCURRENCY or os.cpu_count() or 1)
+    parser.add_argument("--keep-alive", type=int, default=settings.KEEP_ALIVE_SECONDS,
+                        help="Seconds to keep idle connections open; keep above the load balancer's idle timeout.")
+    parser.add_argument("--backlog", type=int, default=settings.SOCKET_BACKLOG)
+    parser.add_argument("--graceful-timeout", type=int, default=settings.GRACEFUL_SHUTDOWN_SECONDS)
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    config = build_config(parse_args(argv))
+    server = uvicorn.Server(config)
+    if config.workers > 1:
+        sock = config.bind_socket()
+        RollingMultiprocess(config, target=server.run, sockets=[sock]).run()
+    else:
+        server.run()
+
+
+if __name__ == "__main__":
+    main()
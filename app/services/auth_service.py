@@ -3,9 +3,11 @@ from sqlalchemy.orm import Session
 from app.models.user import User
 from app.schema.user_schema import UserCreate
 from app.common.enums.user_roles import UserRole
-from app.repository.user_repository import UserRepository
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+from app.repository.user_repository import UserRepository, duplicate_user_field
 from app.common.constants.log import logger
-from app.utils.security import AuthUtils, get_password_hash, verify_password  # Import here
+from app.utils.security import AuthUtils, get_password_hash, verify_and_update_password
+from app.cache.token_versions import get_token_versions
 from fastapi import HTTPException
 class AuthService:
     def __init__(self, db: Session):
@@ -18,23 +20,58 @@ class AuthService:
         if not user:
             logger.warning(f"User {username} not found for authentication.")
             return None
-        if not verify_password(password, user.password):
+        verified, new_hash = verify_and_update_password(password, user.password)
+        if not verified:
             logger.warning(f"Incorrect password for user {username}.")
             return None
+        if new_hash:
+            self._rehash_password(user, new_hash)
         logger.info(f"User {username} authenticated successfully.")
+        get_token_versions().note(user.id, user.token_version)
         return user
 
+    def get_user_for_refresh(self, claims: dict):
+        """
+        Check verified refresh token claims against the user's row: the one
+        DB read that keeps token claims current. Returns None if the claims
+        are malformed, the user is gone, or the token predates a change of
+        the user's password, role or username (a token_version bump).
+        """
+        try:
+            user_id = int(claims["uid"])
+            version = int(claims["ver"])
+        except (KeyError, TypeError, ValueError):
+            logger.warning("Rejected a refresh token without a user id or token version.")
+            return None
+        user = self.user_repo.get_user_by_id(user_id)
+        if not user:
+            get_token_versions().revoke(user_id)
+            return None
+        get_token_versions().note(user.id, user.token_version)
+        if version != user.token_version:
+            logger.warning(f"Rejected a stale refresh token for user {user.username}.")
+            return None
+        return user
+
+    def _rehash_password(self, user: User, new_hash: str):
+        """Store a hash with the current scheme and cost; a failure here never blocks the login."""
+        try:
+            if self.user_repo.replace_password_hash(user.id, user.password, new_hash):
+                user.password = new_hash
+                logger.info(f"Rehashed password for user {user.username} with current parameters.")
+        except SQLAlchemyError as e:
+            self.db.rollback()
+            logger.warning(f"Could not rehash password for user {user.username}: {str(e)}")
+
     def create_access_token(self, data: dict, expires_delta):
         token = AuthUtils.create_access_token(data, expires_delta)
         logger.debug(f"Access token created for user: {data.get('sub')}")
         return token
 
+    def create_refresh_token(self, data: dict, expires_delta):
+        return AuthUtils.create_refresh_token(data, expires_delta)
+
     def create_user(self, user_data: UserCreate) -> User:
-        if self.user_repo.get_user_by_username(user_data.username):
-            raise HTTPException(status_code=400, detail="Username already exists")
-        if self.user_repo.get_user_by_email(user_data.email):
-            raise HTTPException(status_code=400, detail="Email already exists")
-        
         hashed_password = get_password_hash(user_data.password)
         
         user = User(
@@ -47,7 +84,17 @@ class AuthService:
             role=user_data.role,
             is_verified=False 
         )
-        return self.user_repo.create_user(user)
+        try:
+            return self.user_repo.create_user(user)
+        except IntegrityError as e:
+            field = duplicate_user_field(e)
+            if field == "username":
+                raise HTTPException(status_code=400, detail="Username already exists")
+            if field == "email":
+                raise HTTPException(status_code=400, detail="Email already exists")
+            if field == "phone_number":
+                raise HTTPException(status_code=400, detail="Phone number already exists")
+            raise
 
     def get_user_by_username(self, username: str) -> User:
         user = self.user_repo.get_user_by_username(username)
@@ -0,0 +1,33 @@
+"""
+In-process publish/subscribe for domain events.
+
+Handlers run synchronously in the publisher's thread, so keep them short and
+hand slow work (email, webhooks) to a queue. A failing handler is logged and
+does not stop the others.
+"""
+from collections import defaultdict
+from typing import Any, Callable, Dict, List
+
+from app.common.constants.log import logger
+
+EventHandler = Callable[[Dict[str, Any]], None]
+
+_subscribers: Dict[str, List[EventHandler]] = defaultdict(list)
+
+
+def subscribe(topic: str, handler: EventHandler) -> None:
+    _subscribers[topic].append(handler)
+
+
+def unsubscribe(topic: str, handler: EventHandler) -> None:
+    if handler in _subscribers.get(topic, ()):
+        _subscribers[topic].remove(handler)
+
+
+def publish(topic: str, payload: Dict[str, Any]) -> None:
+    logger.info(f"Event {topic}: {payload}")
+    for handler in list(_subscribers.get(topic, ())):
+        try:
+            handler(payload)
+        except Exception as e:
+            logger.error(f"Handler {getattr(handler, '__name__', handler)} failed for {topic}: {e}")
@@ -0,0 +1,72 @@
+import json
+import os
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.models.export_job import ExportJob
+from app.repository.export_repository import ExportRepository
+from app.schema.export_schema import ExportCreate
+from app.common.constants.export import EXPORT_QUEUED, EXPORT_DONE, EXPORT_EXPIRED
+from app.common.constants.log import logger
+from app.common.constants.exceptions import (
+    ExportNotFoundException,
+    ExportFormatUnavailableException,
+    ExportLimitException,
+    ExportNotReadyException,
+    ExportExpiredException,
+    TaskShardingUnsupportedException,
+)
+from app.utils.export_writers import EXPORT_WRITERS, available_export_formats
+
+
+class ExportService:
+    def __init__(self, db: Session):
+        self.db = db
+        self.export_repo = ExportRepository(db)
+
+    def create_export(self, export_data: ExportCreate, current_user) -> ExportJob:
+        """Record a queued export; the caller hands its id to the export pool."""
+        if settings.TASK_SHARD_URLS:
+            # Both reports join tasks to users, which live in different databases once sharded.
+            raise TaskShardingUnsupportedException("Exports")
+        available = available_export_formats()
+        if export_data.format not in available:
+            raise ExportFormatUnavailableException(export_data.format, available)
+        if self.export_repo.count_active_jobs(current_user.id) >= settings.EXPORT_MAX_ACTIVE_PER_USER:
+            logger.warning(f"User {current_user.username} hit the concurrent export limit")
+            raise ExportLimitException(settings.EXPORT_MAX_ACTIVE_PER_USER)
+        filters = {}
+        if export_data.report == "tasks":
+            filters = {
+                "status": export_data.status,
+                "user_id": export_data.user_id,
+                "overdue_only": export_data.overdue_only,
+            }
+        job = ExportJob(
+            requested_by=current_user.id,
+            report=export_data.report,
+            format=export_data.format,
+            filters=json.dumps(filters),
+            status=EXPORT_QUEUED,
+            rows_written=0,
+        )
+        return self.export_repo.create_job(job)
+
+    def get_export(self, export_id: int, current_user) -> ExportJob:
+        """An export is only visible to the user who requested it."""
+        job = self.export_repo.get_job(export_id)
+        if job is None or job.requested_by != current_user.id:
+            raise ExportNotFoundException(export_id)
+        return job
+
+    def get_export_file(self, export_id: int, current_user):
+        """Return (path, download filename, media type) of a finished export."""
+        job = self.get_export(export_id, current_user)
+        if job.status == EXPORT_EXPIRED:
+            raise ExportExpiredException()
+        if job.status != EXPORT_DONE:
+            raise ExportNotReadyException(job.status)
+        if not job.file_path or not os.path.exists(job.file_path):
+            raise ExportExpiredException()
+        writer = EXPORT_WRITERS[job.format]
+        return job.file_path, f"{job.report}-export-{job.id}.{writer.extension}", writer.media_type
@@ -1,58 +1,97 @@
 
-import asyncio
+import math
 import secrets
-from datetime import datetime, timedelta
+import time
+from functools import lru_cache
+from typing import Optional
 from fastapi_mail import FastMail, MessageSchema, ConnectionConfig
 from pydantic import EmailStr
 import logging
 from fastapi import HTTPException
 
 from app.config import settings
+from app.cache.otp_store import email_key, get_otp_store
+from app.common.constants.exceptions import OTPRateLimitException
 
-conf = ConnectionConfig(
-    MAIL_USERNAME=settings.MAIL_USERNAME,
-    MAIL_PASSWORD=settings.MAIL_PASSWORD,
-    MAIL_FROM=settings.MAIL_FROM,
-    MAIL_PORT=settings.MAIL_PORT,
-    MAIL_SERVER=settings.MAIL_SERVER,
-    MAIL_STARTTLS=settings.MAIL_STARTTLS,
-    MAIL_SSL_TLS=settings.MAIL_SSL_TLS,
-    USE_CREDENTIALS=settings.USE_CREDENTIALS,
-    VALIDATE_CERTS=settings.VALIDATE_CERTS
-)
-fast_mail = FastMail(conf)
-
-otp_storage: dict[str, dict] = {}
-
-async def send_otp(email: EmailStr) -> None:
-    otp_code = str(secrets.randbelow(10**6)).zfill(6)
-    expires_at = datetime.utcnow() + timedelta(minutes=5)
-    otp_storage[email] = {"code": otp_code, "expires": expires_at}
-    asyncio.create_task(_expire_otp(email, otp_code, delay_seconds=300))
+@lru_cache(maxsize=1)
+def get_fast_mail() -> FastMail:
+    """Build the mail client on the first OTP send rather than at import time."""
+    conf = ConnectionConfig(
+        MAIL_USERNAME=settings.MAIL_USERNAME,
+        MAIL_PASSWORD=settings.MAIL_PASSWORD,
+        MAIL_FROM=settings.MAIL_FROM,
+        MAIL_PORT=settings.MAIL_PORT,
+        MAIL_SERVER=settings.MAIL_SERVER,
+        MAIL_STARTTLS=settings.MAIL_STARTTLS,
+        MAIL_SSL_TLS=settings.MAIL_SSL_TLS,
+        USE_CREDENTIALS=settings.USE_CREDENTIALS,
+        VALIDATE_CERTS=settings.VALIDATE_CERTS
+    )
+    return FastMail(conf)
+
+async def send_otp(email: EmailStr, client_ip: Optional[str] = None) -> None:
+    """
+    Send an OTP to *email*, throttled per email and per client IP.
+
+    A code sent within OTP_REUSE_WINDOW_SECONDS is not sent again, and an
+    unexpired code is re-sent instead of a new one being generated. A new
+    code is only stored once its email went out, so a failed send leaves
+    nothing behind to suppress the retry, and the tokens it took are refunded.
+    """
+    store = get_otp_store()
+    existing = await store.get_code(email)
+    if existing and time.time() - existing["sent_at"] < settings.OTP_REUSE_WINDOW_SECONDS:
+        await store.incr_counter("duplicate")
+        logging.info("OTP for %s sent recently; suppressing duplicate send", email)
+        return
+
+    buckets = [("email:" + email_key(email), settings.OTP_EMAIL_BUCKET_CAPACITY, settings.OTP_EMAIL_REFILL_SECONDS, "email_throttled")]
+    if client_ip:
+        buckets.append(("ip:" + client_ip, settings.OTP_IP_BUCKET_CAPACITY, settings.OTP_IP_REFILL_SECONDS, "ip_throttled"))
+    taken = []
+    for key, capacity, refill_seconds, reason in buckets:
+        allowed, retry_after = await store.take_token(key, capacity, refill_seconds)
+        if not allowed:
+            await store.incr_counter(reason)
+            logging.warning("OTP send to %s throttled (%s)", email, reason)
+            raise OTPRateLimitException(math.ceil(retry_after))
+        taken.append((key, capacity, refill_seconds))
+
+    if existing:
+        otp_code = existing["code"]
+        remaining = max(1, int(existing["expires"] - time.time()))
+    else:
+        otp_code = str(secrets.randbelow(10**6)).zfill(6)
+        remaining = settings.OTP_EXPIRE_SECONDS
 
     subject = "Your One-Time Password (OTP)"
-    body = f"Your OTP code is {otp_code}. It will expire in 5 minutes."
+    body = f"Your OTP code is {otp_code}. It will expire in {math.ceil(remaining / 60)} minutes."
     message = MessageSchema(subject=subject, recipients=[email], body=body, subtype="plain")
     
     try:
-        await fast_mail.send_message(message)
+        await get_fast_mail().send_message(message)
     except Exception as exc:
         logging.error("Error sending OTP email: %s", exc, exc_info=True)
+        for key, capacity, refill_seconds in taken:
+            await store.refund_token(key, capacity, refill_seconds)
         raise HTTPException(status_code=500, detail="Failed to send OTP email")
-    
-async def _expire_otp(email: str, otp_code: str, delay_seconds: int):
-    await asyncio.sleep(delay_seconds)
-    entry = otp_storage.get(email)
-    if entry and entry["code"] == otp_code:
-        otp_storage.pop(email, None)
-
-def verify_otp(email: EmailStr, code: str) -> bool:
-    entry = otp_storage.get(email)
+    if not existing:
+        await store.set_code(email, otp_code, settings.OTP_EXPIRE_SECONDS)
+
+async def verify_otp(email: EmailStr, code: str) -> bool:
+    """Check *code* for *email*; the code is discarded after OTP_MAX_ATTEMPTS wrong guesses."""
+    store = get_otp_store()
+    entry = await store.get_code(email)
     if not entry:
         return False
-    if entry["code"] == code and datetime.utcnow() < entry["expires"]:
-        otp_storage.pop(email, None)
+    if secrets.compare_digest(entry["code"].encode(), code.encode()):
+        await store.delete_code(email)
         return True
-    if datetime.utcnow() >= entry["expires"]:
-        otp_storage.pop(email, None)
+    if await store.fail_attempt(email) >= settings.OTP_MAX_ATTEMPTS:
+        await store.delete_code(email)
+        logging.warning("OTP for %s discarded after %s failed attempts", email, settings.OTP_MAX_ATTEMPTS)
     return False
+
+async def get_otp_send_counters() -> dict[str, int]:
+    """Counts of suppressed OTP sends by reason (duplicate, email_throttled, ip_throttled)."""
+    return await get_otp_store().get_counters()
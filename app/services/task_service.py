@@ -71,25 +71,68 @@
 #             raise TaskDeletionException(task_id)
 #         logger.info(f"Task ID {task_id} deleted successfully")
 #         return True
+import base64
+import binascii
+import json
+import re
 from fastapi import HTTPException
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
-from datetime import date
+from datetime import date, datetime, timedelta
+from typing import List, Optional, Tuple
 
-from app.repository.task_repository import TaskRepository
+from app.config import settings
+from app.repository.sharded_task_repository import get_task_repository
+from app.repository.job_repository import JobRepository
+from app.repository.user_repository import UserRepository
+from app.cache.task_index import get_task_index
+from app.cache.single_flight import get_single_flight
 from app.models.task import Task
 from app.schema.task_schema import TaskCreate, TaskUpdate
 from app.common.enums.user_roles import UserRole
 from app.common.constants.log import logger
+from app.utils.http_cache import make_etag, row_etag
 from app.common.constants.exceptions import (
     TaskNotFoundException,
     TaskUnauthorizedAccessException,
+    UserNotFoundException,
     TaskDeletionException,
+    TaskRestoreConflictException,
+    InvalidSyncCursorException,
+    SyncCursorExpiredException,
 )
+from app.common.constants.task import TOMBSTONE_HORIZON_JOB
+
+_SEARCH_TERM = re.compile(r"(\w+)(\*?)")
+
+
+def build_fts_query(q: str) -> str:
+    """
+    Turn free text into an FTS5 query: every word must match, and a trailing
+    '*' makes a word a prefix match. FTS5 operators in the input are ignored.
+    """
+    return " ".join(f'"{word}"{star}' for word, star in _SEARCH_TERM.findall(q))
+
+
+def encode_sync_cursor(after: Optional[Tuple[datetime, int]], seq: int) -> str:
+    """Pack the task keyset position and the tombstone seq into an opaque token."""
+    state = {"u": after[0].isoformat(), "i": after[1], "s": seq} if after else {"s": seq}
+    return base64.urlsafe_b64encode(json.dumps(state, separators=(",", ":")).encode()).decode()
+
+
+def decode_sync_cursor(cursor: str) -> Tuple[Optional[Tuple[datetime, int]], int]:
+    try:
+        state = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        after = (datetime.fromisoformat(state["u"]), int(state["i"])) if "u" in state else None
+        return after, int(state["s"])
+    except (binascii.Error, ValueError, KeyError, TypeError):
+        raise InvalidSyncCursorException()
+
 
 class TaskService:
     def __init__(self, db: Session):
         self.db = db
-        self.task_repo = TaskRepository(db)
+        self.task_repo = get_task_repository(db)
         logger.debug("TaskService initialized.")
 
     def create_task(self, task_data: TaskCreate, current_user):
@@ -97,6 +140,10 @@ class TaskService:
         if current_user.role != UserRole.ADMIN and task_data.user_id != current_user.id:
             logger.warning(f"User {current_user.username} unauthorized to create for user_id {task_data.user_id}")
             raise TaskUnauthorizedAccessException()
+        # Only an admin can name another owner; make sure that user exists and is not deleted.
+        if task_data.user_id != current_user.id and not UserRepository(self.db).user_exists(task_data.user_id):
+            logger.warning(f"Task creation refused: user {task_data.user_id} does not exist")
+            raise UserNotFoundException()
 
         task = Task(
             title=task_data.title,
@@ -106,43 +153,203 @@ class TaskService:
             user_id=task_data.user_id,
             created_at=date.today()
         )
-        created = self.task_repo.create_task(task)
+        try:
+            created = self.task_repo.create_task(task)
+        except IntegrityError:
+            raise UserNotFoundException()
+        self._invalidate_index()
         logger.info(f"Task {created.id} created by {current_user.username}")
         return created
 
-    def get_task_by_id(self, task_id: int):
-        task = self.task_repo.get_task_by_id(task_id)
+    def _shared_read(self, operation: str, args: tuple, scope, read, version: Optional[int] = None):
+        """
+        Run *read*, sharing it with identical concurrent calls when the caller
+        gave its visibility *scope* (see app/cache/single_flight.py for the rules).
+        *version* is the collection version the caller already read, if any.
+        """
+        flights = get_single_flight()
+        if flights is None or scope is None:
+            return read()
+        if version is None:
+            version = self.task_repo.get_tasks_version()
+        return flights.do(operation, (version,) + args, scope, read)
+
+    def get_task_by_id(self, task_id: int, include_archived: bool = False, scope=None):
+        """A task as a read-only TaskRow; use the repository for one to change."""
+        task = self._shared_read(
+            "get_task_by_id", (task_id, include_archived), scope,
+            lambda: self.task_repo.get_task_row(task_id, include_archived),
+        )
         if not task:
             raise TaskNotFoundException(task_id)
         return task
 
-    def get_all_tasks(self):
-        return self.task_repo.get_all_tasks()
+    def get_tasks_by_ids(self, task_ids: List[int]):
+        """Tasks in the requested order, plus the ids that do not exist."""
+        found = {task.id: task for task in self.task_repo.get_tasks_by_ids(task_ids)}
+        return (
+            [found[task_id] for task_id in task_ids if task_id in found],
+            [task_id for task_id in task_ids if task_id not in found],
+        )
 
-    def update_task(self, task_id: int, task_data: dict, current_user):
-        task = self.task_repo.get_task_by_id(task_id)
-        if not task:
-            raise TaskNotFoundException(task_id)
+    def get_all_tasks(self, include_archived: bool = False, scope=None, version: Optional[int] = None):
+        # A tuple, as the same result may go to every concurrent caller.
+        return self._shared_read(
+            "get_all_tasks", (include_archived,), scope,
+            lambda: tuple(self.task_repo.get_all_tasks(include_archived)), version,
+        )
+
+    def get_tasks_page(self, after_id: Optional[int], limit: int, **filters):
+        """One keyset page of matching tasks in id order, and whether more follow."""
+        tasks = self.task_repo.get_tasks_page(after_id, limit + 1, **filters)
+        return tasks[:limit], len(tasks) > limit
+
+    def get_task_changes(self, since: Optional[str], limit: int):
+        """
+        One page of the delta feed after *since* (None = from the start).
+        Tombstones are read before tasks, so an id returned as changed is
+        never also listed as deleted, whatever order the client applies them.
+        """
+        horizon = int(JobRepository(self.db).get_watermark(TOMBSTONE_HORIZON_JOB) or 0)
+        if since is None:
+            # Compaction may have emptied the table; never start below the horizon.
+            after, seq = None, max(self.task_repo.get_last_tombstone_seq(), horizon)
+            tombstones = []
+        else:
+            after, seq = decode_sync_cursor(since)
+            if seq < horizon:
+                raise SyncCursorExpiredException()
+            tombstones = self.task_repo.get_tombstones(seq, limit + 1)
+
+        # Leave rows from the last moment alone: a write that is still committing
+        # may carry an earlier updated_at than one that has already committed.
+        until = datetime.utcnow() - timedelta(seconds=settings.TASK_CHANGES_SETTLE_SECONDS)
+        tasks = self.task_repo.get_changed_tasks(after, until, limit + 1)
+        has_more = len(tasks) > limit or len(tombstones) > limit
+        tasks, tombstones = tasks[:limit], tombstones[:limit]
+
+        if tasks:
+            after = (tasks[-1].updated_at, tasks[-1].id)
+        if tombstones:
+            seq = tombstones[-1].seq
+        changed = {task.id for task in tasks}
+        return {
+            "changes": tasks,
+            "deleted": [t.task_id for t in tombstones if t.task_id not in changed],
+            "cursor": encode_sync_cursor(after, seq),
+            "has_more": has_more,
+        }
 
-        # **Ownership check**
-        if current_user.role != UserRole.ADMIN and task.user_id != current_user.id:
+    def get_task_etag(self, task_id: int, include_archived: bool = False) -> Optional[str]:
+        """ETag of a task from its updated_at alone, or None if the task does not exist."""
+        row = self.task_repo.get_task_updated_at(task_id)
+        if row is None and include_archived:
+            row = self.task_repo.get_archived_task_updated_at(task_id)
+        return row_etag("task", task_id, row.updated_at) if row else None
+
+    def get_tasks_version(self) -> int:
+        return self.task_repo.get_tasks_version()
+
+    def get_tasks_etag(self, include_archived: bool = False, version: Optional[int] = None) -> str:
+        # Archiving and restoring delete from and insert into tasks, so the version covers both.
+        if version is None:
+            version = self.task_repo.get_tasks_version()
+        return make_etag("tasks+archived" if include_archived else "tasks", version)
+
+    def search_tasks(self, q: str, limit: int, offset: int):
+        match = build_fts_query(q)
+        if not match:
+            return [], False
+        # One extra row tells us whether another page exists without a COUNT.
+        tasks = self.task_repo.search_tasks(match, limit + 1, offset)
+        return tasks[:limit], len(tasks) > limit
+
+    def filter_tasks(self, limit: int, offset: int, include_archived: bool = False, **filters):
+        """
+        One page of tasks matching user_id/status/due date filters, in id order,
+        and the total. With the column index only the page's rows come from SQLite;
+        archived tasks are only in SQLite.
+        """
+        index = get_task_index()
+        if include_archived:
+            return self.task_repo.filter_tasks(limit, offset, include_archived=True, **filters)
+        if index is None:
+            return self.task_repo.filter_tasks(limit, offset, **filters)
+        page_ids, total = index.filter_ids(self.db, limit, offset, **filters)
+        found = {task.id: task for task in self.task_repo.get_tasks_by_ids(page_ids)}
+        return [found[task_id] for task_id in page_ids if task_id in found], total
+
+    def count_tasks(self, group_by: str, **filters):
+        """Matching tasks per status or per user (keyed by user ID, "" for no owner)."""
+        index = get_task_index()
+        if index is not None:
+            counts = index.count_by(self.db, group_by, **filters)
+        else:
+            counts = {
+                ("" if key is None else str(key)): count
+                for key, count in self.task_repo.count_tasks_by(group_by, **filters)
+            }
+        return {"group_by": group_by, "total": sum(counts.values()), "counts": counts}
+
+    def _invalidate_index(self):
+        index = get_task_index()
+        if index is not None:
+            index.invalidate()
+
+    def get_task_summary(self):
+        summary = {"total": 0, "by_status": {}, "by_user": {}}
+        for counter in self.task_repo.get_task_counters():
+            if counter.dimension == "total":
+                summary["total"] = counter.count
+            elif counter.dimension == "status":
+                summary["by_status"][counter.key] = counter.count
+            elif counter.dimension == "user":
+                summary["by_user"][counter.key] = counter.count
+        # The counters still include deleted users' tasks until the purge removes them.
+        for status, user_id, count in self.task_repo.count_hidden_tasks():
+            summary["total"] -= count
+            for group, key in (("by_status", status), ("by_user", str(user_id))):
+                left = summary[group].pop(key, 0) - count
+                if left > 0:
+                    summary[group][key] = left
+        summary["overdue"] = self.task_repo.count_overdue_tasks(date.today())
+        return summary
+
+    def _raise_write_refused(self, task_id: int):
+        """Nothing matched the conditional write: tell a missing task from someone else's."""
+        if self.task_repo.task_exists(task_id):
             raise TaskUnauthorizedAccessException()
+        raise TaskNotFoundException(task_id)
 
-        for key, value in task_data.items():
-            setattr(task, key, value)
-        self.db.commit()
-        self.db.refresh(task)
+    def update_task(self, task_id: int, task_data: dict, current_user):
+        """Ownership is part of the UPDATE itself; only a refused write costs a second query."""
+        task = self.task_repo.update_task(
+            task_id, task_data, current_user.role == UserRole.ADMIN, current_user.id
+        )
+        if not task:
+            self._raise_write_refused(task_id)
+        self._invalidate_index()
         return task
 
-    def delete_task(self, task_id: int, current_user):
-        task = self.task_repo.get_task_by_id(task_id)
-        if not task:
+    def restore_task(self, task_id: int, current_user):
+        """Bring an archived task back; admins may restore any, users only their own."""
+        archived = self.task_repo.get_archived_tasks_by_ids([task_id])
+        if not archived:
             raise TaskNotFoundException(task_id)
-
-        # **Ownership check**
-        if current_user.role != UserRole.ADMIN and task.user_id != current_user.id:
+        if current_user.role != UserRole.ADMIN and archived[0].user_id != current_user.id:
             raise TaskUnauthorizedAccessException()
+        try:
+            task = self.task_repo.restore_task(task_id, datetime.utcnow())
+        except IntegrityError:
+            raise TaskRestoreConflictException(task_id)
+        if not task:
+            raise TaskNotFoundException(task_id)
+        self._invalidate_index()
+        logger.info(f"Task {task_id} restored by {current_user.username}")
+        return task
 
-        self.db.delete(task)
-        self.db.commit()
+    def delete_task(self, task_id: int, current_user):
+        if not self.task_repo.delete_task(task_id, current_user.role == UserRole.ADMIN, current_user.id):
+            self._raise_write_refused(task_id)
+        self._invalidate_index()
         return True
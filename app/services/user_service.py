@@ -1,11 +1,18 @@
 from fastapi import HTTPException
 from sqlalchemy.orm import Session
-from passlib.context import CryptContext
-from app.repository.user_repository import UserRepository 
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm.attributes import set_committed_value
+from collections import defaultdict
+from app.repository.user_repository import UserRepository, UserTasksRow, duplicate_user_field
+from app.repository.sharded_task_repository import ShardedTaskRepository, get_task_repository
 from app.models.user import User
 from app.schema.user_schema import UserCreate, UserUpdate
 from app.common.enums.user_roles import UserRole
 from app.common.constants.log import logger
+from app.utils.http_cache import row_etag
+from app.utils.security import get_password_hash, verify_password
+from app.cache.token_versions import get_token_versions
+from app.cache.task_index import get_task_index
 from datetime import datetime
 from app.common.constants.exceptions import (
     UsernameAlreadyExistsException, 
@@ -13,9 +20,10 @@ from app.common.constants.exceptions import (
     UserDeletionException,
     UserUpdateException
 )
-from typing import Optional
+from typing import List, Optional
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Changing any of these invalidates the user's outstanding tokens.
+TOKEN_CLAIM_FIELDS = {"username", "role", "password"}
 
 class UserService:
     def __init__(self, db: Session):
@@ -24,28 +32,15 @@ class UserService:
         logger.debug("UserService initialized with DB session.")
 
     def hash_password(self, password: str) -> str:
-        logger.debug("Hashing password")
-        return pwd_context.hash(password)
+        return get_password_hash(password)
 
     def verify_password(self, plain_password: str, hashed_password: str) -> bool:
         logger.debug("Verifying password")
-        return pwd_context.verify(plain_password, hashed_password)
+        return verify_password(plain_password, hashed_password)
 
     def create_user(self, user_data: UserCreate):
         logger.info(f"Starting user creation process for username: {user_data.username}")
 
-        if self.user_repo.get_user_by_username(user_data.username):
-            logger.warning(f"User creation failed: Username {user_data.username} already exists")
-            raise UsernameAlreadyExistsException()
-
-        if user_data.phone_number and self.user_repo.get_user_by_phone(user_data.phone_number):
-            logger.warning(f"User creation failed: Phone number {user_data.phone_number} already in use")
-            raise HTTPException(status_code=400, detail="Phone number already in use")
-    
-        if self.user_repo.get_user_by_email(user_data.email):
-            logger.warning(f"User creation failed: Email {user_data.email} already in use")
-            raise HTTPException(status_code=400, detail="Email already in use")
-
         hashed_password = self.hash_password(user_data.password)
         role_input = user_data.role or "USER"
         try:
@@ -66,7 +61,18 @@ class UserService:
             email=user_data.email
             # is_verified=True  # Assuming new users are not verified by default
             )
-        created_user = self.user_repo.create_user(user)
+        try:
+            created_user = self.user_repo.create_user(user)
+        except IntegrityError as e:
+            field = duplicate_user_field(e)
+            logger.warning(f"User creation failed: {field} of {user_data.username} already in use")
+            if field == "username":
+                raise UsernameAlreadyExistsException()
+            if field == "phone_number":
+                raise HTTPException(status_code=400, detail="Phone number already in use")
+            if field == "email":
+                raise HTTPException(status_code=400, detail="Email already in use")
+            raise
         logger.info(f"User created successfully with ID: {created_user.id}, Role: {created_user.role}")
         return created_user
 
@@ -82,36 +88,84 @@ class UserService:
         logger.info(f"User {username} found with ID: {user.id}")
         return user
 
-    def get_user_by_id(self, user_id: int):
+    def get_user_by_id(self, user_id: int, include_tasks: bool = False):
         logger.debug(f"Fetching user with ID: {user_id}")
-        user = self.user_repo.get_user_by_id(user_id)
+        task_repo = get_task_repository(self.db)
+        sharded = isinstance(task_repo, ShardedTaskRepository)
+        user = self.user_repo.get_user_by_id(user_id, with_tasks=include_tasks and not sharded)
         if not user:
             logger.warning(f"User with ID {user_id} not found")
             raise UserNotFoundException()
+        if include_tasks and sharded:
+            set_committed_value(user, "tasks", task_repo.get_user_tasks(user_id))
         logger.info(f"User with ID {user_id} found")
         return user
 
-    def get_all_users(self):
+    def get_user_etag(self, user_id: int, include_tasks: bool = False) -> Optional[str]:
+        """
+        ETag of a user from its updated_at alone, or None if the user does not
+        exist. With tasks embedded it also carries the task collection version.
+        """
+        row = self.user_repo.get_user_updated_at(user_id)
+        if not row:
+            return None
+        if include_tasks:
+            return row_etag("user", user_id, row.updated_at, "tasks", get_task_repository(self.db).get_tasks_version())
+        return row_etag("user", user_id, row.updated_at)
+
+    def get_users_by_ids(self, user_ids: List[int], current_user):
+        """
+        Users in the requested order, the ids that do not exist, and the ids
+        the caller may not see (a regular user only sees themselves, as in GET /users/{id}).
+        """
+        found = {user.id: user for user in self.user_repo.get_users_by_ids(user_ids)}
+        items, missing, forbidden = [], [], []
+        for user_id in user_ids:
+            if user_id not in found:
+                missing.append(user_id)
+            elif current_user.role == UserRole.USER and current_user.id != user_id:
+                forbidden.append(user_id)
+            else:
+                items.append(found[user_id])
+        return items, missing, forbidden
+
+    def get_all_users(self, include_tasks: bool = False):
         logger.debug("Fetching all users")
-        users = self.user_repo.get_all_users()
+        task_repo = get_task_repository(self.db)
+        if include_tasks and isinstance(task_repo, ShardedTaskRepository):
+            # The users' tasks are spread over the shards; read them all and group by owner.
+            tasks_by_user = defaultdict(list)
+            for task in task_repo.get_all_tasks():
+                tasks_by_user[task.user_id].append(task)
+            users = [UserTasksRow(*user, tasks_by_user[user.id]) for user in self.user_repo.get_all_users()]
+        else:
+            users = self.user_repo.get_all_users(with_tasks=include_tasks)
         logger.info(f"Total users retrieved: {len(users)}")
         return users
 
-    def update_user(self, user_id: int, user_data: UserUpdate) -> Optional[User]:
+    def update_user(self, user_id: int, user_data: UserUpdate) -> User:
         logger.info(f"Updating user with ID: {user_id}")
-        user = self.user_repo.get_user_by_id(user_id)
+        values = user_data.dict(exclude_unset=True)
+        if values.get("password"):
+            values["password"] = self.hash_password(values["password"])
+        if values.keys() & TOKEN_CLAIM_FIELDS:
+            # Outstanding tokens carry the old claims; make them stale.
+            values["token_version"] = User.token_version + 1
+        try:
+            user = self.user_repo.update_user(user_id, values)
+        except IntegrityError as e:
+            field = duplicate_user_field(e)
+            if field == "username":
+                raise UsernameAlreadyExistsException()
+            if field == "phone_number":
+                raise HTTPException(status_code=400, detail="Phone number already in use")
+            if field == "email":
+                raise HTTPException(status_code=400, detail="Email already in use")
+            raise
         if not user:
             logger.warning(f"User with ID {user_id} not found for update")
-            return None
-
-        updates = user_data.dict(exclude_unset=True)
-        for key, value in updates.items():
-            setattr(user, key, value)
-
-        user.updated_at = datetime.now()
-
-        self.db.commit()
-        self.db.refresh(user)
+            raise UserUpdateException(user_id)
+        get_token_versions().note(user.id, user.token_version)
         logger.info(f"User with ID {user_id} updated successfully")
         return user
 
@@ -121,6 +175,10 @@ class UserService:
         if not self.user_repo.delete_user(user_id):
             logger.warning(f"User ID {user_id} not found for deletion")
             raise UserDeletionException(user_id)
+        get_token_versions().revoke(user_id)
+        index = get_task_index()
+        if index is not None:
+            index.invalidate()  # their tasks are hidden from now on
         logger.info(f"User ID {user_id} deleted successfully")
         return True
 
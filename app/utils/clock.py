@@ -0,0 +1,17 @@
+import time
+from datetime import date, datetime, timedelta
+
+# (epoch second of the next local midnight, today's date)
+_today_cache = (0.0, date.min)
+
+
+def today() -> date:
+    """date.today(), recomputed only once the local date has actually changed."""
+    global _today_cache
+    valid_until, value = _today_cache
+    now = time.time()
+    if now >= valid_until:
+        value = date.fromtimestamp(now)
+        midnight = datetime.combine(value + timedelta(days=1), datetime.min.time()).timestamp()
+        _today_cache = (midnight, value)
+    return value
@@ -0,0 +1,64 @@
+"""
+File writers for export jobs. Each takes the report's columns up front and
+then rows one batch at a time, so a report never has to fit in memory.
+
+Parquet needs pyarrow; without it only CSV is offered.
+"""
+import csv
+import importlib.util
+from enum import Enum
+from typing import List, Sequence, Tuple
+
+
+def _cell(value):
+    return value.value if isinstance(value, Enum) else value
+
+
+class CsvExportWriter:
+    extension = "csv"
+    media_type = "text/csv"
+
+    def __init__(self, path: str, columns: List[Tuple[str, str]]):
+        self._file = open(path, "w", newline="", encoding="utf-8")
+        self._writer = csv.writer(self._file)
+        self._writer.writerow([name for name, _ in columns])
+
+    def write_batch(self, rows: Sequence[Sequence]) -> None:
+        self._writer.writerows([_cell(value) for value in row] for row in rows)
+
+    def close(self) -> None:
+        self._file.close()
+
+
+class ParquetExportWriter:
+    """One Parquet row group per batch."""
+
+    extension = "parquet"
+    media_type = "application/vnd.apache.parquet"
+
+    def __init__(self, path: str, columns: List[Tuple[str, str]]):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        types = {"int": pa.int64(), "str": pa.string(), "date": pa.date32(), "datetime": pa.timestamp("us")}
+        self._pa = pa
+        self._names = [name for name, _ in columns]
+        self._schema = pa.schema([(name, types[kind]) for name, kind in columns])
+        self._writer = pq.ParquetWriter(path, self._schema)
+
+    def write_batch(self, rows: Sequence[Sequence]) -> None:
+        data = {name: [_cell(row[i]) for row in rows] for i, name in enumerate(self._names)}
+        self._writer.write_table(self._pa.Table.from_pydict(data, schema=self._schema))
+
+    def close(self) -> None:
+        self._writer.close()
+
+
+EXPORT_WRITERS = {"csv": CsvExportWriter, "parquet": ParquetExportWriter}
+
+
+def available_export_formats() -> List[str]:
+    formats = ["csv"]
+    if importlib.util.find_spec("pyarrow") is not None:
+        formats.append("parquet")
+    return formats
@@ -0,0 +1,58 @@
+"""
+Conditional GET helpers: strong ETags, If-None-Match and per-role Cache-Control.
+
+Authentication rides on the access_token cookie, so every cacheable response
+is `private` and varies on Cookie. Readers cannot change anything and may
+reuse a response for a short while; users and admins revalidate every time
+so they see their own writes.
+"""
+from datetime import datetime
+from typing import Optional
+
+from fastapi import Request, Response, status
+
+from app.common.enums.user_roles import UserRole
+
+READER_MAX_AGE_SECONDS = 30
+
+
+def make_etag(*parts) -> str:
+    return '"' + "-".join(str(part) for part in parts) + '"'
+
+
+def row_etag(kind: str, row_id: int, updated_at: Optional[datetime], *extra) -> str:
+    """
+    ETag for one row; updated_at is written with microseconds on every ORM
+    update. *extra* adds versions of anything embedded in the representation.
+    """
+    stamp = updated_at.strftime("%Y%m%d%H%M%S%f") if updated_at else "0"
+    return make_etag(kind, row_id, stamp, *extra)
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """If-None-Match uses the weak comparison, so W/ prefixes are ignored."""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    candidates = (tag.strip() for tag in header.split(","))
+    return etag in (tag[2:] if tag.startswith("W/") else tag for tag in candidates)
+
+
+def cache_control_for(role) -> str:
+    if role == UserRole.READER:
+        return f"private, max-age={READER_MAX_AGE_SECONDS}"
+    return "private, no-cache"
+
+
+def cache_headers(etag: str, role) -> dict:
+    return {"ETag": etag, "Cache-Control": cache_control_for(role), "Vary": "Cookie"}
+
+
+def apply_cache_headers(response: Response, etag: str, role) -> None:
+    response.headers.update(cache_headers(etag, role))
+
+
+def not_modified(etag: str, role) -> Response:
+    return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=cache_headers(etag, role))
@@ -1,20 +1,50 @@
+import time
+import uuid
 from datetime import datetime, timedelta
-from jose import jwt
+from typing import NamedTuple, Optional, Tuple
+from jose import jwt, JWTError
 from passlib.context import CryptContext
 from app.config import settings
 from app.common.constants.log import logger
+from app.common.enums.user_roles import UserRole
+
+ACCESS_TOKEN = "access"
+REFRESH_TOKEN = "refresh"
+
+
+class AuthenticatedUser(NamedTuple):
+    """The caller as described by a verified access token; no DB row behind it."""
+    id: int
+    username: str
+    role: UserRole
+    token_version: int
+
+    @classmethod
+    def from_claims(cls, payload: dict) -> "AuthenticatedUser":
+        """Build the principal from token claims; raises ValueError if any is missing or malformed."""
+        try:
+            return cls(int(payload["uid"]), str(payload["sub"]), UserRole(payload["role"]), int(payload["ver"]))
+        except (KeyError, TypeError, ValueError) as exc:
+            raise ValueError("Token is missing user claims") from exc
+
 
 class AuthUtils:
     """Utility class for authentication-related operations."""
     @staticmethod
-    def create_access_token(data: dict, expires_delta: timedelta):
+    def user_claims(user) -> dict:
+        """Claims that let requests be authorized without loading the user."""
+        return {"sub": user.username, "uid": user.id, "role": user.role.value, "ver": user.token_version}
+
+    @staticmethod
+    def create_access_token(data: dict, expires_delta: timedelta, token_type: str = ACCESS_TOKEN):
         """
         Create a JWT access token with an expiration.
         """
-        logger.info(f"Generating JWT access token for user: {data.get('sub', 'unknown')}")
+        logger.info(f"Generating JWT {token_type} token for user: {data.get('sub', 'unknown')}")
         to_encode = data.copy()
         expire = datetime.utcnow() + expires_delta
-        to_encode.update({"exp": expire})
+        # jti identifies this token so it can be revoked before it expires.
+        to_encode.update({"exp": expire, "type": token_type, "jti": uuid.uuid4().hex})
         try:
             encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
             logger.info(f"JWT token created successfully, expires at: {expire}")
@@ -23,14 +53,87 @@ class AuthUtils:
             logger.error(f"Error generating JWT token: {str(e)}")
             return None
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+    @staticmethod
+    def create_refresh_token(data: dict, expires_delta: timedelta):
+        """Create the long-lived token that /auth/refresh exchanges for a new access token."""
+        return AuthUtils.create_access_token(data, expires_delta, token_type=REFRESH_TOKEN)
+
+    @staticmethod
+    def decode_token(token: str, token_type: str = ACCESS_TOKEN) -> dict:
+        """Verify signature and expiry and check the token type; raises JWTError otherwise."""
+        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+        if payload.get("type", ACCESS_TOKEN) != token_type:
+            raise JWTError(f"Expected a {token_type} token")
+        return payload
+
+def build_password_context(scheme: str, rounds: int = 0) -> CryptContext:
+    """
+    CryptContext that hashes with *scheme* at *rounds* (0 = the library
+    default). bcrypt stays accepted for existing hashes; a hash made with any
+    other scheme or cost is reported by needs_update() so it can be replaced
+    at the next login.
+    """
+    context = CryptContext(schemes=[scheme])
+    handler = context.handler(scheme)
+    schemes = [scheme] + (["bcrypt"] if scheme != "bcrypt" else [])
+    settings_kwargs = {}
+    if "rounds" in getattr(handler, "setting_kwds", ()):
+        rounds = rounds or handler.default_rounds
+        settings_kwargs = {
+            f"{scheme}__default_rounds": rounds,
+            f"{scheme}__min_rounds": rounds,
+            f"{scheme}__max_rounds": rounds,
+        }
+    return CryptContext(schemes=schemes, default=scheme, deprecated="auto", **settings_kwargs)
+
+pwd_context = build_password_context(settings.PASSWORD_HASH_SCHEME, settings.PASSWORD_HASH_ROUNDS)
 
 def get_password_hash(password: str) -> str:
     """
-    Hash the provided password using bcrypt.
+    Hash the provided password with the configured scheme and cost.
     """
     logger.debug("Hashing password")
     return pwd_context.hash(password)
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
+
+def verify_and_update_password(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """
+    Verify a password and, when its hash uses stale parameters, also return a
+    fresh hash to store: (verified, new_hash or None).
+    """
+    return pwd_context.verify_and_update(plain_password, hashed_password)
+
+def calibrate_password_rounds(scheme: str, target_ms: float, samples: int = 3) -> Tuple[int, float]:
+    """
+    Find the highest cost for *scheme* whose hash takes at most *target_ms*
+    on this machine. Returns (rounds, measured milliseconds).
+    """
+    handler = CryptContext(schemes=[scheme]).handler(scheme)
+    if "rounds" not in getattr(handler, "setting_kwds", ()):
+        raise ValueError(f"Password scheme {scheme!r} has no rounds setting to calibrate")
+    log2_cost = handler.rounds_cost == "log2"
+
+    def measure(rounds: int) -> float:
+        timings = []
+        for _ in range(samples):
+            started = time.perf_counter()
+            handler.using(rounds=rounds).hash("calibration-password")
+            timings.append((time.perf_counter() - started) * 1000)
+        return min(timings)
+
+    rounds = handler.min_rounds if log2_cost else max(handler.min_rounds, 1000)
+    best = (rounds, measure(rounds))
+    while rounds < handler.max_rounds:
+        candidate = rounds + 1 if log2_cost else min(rounds * 2, handler.max_rounds)
+        elapsed = measure(candidate)
+        if elapsed > target_ms:
+            break
+        rounds, best = candidate, (candidate, elapsed)
+    if not log2_cost and best[1] > 0:
+        # Linear cost: scale the last fitting measurement up to the target.
+        scaled = int(best[0] * target_ms / best[1])
+        rounds = max(best[0], min(scaled, handler.max_rounds))
+        best = (rounds, measure(rounds))
+    return best
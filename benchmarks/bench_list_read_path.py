@@ -0,0 +1,108 @@
+"""
+List read benchmark: ORM instances versus Core rows for GET /tasks and GET /users.
+
+    python -m benchmarks.bench_list_read_path --rows 100000
+
+Builds a throwaway SQLite database with the app schema and --rows tasks and
+users, then for each path reads the whole table in a fresh session and
+serializes it with the response model, as the route does. Times are medians
+of --repeat runs; memory is the tracemalloc peak of one separate run.
+"""
+import argparse
+import os
+import statistics
+import tempfile
+import time
+import tracemalloc
+from typing import List
+
+from pydantic import TypeAdapter
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+
+from app.database.database import Base
+from app.models import Task, User
+from app.repository.task_repository import TaskRepository
+from app.repository.user_repository import UserRepository
+from app.schema.task_schema import TaskRead
+from app.schema.user_schema import UserRead
+
+TASKS = TypeAdapter(List[TaskRead])
+USERS = TypeAdapter(List[UserRead])
+
+
+def populate(engine, rows: int, batch: int = 50_000):
+    with engine.begin() as conn:
+        for start in range(0, rows, batch):
+            ids = range(start + 1, min(start + batch, rows) + 1)
+            conn.execute(
+                text("INSERT INTO users (id, name, username, password, role, email, is_verified, "
+                     "token_version, created_at, updated_at) VALUES (:id, :name, :username, 'x', 'user', "
+                     ":email, 1, 0, CURRENT_TIMESTAMP, CURRENT_TIMESTAMP)"),
+                [{"id": i, "name": f"User {i}", "username": f"user{i}", "email": f"user{i}@gmail.com"} for i in ids],
+            )
+            conn.execute(
+                text("INSERT INTO tasks (title, description, status, due_date, user_id, created_at, updated_at) "
+                     "VALUES (:title, 'benchmark task', 'Pending', '2030-01-01', :user_id, "
+                     "CURRENT_TIMESTAMP, CURRENT_TIMESTAMP)"),
+                [{"title": f"Task {i}", "user_id": i} for i in ids],
+            )
+
+
+def orm_tasks(db):
+    return db.query(Task).all()
+
+
+def row_tasks(db):
+    return TaskRepository(db).get_all_tasks()
+
+
+def orm_users(db):
+    return db.query(User).filter(User.deleted_at.is_(None)).all()
+
+
+def row_users(db):
+    return UserRepository(db).get_all_users()
+
+
+def measure(Session, read, adapter, repeat: int):
+    """Median read and serialize times in ms, and the peak traced memory in MB."""
+    read_ms, serialize_ms = [], []
+    for _ in range(repeat):
+        with Session() as db:
+            started = time.perf_counter()
+            items = read(db)
+            read_ms.append((time.perf_counter() - started) * 1000)
+            started = time.perf_counter()
+            adapter.dump_json(adapter.validate_python(items, from_attributes=True))
+            serialize_ms.append((time.perf_counter() - started) * 1000)
+    with Session() as db:
+        tracemalloc.start()
+        adapter.dump_json(adapter.validate_python(read(db), from_attributes=True))
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    return statistics.median(read_ms), statistics.median(serialize_ms), peak / 1e6
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+        Base.metadata.create_all(engine)
+        populate(engine, args.rows)
+        Session = sessionmaker(bind=engine)
+        print(f"rows={args.rows:,} (per 100k rows: scale by {100_000 / args.rows:g})")
+        cases = [("tasks orm", orm_tasks, TASKS), ("tasks row", row_tasks, TASKS),
+                 ("users orm", orm_users, USERS), ("users row", row_users, USERS)]
+        for label, read, adapter in cases:
+            read_ms, serialize_ms, peak_mb = measure(Session, read, adapter, args.repeat)
+            print(f"{label}  read={read_ms:8.1f}ms  serialize={serialize_ms:8.1f}ms  peak={peak_mb:7.1f}MB")
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
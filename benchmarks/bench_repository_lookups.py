@@ -0,0 +1,103 @@
+"""
+Point lookup benchmark: legacy Query API versus the repositories' prebuilt select() statements.
+
+    python -m benchmarks.bench_repository_lookups --calls 5000
+
+Builds a throwaway SQLite database with the app schema and a few thousand
+users and tasks, then times the five lookups the API makes on nearly every
+request (sign-in, user and task reads, and their ETags). "query" rebuilds
+the statement with db.query(...).filter(...).first() as the repositories
+used to; "select" calls the repository method. Times are the median
+per-call cost over --repeat runs of --calls lookups each, in one session so
+the identity map is warm as in a request.
+"""
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+
+from app.database.database import Base
+from app.models import Task, User
+from app.repository.task_repository import TaskRepository
+from app.repository.user_repository import UserRepository
+
+ROWS = 5_000
+
+
+def populate(engine):
+    with engine.begin() as conn:
+        conn.execute(
+            text("INSERT INTO users (id, name, username, password, role, email, is_verified, "
+                 "token_version, created_at, updated_at) VALUES (:id, :name, :username, 'x', 'USER', "
+                 ":email, 1, 0, CURRENT_TIMESTAMP, CURRENT_TIMESTAMP)"),
+            [{"id": i, "name": f"User {i}", "username": f"user{i}", "email": f"user{i}@gmail.com"}
+             for i in range(1, ROWS + 1)],
+        )
+        conn.execute(
+            text("INSERT INTO tasks (id, title, status, user_id, created_at, updated_at) "
+                 "VALUES (:id, :title, 'Pending', :id, CURRENT_TIMESTAMP, CURRENT_TIMESTAMP)"),
+            [{"id": i, "title": f"Task {i}"} for i in range(1, ROWS + 1)],
+        )
+
+
+# The repository code before statements were prebuilt.
+QUERY_LOOKUPS = {
+    "user by username": lambda db, i: db.query(User).filter(
+        User.username == f"user{i}", User.deleted_at.is_(None)).first(),
+    "user by id": lambda db, i: db.query(User).filter(User.id == i, User.deleted_at.is_(None)).first(),
+    "user updated_at": lambda db, i: db.query(User.updated_at).filter(
+        User.id == i, User.deleted_at.is_(None)).first(),
+    "task by id": lambda db, i: db.query(Task).filter(Task.id == i).first(),
+    "task updated_at": lambda db, i: db.query(Task.updated_at).filter(Task.id == i).first(),
+}
+
+SELECT_LOOKUPS = {
+    "user by username": lambda db, i: UserRepository(db).get_user_by_username(f"user{i}"),
+    "user by id": lambda db, i: UserRepository(db).get_user_by_id(i),
+    "user updated_at": lambda db, i: UserRepository(db).get_user_updated_at(i),
+    "task by id": lambda db, i: TaskRepository(db).get_task_by_id(i),
+    "task updated_at": lambda db, i: TaskRepository(db).get_task_updated_at(i),
+}
+
+
+def measure(Session, lookup, ids, repeat: int) -> float:
+    """Median microseconds per call."""
+    runs = []
+    with Session() as db:
+        for i in ids[:100]:
+            lookup(db, i)
+        for _ in range(repeat):
+            started = time.perf_counter()
+            for i in ids:
+                lookup(db, i)
+            runs.append((time.perf_counter() - started) / len(ids) * 1e6)
+    return statistics.median(runs)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--calls", type=int, default=5_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    random.seed(0)
+    ids = [random.randint(1, ROWS) for _ in range(args.calls)]
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+        Base.metadata.create_all(engine)
+        populate(engine)
+        Session = sessionmaker(bind=engine)
+        for name in QUERY_LOOKUPS:
+            before = measure(Session, QUERY_LOOKUPS[name], ids, args.repeat)
+            after = measure(Session, SELECT_LOOKUPS[name], ids, args.repeat)
+            print(f"{name:<17} query={before:7.1f}us  select={after:7.1f}us  ({before / after:4.2f}x)")
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
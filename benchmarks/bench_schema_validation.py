@@ -0,0 +1,83 @@
+"""
+Request validation throughput for bulk user and task payloads.
+
+    python -m benchmarks.bench_schema_validation --items 20000
+
+Validates --items synthetic UserCreate, UserUpdate and TaskCreate payloads
+(the shape a bulk import would send) through a TypeAdapter of a list, and
+reports microseconds per item and items per second.
+"""
+import argparse
+import random
+import statistics
+import time
+from datetime import date, timedelta
+from typing import List
+
+from pydantic import TypeAdapter
+
+from app.schema.task_schema import TaskCreate
+from app.schema.user_schema import UserCreate, UserUpdate
+
+
+def user_payloads(count: int, rng: random.Random):
+    return [
+        {
+            "name": f"Bench User {i}",
+            "username": f"bench_user_{i}",
+            "password": f"Passw0rd!{rng.randint(0, 10**6)}",
+            "role": rng.choice(["user", "reader", "admin"]),
+            "email": f"bench_user_{i}@gmail.com",
+            "phone_number": f"+919{rng.randint(10**8, 10**9 - 1)}",
+            "address": "Greater Noida, India",
+        }
+        for i in range(count)
+    ]
+
+def update_payloads(count: int, rng: random.Random):
+    return [
+        {"name": f"Renamed {i}", "password": f"N3w!pass{i}", "phone_number": f"+918{rng.randint(10**8, 10**9 - 1)}"}
+        for i in range(count)
+    ]
+
+def task_payloads(count: int, rng: random.Random):
+    return [
+        {
+            "title": f"Task {i}",
+            "description": "Imported in bulk",
+            "due_date": (date.today() + timedelta(days=rng.randint(1, 365))).isoformat(),
+            "status": "Pending",
+            "user_id": rng.randint(1, 1000),
+        }
+        for i in range(count)
+    ]
+
+def time_validation(adapter: TypeAdapter, payloads, repeats: int):
+    timings = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        adapter.validate_python(payloads)
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--items", type=int, default=20_000)
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args(argv)
+
+    rng = random.Random(args.seed)
+    cases = [
+        ("UserCreate", TypeAdapter(List[UserCreate]), user_payloads(args.items, rng)),
+        ("UserUpdate", TypeAdapter(List[UserUpdate]), update_payloads(args.items, rng)),
+        ("TaskCreate", TypeAdapter(List[TaskCreate]), task_payloads(args.items, rng)),
+    ]
+    for label, adapter, payloads in cases:
+        seconds = time_validation(adapter, payloads, args.repeats)
+        per_item_us = seconds / len(payloads) * 1e6
+        print(f"{label:<10}  {per_item_us:7.2f}us/item  {len(payloads) / seconds:10,.0f} items/s  n={len(payloads):,}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,18 +1,37 @@
 import os
+import tempfile
+import uuid
+
 import pytest
+
+TEST_DATABASE_URL = "sqlite:///./test_db.sqlite3"
+
+# Tests sign in many times from the same client address.
+os.environ.setdefault("RATE_LIMIT_ENABLED", "false")
+os.environ.setdefault("DATABASE_URL", TEST_DATABASE_URL)
+# Tests run the background jobs directly instead of on a timer.
+os.environ.setdefault("OVERDUE_SCAN_ENABLED", "false")
+os.environ.setdefault("TOMBSTONE_COMPACTION_ENABLED", "false")
+os.environ.setdefault("USER_PURGE_ENABLED", "false")
+os.environ.setdefault("TASK_ARCHIVE_ENABLED", "false")
+os.environ.setdefault("EXPORT_CLEANUP_ENABLED", "false")
+os.environ.setdefault("EXPORT_DIR", tempfile.mkdtemp(prefix="exports-"))
+# The cheapest bcrypt cost keeps sign-ins fast.
+os.environ.setdefault("PASSWORD_HASH_ROUNDS", "4")
+
 from fastapi.testclient import TestClient
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
 from sqlalchemy.orm import sessionmaker
 
 from app.main import app
 from app.dependencies import get_db
-from app.database.database import Base
-from app.models import User
+from app.database.database import Base, enable_sqlite_foreign_keys
+from app.models import Task, User
 from app.utils.security import get_password_hash
 
-TEST_DATABASE_URL = "sqlite:///./test_db.sqlite3"
-
 engine = create_engine(TEST_DATABASE_URL, connect_args={"check_same_thread": False})
+# Enforce foreign keys as the app engine does.
+event.listen(engine, "connect", enable_sqlite_foreign_keys)
 TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 Base.metadata.create_all(bind=engine)
@@ -44,7 +63,8 @@ def seed_roles():
                 name="Admin",
                 username="admin_test",
                 password=get_password_hash("Test@1234"),
-                role="admin"
+                role="admin",
+                email="admin_test@gmail.com"
             )
             db.add(admin)
             db.commit()
@@ -56,7 +76,8 @@ def seed_roles():
                 name="User",
                 username="test_user",
                 password=get_password_hash("Test@1234"),
-                role="user"
+                role="user",
+                email="test_user@gmail.com"
             )
             db.add(user)
             db.commit()
@@ -68,7 +89,8 @@ def seed_roles():
                 name="Reader",
                 username="test_reader",
                 password=get_password_hash("Test@1234"),
-                role="reader"
+                role="reader",
+                email="test_reader@gmail.com"
             )
             db.add(reader)
             db.commit()
@@ -79,4 +101,47 @@ def seed_roles():
 def client():
     """Provide a TestClient for making HTTP requests in tests."""
     with TestClient(app) as c:
-        yield c
\ No newline at end of file
+        yield c
+@pytest.fixture
+def db_session():
+    """A session on the test database for seeding and inspecting rows directly."""
+    db = TestingSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+@pytest.fixture
+def signin(client):
+    """Sign in through the cookie flow; the client keeps the access_token cookie."""
+    def signin(username, password="Test@1234"):
+        client.cookies.clear()
+        resp = client.post("/auth/signin", data={"username": username, "password": password})
+        assert resp.status_code == 200, resp.text
+        return resp
+    return signin
+
+@pytest.fixture
+def add_user(db_session):
+    """Create a user with a unique username and the password Test@1234; keywords override columns."""
+    def add_user(**columns):
+        username = "user" + uuid.uuid4().hex[:8]
+        values = {"name": "Test User", "username": username, "password": get_password_hash("Test@1234"),
+                  "role": "user", "email": f"{username}@gmail.com"}
+        user = User(**{**values, **columns})
+        db_session.add(user)
+        db_session.commit()
+        return user
+    return add_user
+
+@pytest.fixture
+def add_task(db_session, add_user):
+    """Create a Pending task owned by a user made for this test; keywords override columns."""
+    owner_id = add_user().id
+    def add_task(**columns):
+        values = {"title": "task " + uuid.uuid4().hex[:8], "status": "Pending", "user_id": owner_id}
+        task = Task(**{**values, **columns})
+        db_session.add(task)
+        db_session.commit()
+        return task
+    return add_task
@@ -0,0 +1,32 @@
+from app.config import settings
+
+
+def test_task_batch_keeps_order_and_reports_missing(client, signin, add_task):
+    a, b, c = (add_task(title=f"batch {i}").id for i in range(3))
+
+    signin("test_reader")
+    resp = client.get("/tasks/batch", params={"ids": f"{c},999999,{a},{b},{a}"})
+    assert resp.status_code == 200, resp.text
+    assert [task["id"] for task in resp.json()["items"]] == [c, a, b]
+    assert resp.json()["missing"] == [999999]
+
+def test_user_batch_applies_visibility(client, signin, add_user):
+    other, me = add_user(), add_user()
+    signin(me.username)
+    resp = client.get("/users/batch", params={"ids": f"{other.id},{me.id},999999"})
+    assert resp.status_code == 200, resp.text
+    body = resp.json()
+    assert [user["id"] for user in body["items"]] == [me.id]
+    assert body["forbidden"] == [other.id]
+    assert body["missing"] == [999999]
+
+    signin("test_reader")
+    resp = client.get("/users/batch", params={"ids": f"{me.id},{other.id}"})
+    assert [user["id"] for user in resp.json()["items"]] == [me.id, other.id]
+
+def test_batch_limits(client, monkeypatch, signin):
+    monkeypatch.setattr(settings, "BATCH_FETCH_MAX_IDS", 2)
+    signin("admin_test")
+    assert client.get("/tasks/batch", params={"ids": "1,2,3"}).status_code == 400
+    assert client.get("/users/batch", params={"ids": "1,x"}).status_code == 422
+    client.cookies.clear()
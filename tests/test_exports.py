@@ -0,0 +1,105 @@
+import csv
+import importlib.util
+import io
+import json
+import os
+import time
+from datetime import datetime, timedelta
+
+from app.config import settings
+from app.jobs.exports import build_export, cleanup_exports
+from app.models import ExportJob, Task
+
+
+def wait_for_export(client, export_id, timeout=10):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        job = client.get(f"/exports/{export_id}").json()
+        if job["status"] not in ("queued", "running"):
+            return job
+        time.sleep(0.05)
+    raise AssertionError(f"Export {export_id} did not finish")
+
+def add_overdue_tasks(db_session, user_id, count):
+    db_session.add_all([
+        Task(title=f"late {i}", status="Pending", user_id=user_id, overdue_at=datetime.utcnow())
+        for i in range(count)
+    ])
+    db_session.commit()
+
+def test_overdue_report_built_in_background_and_downloaded(client, db_session, monkeypatch, signin, add_user):
+    """The report is paged in batches, progress reaches 1.0 and the CSV streams from disk."""
+    monkeypatch.setattr(settings, "EXPORT_BATCH_SIZE", 3)
+    owner = add_user()
+    add_overdue_tasks(db_session, owner.id, 7)
+    signin("admin_test")
+
+    resp = client.post("/exports/", json={"report": "tasks", "user_id": owner.id, "overdue_only": True})
+    assert resp.status_code == 202
+    assert resp.json()["status"] == "queued"
+    job = wait_for_export(client, resp.json()["id"])
+    assert job["status"] == "done"
+    assert job["rows_total"] == job["rows_written"] == 7
+    assert job["progress"] == 1.0
+
+    download = client.get(f"/exports/{job['id']}/download")
+    assert download.status_code == 200
+    assert download.headers["content-type"].startswith("text/csv")
+    rows = list(csv.DictReader(io.StringIO(download.text)))
+    assert [row["title"] for row in rows] == [f"late {i}" for i in range(7)]
+    assert {row["owner_username"] for row in rows} == {owner.username}
+
+def test_users_report(client, db_session, signin):
+    signin("admin_test")
+    job_id = client.post("/exports/", json={"report": "users"}).json()["id"]
+    assert wait_for_export(client, job_id)["status"] == "done"
+    rows = list(csv.DictReader(io.StringIO(client.get(f"/exports/{job_id}/download").text)))
+    assert {"admin_test", "test_user", "test_reader"} <= {row["username"] for row in rows}
+    assert {row["role"] for row in rows} <= {"ADMIN", "USER", "READER"}
+
+def test_only_admins_and_only_their_own_exports(client, db_session, signin):
+    signin("test_user")
+    assert client.post("/exports/", json={"report": "users"}).status_code == 403
+
+    job = ExportJob(requested_by=999999, report="users", format="csv", filters="{}", status="queued", rows_written=0)
+    db_session.add(job)
+    db_session.commit()
+    signin("admin_test")
+    assert client.get(f"/exports/{job.id}").status_code == 404
+
+def test_concurrent_export_limit(client, monkeypatch, signin):
+    monkeypatch.setattr(settings, "EXPORT_MAX_ACTIVE_PER_USER", 0)
+    signin("admin_test")
+    resp = client.post("/exports/", json={"report": "users"})
+    assert resp.status_code == 429
+
+def test_parquet_needs_pyarrow(client, signin):
+    signin("admin_test")
+    resp = client.post("/exports/", json={"report": "users", "format": "parquet"})
+    if importlib.util.find_spec("pyarrow") is None:
+        assert resp.status_code == 400
+    else:
+        assert resp.status_code == 202
+
+def test_build_claims_a_job_once(db_session):
+    job = ExportJob(requested_by=1, report="users", format="csv", filters=json.dumps({}), status="queued", rows_written=0)
+    db_session.add(job)
+    db_session.commit()
+    assert build_export(db_session, job.id)
+    assert not build_export(db_session, job.id)
+    db_session.refresh(job)
+    assert job.status == "done" and os.path.exists(job.file_path)
+
+def test_cleanup_removes_expired_files(client, db_session):
+    job = ExportJob(requested_by=1, report="users", format="csv", filters="{}", status="queued", rows_written=0)
+    db_session.add(job)
+    db_session.commit()
+    build_export(db_session, job.id)
+    db_session.refresh(job)
+    path = job.file_path
+
+    cleanup_exports(db_session, now=datetime.utcnow() + timedelta(hours=settings.EXPORT_TTL_HOURS + 1))
+    db_session.refresh(job)
+    assert job.status == "expired"
+    assert not os.path.exists(path)
+    client.cookies.clear()
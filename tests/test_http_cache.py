@@ -0,0 +1,57 @@
+from datetime import date, timedelta
+
+
+def create_task(client, user_id, title="cached"):
+    resp = client.post("/tasks/", json={"title": title, "user_id": user_id})
+    assert resp.status_code == 200, resp.text
+    return resp.json()["id"]
+
+def test_task_etag_and_304(client, signin, add_user):
+    signin("admin_test")
+    task_id = create_task(client, add_user().id)
+
+    first = client.get(f"/tasks/{task_id}")
+    etag = first.headers["ETag"]
+    assert first.headers["Cache-Control"] == "private, no-cache"
+    assert first.headers["Vary"] == "Cookie"
+
+    cached = client.get(f"/tasks/{task_id}", headers={"If-None-Match": etag})
+    assert cached.status_code == 304
+    assert cached.content == b""
+    assert cached.headers["ETag"] == etag
+
+    update = {
+        "title": "cached v2",
+        "description": None,
+        "due_date": (date.today() + timedelta(days=3)).isoformat(),
+        "status": "Pending",
+    }
+    assert client.put(f"/tasks/{task_id}", json=update).status_code == 200
+    changed = client.get(f"/tasks/{task_id}", headers={"If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.headers["ETag"] != etag
+    assert changed.json()["title"] == "cached v2"
+
+def test_task_list_etag_follows_collection_version(client, signin, add_user):
+    signin("admin_test")
+    etag = client.get("/tasks/").headers["ETag"]
+    assert client.get("/tasks/", headers={"If-None-Match": etag}).status_code == 304
+
+    create_task(client, add_user().id, "new in list")
+    resp = client.get("/tasks/", headers={"If-None-Match": etag})
+    assert resp.status_code == 200
+    assert resp.headers["ETag"] != etag
+
+def test_readers_may_reuse_responses_briefly(client, signin):
+    signin("test_reader")
+    resp = client.get("/tasks/")
+    assert resp.headers["Cache-Control"] == "private, max-age=30"
+
+def test_user_etag_checks_access_first(client, signin, add_user):
+    other, me = add_user(), add_user()
+    signin(me.username)
+    own = client.get(f"/users/{me.id}")
+    assert own.status_code == 200
+    assert client.get(f"/users/{me.id}", headers={"If-None-Match": own.headers["ETag"]}).status_code == 304
+    assert client.get(f"/users/{other.id}", headers={"If-None-Match": "*"}).status_code == 403
+    client.cookies.clear()
@@ -0,0 +1,40 @@
+from app.models import Task
+from app.repository.task_repository import TaskRepository, TaskRow
+from app.repository.user_repository import UserRepository, UserTasksRow
+from app.schema.task_schema import TaskRead
+from app.schema.user_schema import UserRead, UserWithTasks
+
+
+def test_list_reads_build_no_orm_objects(db_session, add_user, add_task):
+    """Rows come straight from Core selects as NamedTuples; nothing lands in the identity map."""
+    owner = add_user()
+    add_task(title="row read", user_id=owner.id)
+    owner_id, owner_username = owner.id, owner.username
+    db_session.expunge_all()
+
+    tasks = TaskRepository(db_session).get_all_tasks()
+    users = UserRepository(db_session).get_all_users(with_tasks=True)
+    assert len(db_session.identity_map) == 0
+    assert isinstance(tasks[0], TaskRow) and isinstance(users[0], UserTasksRow)
+    assert "row read" in [task.title for task in tasks]
+    assert TaskRead.model_validate(tasks[0], from_attributes=True).id == tasks[0].id
+    row = next(user for user in users if user.id == owner_id)
+    assert "row read" in [task.title for task in row.tasks]
+    assert UserWithTasks.model_validate(row, from_attributes=True).username == owner_username
+
+def test_task_list_matches_orm_serialization(client, db_session, signin):
+    """The row path serializes exactly like the ORM objects it replaced."""
+    signin("test_reader")
+    resp = client.get("/tasks/")
+    assert resp.status_code == 200, resp.text
+    expected = {
+        task.id: TaskRead.model_validate(task).model_dump(mode="json")
+        for task in db_session.query(Task).all()
+    }
+    assert {task["id"]: task for task in resp.json()} == expected
+
+    signin("admin_test")
+    users = client.get("/users/").json()
+    assert {"admin_test", "test_user", "test_reader"} <= {user["username"] for user in users}
+    assert all(set(user) == set(UserRead.model_fields) for user in users)
+    client.cookies.clear()
@@ -0,0 +1,121 @@
+import asyncio
+import uuid
+
+import pytest
+from fastapi import HTTPException
+
+from app.cache import otp_store
+from app.cache.otp_store import InMemoryOTPStore, get_otp_store
+from app.config import settings
+from app.services import otp_services
+
+
+@pytest.fixture
+def sent_mail(monkeypatch):
+    """Capture outgoing OTP emails instead of talking to SMTP."""
+    sent = []
+
+    class FakeMail:
+        async def send_message(self, message):
+            sent.append(message)
+
+    monkeypatch.setattr(otp_services, "get_fast_mail", FakeMail)
+    return sent
+
+def signup(client, username):
+    payload = {
+        "name": "Otp User",
+        "username": username,
+        "password": "Pass1234!",
+        "role": "user",
+        "email": f"{username}@gmail.com",
+    }
+    return client.post("/auth/signup", json=payload)
+
+def test_resend_within_window_reuses_code(client, sent_mail):
+    """A resend right after signup is suppressed as a duplicate."""
+    username = "otp" + uuid.uuid4().hex[:6]
+    assert signup(client, username).status_code == 201
+    duplicates = asyncio.run(otp_services.get_otp_send_counters()).get("duplicate", 0)
+
+    resp = client.post("/auth/resend-signup-otp", json={"username": username})
+    assert resp.status_code == 200
+    assert len(sent_mail) == 1
+    assert asyncio.run(otp_services.get_otp_send_counters())["duplicate"] == duplicates + 1
+
+def test_resend_reuses_unexpired_code(client, sent_mail, monkeypatch):
+    """Outside the dedup window the same unexpired code is sent again."""
+    monkeypatch.setattr(settings, "OTP_REUSE_WINDOW_SECONDS", 0)
+    username = "otp" + uuid.uuid4().hex[:6]
+    assert signup(client, username).status_code == 201
+    resp = client.post("/auth/resend-signup-otp", json={"username": username})
+    assert resp.status_code == 200
+    assert len(sent_mail) == 2
+    assert sent_mail[0].body == sent_mail[1].body
+
+def test_resend_throttled_per_email(client, sent_mail, monkeypatch):
+    """Once the email bucket is empty, resends get 429 with Retry-After."""
+    monkeypatch.setattr(settings, "OTP_REUSE_WINDOW_SECONDS", 0)
+    username = "otp" + uuid.uuid4().hex[:6]
+    assert signup(client, username).status_code == 201
+    statuses = [
+        client.post("/auth/resend-signup-otp", json={"username": username}).status_code
+        for _ in range(settings.OTP_EMAIL_BUCKET_CAPACITY)
+    ]
+    assert statuses[-1] == 429
+    assert len(sent_mail) == settings.OTP_EMAIL_BUCKET_CAPACITY
+
+def test_failed_send_does_not_suppress_retry(sent_mail, monkeypatch):
+    """A code is only stored once its email went out; the retry sends a fresh one."""
+    email = f"otp{uuid.uuid4().hex[:6]}@gmail.com"
+
+    class DownMail:
+        async def send_message(self, message):
+            raise ConnectionError("SMTP unavailable")
+
+    working_mail = otp_services.get_fast_mail
+    monkeypatch.setattr(otp_services, "get_fast_mail", DownMail)
+    with pytest.raises(HTTPException):
+        asyncio.run(otp_services.send_otp(email))
+    assert asyncio.run(get_otp_store().get_code(email)) is None
+
+    monkeypatch.setattr(otp_services, "get_fast_mail", working_mail)
+    asyncio.run(otp_services.send_otp(email))
+    assert len(sent_mail) == 1 and asyncio.run(get_otp_store().get_code(email)) is not None
+
+def test_memory_store_folds_case_and_prunes(monkeypatch):
+    store = InMemoryOTPStore()
+    now = 1_000_000.0
+    monkeypatch.setattr(otp_store.time, "time", lambda: now)
+    asyncio.run(store.set_code("Foo@Example.com", "123456", 60))
+    assert asyncio.run(store.get_code("foo@example.com"))["code"] == "123456"
+    asyncio.run(store.take_token("email:a", 2, 10))
+
+    now += store.PRUNE_INTERVAL_SECONDS + 60
+    asyncio.run(store.take_token("email:b", 2, 10))
+    assert list(store._codes) == [] and list(store._buckets) == ["email:b"]
+
+def test_code_is_discarded_after_too_many_wrong_guesses(sent_mail, monkeypatch):
+    monkeypatch.setattr(settings, "OTP_MAX_ATTEMPTS", 3)
+    email = f"otp{uuid.uuid4().hex[:6]}@gmail.com"
+    asyncio.run(otp_services.send_otp(email))
+    code = asyncio.run(get_otp_store().get_code(email))["code"]
+    wrong = str((int(code) + 1) % 10**6).zfill(6)
+
+    assert [asyncio.run(otp_services.verify_otp(email, wrong)) for _ in range(3)] == [False] * 3
+    assert asyncio.run(get_otp_store().get_code(email)) is None
+    assert asyncio.run(otp_services.verify_otp(email, code)) is False
+
+def test_failed_send_refunds_its_token(monkeypatch):
+    """Sends that never went out do not use up the email bucket."""
+    email = f"otp{uuid.uuid4().hex[:6]}@gmail.com"
+
+    class DownMail:
+        async def send_message(self, message):
+            raise ConnectionError("SMTP unavailable")
+
+    monkeypatch.setattr(otp_services, "get_fast_mail", DownMail)
+    for _ in range(settings.OTP_EMAIL_BUCKET_CAPACITY + 1):
+        with pytest.raises(HTTPException) as failed:
+            asyncio.run(otp_services.send_otp(email, "203.0.113.9"))
+        assert failed.value.status_code == 500
@@ -0,0 +1,75 @@
+from datetime import date, timedelta
+from types import SimpleNamespace
+
+import pytest
+
+from sqlalchemy import text
+
+from app.common.constants.task import TASK_OVERDUE_EVENT
+from app.common.enums.user_roles import UserRole
+from app.jobs.overdue_scanner import scan_overdue_tasks
+from app.models import Task
+from app.services import events
+from app.services.task_service import TaskService
+
+TODAY = date.today()
+ADMIN = SimpleNamespace(id=1, role=UserRole.ADMIN, username="admin_test")
+
+
+@pytest.fixture
+def published():
+    """Collect the ids announced on the overdue event."""
+    received = []
+
+    def handler(payload):
+        received.extend(payload["task_ids"])
+
+    events.subscribe(TASK_OVERDUE_EVENT, handler)
+    yield received
+    events.unsubscribe(TASK_OVERDUE_EVENT, handler)
+
+def test_flags_newly_overdue_tasks_once(db_session, published, add_task):
+    late = add_task(due_date=TODAY - timedelta(days=1)).id
+    finished = add_task(due_date=TODAY - timedelta(days=1), status="Done").id
+    upcoming = add_task(due_date=TODAY + timedelta(days=1)).id
+
+    flagged = scan_overdue_tasks(db_session, today=TODAY)
+    assert late in flagged and finished not in flagged and upcoming not in flagged
+    assert published == flagged
+    db_session.expire_all()
+    assert db_session.get(Task, late).overdue_at is not None
+
+    assert scan_overdue_tasks(db_session, today=TODAY) == []
+    later = scan_overdue_tasks(db_session, today=TODAY + timedelta(days=2))
+    assert upcoming in later and late not in later
+
+def test_late_entries_are_flagged_on_the_next_run(db_session, add_task):
+    """A task created after a run with a due date already past is still flagged."""
+    scan_overdue_tasks(db_session, today=TODAY)
+    backdated = add_task(due_date=TODAY - timedelta(days=30)).id
+    assert scan_overdue_tasks(db_session, today=TODAY) == [backdated]
+
+def test_stopped_scan_resumes(db_session, add_task):
+    scan_overdue_tasks(db_session, today=TODAY)
+    late = [add_task(due_date=TODAY - timedelta(days=3)).id for _ in range(5)]
+
+    assert len(scan_overdue_tasks(db_session, today=TODAY, batch_size=2, max_batches=1)) == 2
+    scan_overdue_tasks(db_session, today=TODAY, batch_size=2)
+    db_session.expire_all()
+    assert all(db_session.get(Task, task_id).overdue_at is not None for task_id in late)
+
+def test_finishing_or_rescheduling_clears_the_flag(db_session, add_task):
+    done, moved = add_task(due_date=TODAY - timedelta(days=2)).id, add_task(due_date=TODAY - timedelta(days=2)).id
+    assert {done, moved} <= set(scan_overdue_tasks(db_session, today=TODAY))
+    service = TaskService(db_session)
+    assert service.update_task(done, {"status": "Done"}, ADMIN).overdue_at is None
+    assert service.update_task(moved, {"due_date": TODAY + timedelta(days=7)}, ADMIN).overdue_at is None
+    assert service.update_task(moved, {"title": "still moved"}, ADMIN).overdue_at is None
+    assert scan_overdue_tasks(db_session, today=TODAY + timedelta(days=8)).count(moved) == 1
+
+def test_scan_reads_only_unflagged_rows(db_session):
+    plan = db_session.execute(text(
+        "EXPLAIN QUERY PLAN SELECT id FROM tasks WHERE status IN ('Pending') "
+        "AND due_date < '2030-01-01' AND overdue_at IS NULL"
+    )).all()
+    assert "ix_tasks_unflagged_due" in " ".join(row[-1] for row in plan)
@@ -0,0 +1,49 @@
+from app import manage
+from app.common.constants.log import logger
+from app.models import User
+from app.schema.user_schema import UserUpdate
+from app.services.user_service import UserService
+from app.utils.security import build_password_context, pwd_context, verify_password
+
+
+def test_stale_hash_replaced_on_signin(client, db_session, signin, add_user):
+    """A hash at another cost is swapped for a current one at login; updated_at is untouched."""
+    user = add_user(password=build_password_context("bcrypt", 5).hash("Test@1234"))
+    updated_at = user.updated_at
+    assert pwd_context.needs_update(user.password)
+
+    signin(user.username)
+    db_session.expire_all()
+    stored = db_session.get(User, user.id)
+    assert not pwd_context.needs_update(stored.password)
+    assert verify_password("Test@1234", stored.password)
+    assert stored.updated_at == updated_at
+
+def test_current_hash_left_alone(client, db_session, signin, add_user):
+    user = add_user(password=pwd_context.hash("Test@1234"))
+    original = user.password
+    signin(user.username)
+    db_session.expire_all()
+    assert db_session.get(User, user.id).password == original
+
+def test_update_user_hashes_new_password(db_session, add_user):
+    user = add_user(password=pwd_context.hash("Test@1234"))
+    updated = UserService(db_session).update_user(user.id, UserUpdate(password="Newer@1234"))
+    assert updated.password != "Newer@1234"
+    assert verify_password("Newer@1234", updated.password)
+
+def test_calibrate_command_logs_settings(caplog):
+    # The app logger does not propagate to the root logger caplog listens on.
+    logger.addHandler(caplog.handler)
+    try:
+        manage.main(["calibrate-password-hash", "--target-ms", "1"])
+    finally:
+        logger.removeHandler(caplog.handler)
+    lines = [record.getMessage() for record in caplog.records]
+    assert "PASSWORD_HASH_SCHEME=bcrypt" in lines
+    assert int(lines[-1].removeprefix("PASSWORD_HASH_ROUNDS=")) >= 4
+
+def test_signed_out_afterwards(client):
+    """Leave the shared client signed out for the modules that follow."""
+    client.cookies.clear()
+    assert client.get("/tasks/").status_code == 401
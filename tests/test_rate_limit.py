@@ -0,0 +1,53 @@
+from datetime import timedelta
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.middleware.rate_limit import InMemoryRateLimitBackend, RateLimitMiddleware
+from app.utils.security import AuthUtils
+
+
+def make_client(rules, default_limit="1000/minute"):
+    app = FastAPI()
+
+    @app.get("/limited")
+    def limited():
+        return {"ok": True}
+
+    @app.get("/free")
+    def free():
+        return {"ok": True}
+
+    app.add_middleware(
+        RateLimitMiddleware,
+        backend=InMemoryRateLimitBackend(),
+        rules=rules,
+        default_limit=default_limit,
+    )
+    return TestClient(app)
+
+def test_burst_then_429_with_headers():
+    """The limit allows a burst, then answers 429 with Retry-After."""
+    client = make_client([("GET", "/limited", "3/minute")])
+    responses = [client.get("/limited") for _ in range(4)]
+    assert [r.status_code for r in responses] == [200, 200, 200, 429]
+    assert responses[0].headers["RateLimit-Limit"] == "3"
+    assert responses[0].headers["RateLimit-Remaining"] == "2"
+    assert responses[2].headers["RateLimit-Remaining"] == "0"
+    assert int(responses[3].headers["Retry-After"]) > 0
+
+def test_exempt_route_has_no_limit():
+    client = make_client([("*", "/free", None)], default_limit="1/minute")
+    assert all(client.get("/free").status_code == 200 for _ in range(5))
+    assert "RateLimit-Limit" not in client.get("/free").headers
+
+def test_limits_are_per_principal():
+    """Each signed-in user gets their own bucket; anonymous calls share the IP bucket."""
+    client = make_client([("GET", "/limited", "1/minute")])
+    alice = AuthUtils.create_access_token({"sub": "alice"}, timedelta(minutes=5))
+    bob = AuthUtils.create_access_token({"sub": "bob"}, timedelta(minutes=5))
+
+    assert client.get("/limited", headers={"Cookie": f"access_token={alice}"}).status_code == 200
+    assert client.get("/limited", headers={"Cookie": f"access_token={alice}"}).status_code == 429
+    assert client.get("/limited", headers={"Cookie": f"access_token={bob}"}).status_code == 200
+    assert client.get("/limited").status_code == 200
+    assert client.get("/limited").status_code == 429
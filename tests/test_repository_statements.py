@@ -0,0 +1,31 @@
+from sqlalchemy import select
+
+from app.models import User
+from app.repository.task_repository import TaskRepository
+from app.repository.user_repository import UserRepository
+
+
+def test_user_statements_are_cacheable():
+    """UserRoleType is cache_ok, so statements touching users.role get a cache key."""
+    assert select(User).where(User.role == "ADMIN")._generate_cache_key() is not None
+
+def test_point_lookups_reuse_compiled_statements(db_session):
+    """After a first call, lookups with other values add nothing to the compiled cache."""
+    users, tasks = UserRepository(db_session), TaskRepository(db_session)
+    lookups = [
+        lambda value: users.get_user_by_username(f"user{value}"),
+        lambda value: users.get_user_by_id(value),
+        lambda value: users.get_user_updated_at(value),
+        lambda value: tasks.get_task_by_id(value),
+        lambda value: tasks.get_task_updated_at(value),
+        lambda value: tasks.task_exists(value),
+    ]
+    for lookup in lookups:
+        lookup(1)
+    cache = db_session.get_bind()._compiled_cache
+    cached = len(cache)
+    for lookup in lookups:
+        lookup(2)
+        lookup(987654)
+    assert len(cache) == cached
+    assert users.get_user_by_username("test_user").id == 2
@@ -0,0 +1,57 @@
+from datetime import date, timedelta
+
+import pytest
+from pydantic import ValidationError
+
+from app.schema.task_schema import TaskCreate, TaskUpdate
+from app.schema.user_schema import UserCreate, UserUpdate
+
+
+def user_payload(**overrides):
+    payload = {
+        "name": "Schema User",
+        "username": "schemauser",
+        "password": "Pass1234!",
+        "role": "user",
+        "email": "schemauser@gmail.com",
+        "phone_number": "+919810000000",
+    }
+    payload.update(overrides)
+    return payload
+
+def error_message(model, payload):
+    with pytest.raises(ValidationError) as exc:
+        model(**payload)
+    return exc.value.errors()[0]["msg"]
+
+@pytest.mark.parametrize("password, message", [
+    ("Pa1!", "Password must be at least 8 characters long"),
+    ("pass1234!", "Password must contain at least one uppercase letter"),
+    ("PASS1234!", "Password must contain at least one lowercase letter"),
+    ("Password!", "Password must contain at least one digit"),
+    ("Pass12345", "Password must contain at least one special character"),
+])
+def test_password_rules_keep_their_messages(password, message):
+    """Create and update report the first failing password rule with the same message."""
+    assert error_message(UserCreate, user_payload(password=password)) == f"Value error, {message}"
+    assert error_message(UserUpdate, {"password": password}) == f"Value error, {message}"
+
+def test_non_ascii_digit_counts_as_digit():
+    assert UserCreate(**user_payload(password="Pass٣word!")).password == "Pass٣word!"
+
+def test_email_and_phone_rules_shared_by_update():
+    assert error_message(UserUpdate, {"email": "someone@yahoo.com"}) == (
+        "Value error, Email must have a '@gmail.com' domain"
+    )
+    assert error_message(UserUpdate, {"phone_number": "9810000000"}) == (
+        "Value error, Invalid phone number format. Use '+919XXXXXXXXX'"
+    )
+    update = UserUpdate(email=None, phone_number=None, password=None)
+    assert update.email is None and update.password is None
+
+def test_due_date_must_be_after_today():
+    today = date.today()
+    message = "Value error, Due date must be greater than today's date."
+    assert error_message(TaskCreate, {"title": "t", "user_id": 1, "due_date": today}) == message
+    assert error_message(TaskUpdate, {"due_date": today}) == message
+    assert TaskUpdate(due_date=today + timedelta(days=1)).due_date == today + timedelta(days=1)
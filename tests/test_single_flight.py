@@ -0,0 +1,112 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+
+import pytest
+
+from app.cache.single_flight import SingleFlight
+from app.common.enums.user_roles import UserRole
+from app.config import settings
+from app.repository.task_repository import TaskRepository, TaskRow
+from app.schema.task_schema import TaskCreate
+from app.services.task_service import TaskService
+
+ADMIN = SimpleNamespace(id=1, role=UserRole.ADMIN, username="admin_test")
+
+
+def joined(flights):
+    """Callers currently inside flights.do: one leader per flight plus its followers."""
+    return sum(1 + flight.followers for flight in list(flights._flights.values()))
+
+def run_together(flights, callers, read):
+    """Start every (args, scope) caller while the first read is held open; return their results."""
+    release = threading.Event()
+
+    def held_read():
+        release.wait(5)
+        return read()
+
+    with ThreadPoolExecutor(max_workers=len(callers)) as pool:
+        futures = [pool.submit(flights.do, "op", args, scope, held_read) for args, scope in callers]
+        deadline = time.monotonic() + 5
+        while time.monotonic() < deadline and joined(flights) < len(callers):
+            time.sleep(0.005)
+        release.set()
+        return [future.result() for future in futures]
+
+def test_identical_reads_run_once():
+    flights, calls = SingleFlight(), []
+    results = run_together(flights, [((1,), "READER")] * 20, lambda: calls.append(1) or ("row",))
+    assert len(calls) == 1
+    assert all(result is results[0] for result in results)
+    assert flights.in_flight() == 0
+
+def test_scopes_and_args_never_share():
+    """Callers with another scope or other arguments get their own read."""
+    flights, calls = SingleFlight(), []
+    callers = [((1,), "READER"), ((1,), "ADMIN"), ((2,), "READER")] * 3
+    run_together(flights, callers, lambda: calls.append(1) or ())
+    assert len(calls) == 3
+
+def test_followers_get_the_leaders_error():
+    flights = SingleFlight()
+
+    def failing():
+        raise RuntimeError("database is locked")
+
+    with pytest.raises(RuntimeError):
+        run_together(flights, [((1,), "USER")] * 5, failing)
+    assert flights.in_flight() == 0
+    with pytest.raises(ValueError):
+        flights.do("op", (1,), None, lambda: None)
+
+def test_each_follower_raises_its_own_error():
+    """Followers raise copies chained to the leader's error, never the object itself."""
+    flights, release, errors = SingleFlight(), threading.Event(), []
+
+    def failing():
+        release.wait(5)
+        raise RuntimeError("database is locked")
+
+    def call():
+        try:
+            flights.do("op", (1,), "USER", failing)
+        except RuntimeError as error:
+            errors.append(error)
+
+    threads = [threading.Thread(target=call) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    deadline = time.monotonic() + 5
+    while time.monotonic() < deadline and joined(flights) < len(threads):
+        time.sleep(0.005)
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert len({id(error) for error in errors}) == 5
+    leader = next(error for error in errors if error.__cause__ is None)
+    assert all(error.__cause__ is leader for error in errors if error is not leader)
+    assert all(str(error) == "database is locked" for error in errors)
+
+def test_scoped_service_reads_are_immutable_and_fresh(db_session, add_user):
+    """Scoped reads return rows and tuples; a write in between is always seen."""
+    service = TaskService(db_session)
+    task = service.create_task(TaskCreate(title="coalesced", user_id=add_user().id), ADMIN)
+    assert isinstance(service.get_all_tasks(scope=UserRole.READER), tuple)
+    row = service.get_task_by_id(task.id, scope=UserRole.READER)
+    assert isinstance(row, TaskRow) and row.status == "Pending"
+    service.update_task(task.id, {"status": "Done"}, ADMIN)
+    assert service.get_task_by_id(task.id, scope=UserRole.READER).status == "Done"
+
+def test_task_list_reads_the_version_once(client, signin, monkeypatch):
+    """The version read for the ETag also keys the coalesced read."""
+    calls = []
+    read_version = TaskRepository.get_tasks_version
+    monkeypatch.setattr(TaskRepository, "get_tasks_version", lambda repo: calls.append(1) or read_version(repo))
+    monkeypatch.setattr(settings, "TASK_READ_COALESCING_ENABLED", True)
+    signin("test_reader")
+    assert client.get("/tasks/").status_code == 200
+    assert len(calls) == 1
+    client.cookies.clear()
@@ -0,0 +1,44 @@
+import subprocess
+import sys
+import time
+from fastapi.testclient import TestClient
+
+from app.main import app
+
+IMPORT_BUDGET_SECONDS = 5.0
+STARTUP_BUDGET_SECONDS = 2.0
+
+IMPORT_PROBE = """
+import time
+started = time.perf_counter()
+import app.main
+elapsed = time.perf_counter() - started
+from app.database import database
+print(elapsed, database._engine is None)
+"""
+
+def test_import_time_has_no_side_effects():
+    """Importing app.main builds no engine and stays within the import budget."""
+    result = subprocess.run(
+        [sys.executable, "-c", IMPORT_PROBE], capture_output=True, text=True, check=True
+    )
+    elapsed, engine_untouched = result.stdout.split()[-2:]
+    assert engine_untouched == "True"
+    assert float(elapsed) < IMPORT_BUDGET_SECONDS, f"import app.main took {float(elapsed):.3f}s"
+
+def test_startup_time_and_ready_state():
+    """The lifespan warms resources and reports ready within the startup budget."""
+    started = time.perf_counter()
+    with TestClient(app):
+        elapsed = time.perf_counter() - started
+        assert app.state.ready is True
+    assert elapsed < STARTUP_BUDGET_SECONDS, f"lifespan startup took {elapsed:.3f}s"
+    assert app.state.ready is False
+
+def test_health_endpoints():
+    with TestClient(app) as c:
+        assert c.get("/health/live").json() == {"status": "alive"}
+        assert c.get("/health/ready").json() == {"status": "ready"}
+        app.state.ready = False
+        assert c.get("/health/ready").status_code == 503
+        app.state.ready = True
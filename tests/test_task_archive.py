@@ -0,0 +1,92 @@
+import uuid
+from datetime import date, datetime, timedelta
+
+import pytest
+from sqlalchemy import func, select, update
+
+from app.jobs.task_archiver import archive_done_tasks
+from app.models import ArchivedTask, Task
+
+
+@pytest.fixture
+def add_old_task(db_session, add_task):
+    """A task last updated age_days ago, Done unless told otherwise; returns its id."""
+    def add_old_task(age_days=120, **columns):
+        task_id = add_task(**{"status": "Done", **columns}).id
+        db_session.execute(
+            update(Task).where(Task.id == task_id).values(updated_at=datetime.utcnow() - timedelta(days=age_days))
+        )
+        db_session.commit()
+        return task_id
+    return add_old_task
+
+def archived_ids(db_session):
+    return {task_id for (task_id,) in db_session.query(ArchivedTask.id)}
+
+def test_job_archives_only_old_done_tasks(db_session, add_old_task):
+    old_done = add_old_task()
+    recent_done = add_old_task(age_days=1)
+    old_pending = add_old_task(status="Pending")
+
+    assert archive_done_tasks(db_session, batch_size=1) >= 1
+    archived = archived_ids(db_session)
+    assert old_done in archived
+    assert {recent_done, old_pending}.isdisjoint(archived)
+    assert db_session.get(Task, old_done) is None
+
+def test_archived_ids_are_not_reused(db_session, add_task, add_old_task):
+    """Archiving the newest task leaves max(id) below it; a new task still gets a higher id."""
+    task_id = add_old_task()
+    archive_done_tasks(db_session)
+    assert task_id in archived_ids(db_session)
+    assert db_session.scalar(select(func.max(Task.id))) < task_id
+
+    assert add_task(title="after archive").id > task_id
+
+def test_archived_tasks_only_with_include_archived(client, db_session, signin, add_user, add_old_task):
+    # A due date no other test uses, so the filter matches this task alone.
+    due = date(2200, 1, 1) + timedelta(days=uuid.uuid4().int % 36500)
+    owner = add_user()
+    task_id = add_old_task(due_date=due, user_id=owner.id)
+    add_old_task()
+    archive_done_tasks(db_session)
+    signin("test_reader")
+
+    assert task_id not in [task["id"] for task in client.get("/tasks/").json()]
+    assert client.get(f"/tasks/{task_id}").status_code == 404
+    assert task_id in [task["id"] for task in client.get("/tasks/", params={"include_archived": True}).json()]
+    assert client.get(f"/tasks/{task_id}", params={"include_archived": True}).json()["status"] == "Done"
+    params = {"user_id": owner.id, "due_from": due.isoformat(), "due_to": due.isoformat()}
+    filtered = client.get("/tasks/filter", params={**params, "include_archived": True}).json()
+    assert [task["id"] for task in filtered["items"]] == [task_id]
+    assert client.get("/tasks/filter", params=params).json()["total"] == 0
+
+def test_restore_moves_task_back(client, db_session, signin, add_user, add_old_task):
+    """Only the owner or an admin may restore; the task comes back with a fresh updated_at."""
+    owner = add_user()
+    task_id = add_old_task(user_id=owner.id)
+    add_old_task()
+    archive_done_tasks(db_session)
+    assert task_id in archived_ids(db_session)
+
+    signin(add_user().username)
+    assert client.post(f"/tasks/{task_id}/restore").status_code == 403
+    signin(owner.username)
+    resp = client.post(f"/tasks/{task_id}/restore")
+    assert resp.status_code == 200, resp.text
+    assert resp.json()["id"] == task_id
+    assert client.get(f"/tasks/{task_id}").status_code == 200
+    assert client.post(f"/tasks/{task_id}/restore").status_code == 404
+    assert task_id not in archived_ids(db_session)
+    client.cookies.clear()
+
+def test_restore_over_existing_id_is_409(client, db_session, signin, add_task, add_old_task):
+    task_id = add_old_task()
+    archive_done_tasks(db_session)
+    # Only possible by writing ids by hand, e.g. an import; restoring must not 500.
+    add_task(id=task_id, title="taken id")
+
+    signin("admin_test")
+    assert client.post(f"/tasks/{task_id}/restore").status_code == 409
+    assert task_id in archived_ids(db_session)
+    client.cookies.clear()
@@ -0,0 +1,69 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.config import settings
+from app.jobs.tombstone_compactor import compact_task_tombstones
+from app.models import TaskTombstone
+
+
+@pytest.fixture(autouse=True)
+def no_settle_delay(monkeypatch):
+    monkeypatch.setattr(settings, "TASK_CHANGES_SETTLE_SECONDS", 0)
+
+def sync(client, since=None):
+    """Page through the feed; return (changed ids, deleted ids, cursor)."""
+    changed, deleted = [], []
+    while True:
+        params = {"limit": 500} if since is None else {"since": since, "limit": 500}
+        resp = client.get("/tasks/changes", params=params)
+        assert resp.status_code == 200, resp.text
+        page = resp.json()
+        changed += [task["id"] for task in page["changes"]]
+        deleted += page["deleted"]
+        since = page["cursor"]
+        if not page["has_more"]:
+            return changed, deleted, since
+
+def test_changes_and_deletions_since_cursor(client, signin, add_user):
+    owner_id = add_user().id
+    signin("admin_test")
+    _, _, cursor = sync(client)
+
+    created = [client.post("/tasks/", json={"title": f"sync {i}", "user_id": owner_id}).json()["id"] for i in range(2)]
+    changed, deleted, cursor = sync(client, cursor)
+    assert changed == created and deleted == []
+
+    assert client.delete(f"/tasks/{created[0]}").status_code == 200
+    changed, deleted, cursor = sync(client, cursor)
+    assert changed == [] and deleted == [created[0]]
+    assert sync(client, cursor)[:2] == ([], [])
+
+def test_user_deletion_leaves_tombstones(client, signin, add_user, add_task):
+    signin("admin_test")
+    _, _, cursor = sync(client)
+    user = add_user(is_verified=True)
+    task_ids = [add_task(title=f"owned {i}", user_id=user.id).id for i in range(2)]
+
+    assert client.delete(f"/users/{user.id}").status_code == 200
+    _, deleted, _ = sync(client, cursor)
+    assert sorted(deleted) == sorted(task_ids)
+
+def test_cursor_past_retention_is_gone(client, db_session, signin, add_user):
+    owner_id = add_user().id
+    signin("admin_test")
+    _, _, stale_cursor = sync(client)
+    task_id = client.post("/tasks/", json={"title": "short lived", "user_id": owner_id}).json()["id"]
+    assert client.delete(f"/tasks/{task_id}").status_code == 200
+
+    later = datetime.utcnow() + timedelta(days=settings.TASK_TOMBSTONE_RETENTION_DAYS + 1)
+    assert compact_task_tombstones(db_session, now=later) >= 1
+    assert db_session.query(TaskTombstone).filter_by(task_id=task_id).count() == 0
+    assert client.get("/tasks/changes", params={"since": stale_cursor}).status_code == 410
+    _, _, fresh_cursor = sync(client)
+    assert client.get("/tasks/changes", params={"since": fresh_cursor}).status_code == 200
+
+def test_invalid_cursor(client, signin):
+    signin("test_reader")
+    assert client.get("/tasks/changes", params={"since": "not-a-cursor"}).status_code == 400
+    client.cookies.clear()
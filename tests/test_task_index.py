@@ -0,0 +1,108 @@
+import uuid
+from datetime import date, datetime, timedelta
+
+import pytest
+from sqlalchemy import event, text
+
+pytest.importorskip("numpy")
+
+from app.cache.task_index import TaskColumnIndex, get_task_index
+from app.config import settings
+from app.models import Task
+from app.services.task_service import TaskService
+
+
+@pytest.fixture
+def fresh_index(monkeypatch):
+    """Check the version on every query so writes from other sessions show up at once."""
+    index = get_task_index()
+    monkeypatch.setattr(index, "refresh_seconds", 0)
+    index.invalidate()
+    return index
+
+def seed_tasks(add_task, statuses):
+    status_prefix = "idx" + uuid.uuid4().hex[:6]
+    tasks = [
+        add_task(title=f"{status_prefix} {i}", status=f"{status_prefix}-{status}",
+                 due_date=date(2030, 1, 1) + timedelta(days=i))
+        for i, status in enumerate(statuses)
+    ]
+    return status_prefix, tasks
+
+def test_index_matches_sql(db_session, fresh_index, monkeypatch, add_task):
+    """Filters and counts give the same answer from the arrays and from SQLite."""
+    prefix, tasks = seed_tasks(add_task, ["open", "open", "closed", "open"])
+    service = TaskService(db_session)
+    cases = [
+        {"status": f"{prefix}-open"},
+        {"status": f"{prefix}-open", "due_from": date(2030, 1, 2)},
+        {"user_id": tasks[0].user_id, "due_to": date(2030, 1, 3)},
+        {"status": "no such status"},
+    ]
+    from_index = [service.filter_tasks(2, 1, **case) for case in cases]
+    counts_index = [service.count_tasks(group, **case) for case in cases for group in ("status", "user")]
+
+    monkeypatch.setattr(settings, "TASK_COLUMN_INDEX_ENABLED", False)
+    from_sql = [service.filter_tasks(2, 1, **case) for case in cases]
+    counts_sql = [service.count_tasks(group, **case) for case in cases for group in ("status", "user")]
+
+    assert [([t.id for t in items], total) for items, total in from_index] == \
+           [([t.id for t in items], total) for items, total in from_sql]
+    assert counts_index == counts_sql
+    assert from_index[0][1] == 3
+
+def test_index_follows_writes_from_other_sessions(db_session, fresh_index, add_task):
+    """Updates and deletes that bypass the service arrive through the version counter and tombstones."""
+    prefix, tasks = seed_tasks(add_task, ["open", "open"])
+    owner_id = tasks[0].user_id
+    service = TaskService(db_session)
+    assert service.count_tasks("status", status=f"{prefix}-open")["total"] == 2
+
+    db_session.execute(text("UPDATE tasks SET status = :status, updated_at = :now WHERE id = :id"),
+                       {"status": f"{prefix}-closed", "now": datetime.utcnow(), "id": tasks[0].id})
+    db_session.execute(text("DELETE FROM tasks WHERE id = :id"), {"id": tasks[1].id})
+    db_session.commit()
+
+    counts = service.count_tasks("status", user_id=owner_id)["counts"]
+    assert counts.get(f"{prefix}-open", 0) == 0
+    assert counts[f"{prefix}-closed"] == 1
+
+def test_filter_endpoint_reads_only_the_page(client, db_session, fresh_index, signin, add_task):
+    prefix, tasks = seed_tasks(add_task, ["open"] * 5)
+    signin("test_reader")
+    params = {"status": f"{prefix}-open", "limit": 2, "offset": 2}
+    assert client.get("/tasks/filter", params=params).status_code == 200
+
+    statements = []
+    listener = lambda conn, cursor, statement, *args: statements.append(statement)
+    engine = db_session.get_bind()
+    event.listen(engine, "before_cursor_execute", listener)
+    try:
+        resp = client.get("/tasks/filter", params=params)
+    finally:
+        event.remove(engine, "before_cursor_execute", listener)
+    body = resp.json()
+    assert [item["id"] for item in body["items"]] == [tasks[2].id, tasks[3].id]
+    assert body["total"] == 5 and body["has_more"] is True
+    task_queries = [s for s in statements if "FROM tasks" in s]
+    assert len(task_queries) == 1 and " IN (" in task_queries[0]
+
+def test_counts_endpoint_and_own_writes(client, fresh_index, signin, add_user):
+    me = add_user()
+    signin(me.username)
+    status = "idx-own-" + uuid.uuid4().hex[:6]
+    resp = client.post("/tasks/", json={"title": "own write", "status": status, "user_id": me.id})
+    assert resp.status_code == 200
+    counts = client.get("/tasks/counts", params={"group_by": "user", "status": status}).json()
+    assert counts == {"group_by": "user", "total": 1, "counts": {str(me.id): 1}}
+    client.cookies.clear()
+
+def test_rebuild_when_tombstones_were_compacted(db_session):
+    """If compaction passed the last tombstone read, deletions are unknown and the arrays are rebuilt."""
+    index = TaskColumnIndex(refresh_seconds=0)
+    index.snapshot(db_session)
+    index._tombstone_seq = -1
+    index._version = None
+    columns = index.snapshot(db_session)
+    assert columns.ids.tolist() == [task_id for (task_id,) in db_session.query(Task.id).order_by(Task.id)]
+    assert index.nbytes == 18 * len(columns.ids)
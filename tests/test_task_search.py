@@ -0,0 +1,44 @@
+import uuid
+
+from app.models import Task
+
+
+def seed_tasks(add_task, *rows):
+    return [add_task(title=title, description=description).id for title, description in rows]
+
+def test_search_ranks_and_filters(client, signin, add_task):
+    word = "zq" + uuid.uuid4().hex[:6]
+    ids = seed_tasks(add_task,
+        (f"{word} report", f"quarterly {word} {word} numbers"),
+        ("unrelated", f"mentions {word} once"),
+        ("nothing here", "no match"),
+    )
+    signin("test_reader")
+    resp = client.get("/tasks/search", params={"q": word})
+    assert resp.status_code == 200, resp.text
+    body = resp.json()
+    assert [t["id"] for t in body["items"]] == ids[:2]
+    assert body["has_more"] is False
+
+def test_search_prefix_and_pagination(client, signin, add_user, add_task):
+    word = "pf" + uuid.uuid4().hex[:6]
+    seed_tasks(add_task, *[(f"{word}{i}", None) for i in range(3)])
+    signin(add_user().username)
+    first = client.get("/tasks/search", params={"q": f"{word}*", "limit": 2}).json()
+    second = client.get("/tasks/search", params={"q": f"{word}*", "limit": 2, "offset": 2}).json()
+    assert len(first["items"]) == 2 and first["has_more"] is True
+    assert len(second["items"]) == 1 and second["has_more"] is False
+
+def test_search_index_follows_updates_and_deletes(client, db_session, signin, add_task):
+    word = "up" + uuid.uuid4().hex[:6]
+    renamed, removed = seed_tasks(add_task, (f"{word} draft", None), (f"{word} old", None))
+    db_session.get(Task, renamed).title = f"{word}x renamed"
+    db_session.delete(db_session.get(Task, removed))
+    db_session.commit()
+    signin("admin_test")
+    assert client.get("/tasks/search", params={"q": word}).json()["items"] == []
+    assert [t["id"] for t in client.get("/tasks/search", params={"q": f"{word}x"}).json()["items"]] == [renamed]
+
+def test_search_requires_token(client):
+    client.cookies.clear()
+    assert client.get("/tasks/search", params={"q": "x"}).status_code == 401
@@ -0,0 +1,113 @@
+import threading
+from types import SimpleNamespace
+
+import pytest
+from fastapi import HTTPException
+
+from app.common.enums.user_roles import UserRole
+from app.config import settings
+from app.database.shards import dispose_task_shards, get_task_shards
+from app.models import TaskShardAssignment
+from app.schema.task_schema import TaskCreate
+from app.services.task_service import TaskService
+
+ADMIN = SimpleNamespace(id=1, role=UserRole.ADMIN, username="admin_test")
+
+
+@pytest.fixture
+def shards(monkeypatch, tmp_path):
+    """Two extra SQLite shards next to the test database (shard 0)."""
+    monkeypatch.setattr(settings, "TASK_SHARD_URLS", f"sqlite:///{tmp_path}/shard1.db,sqlite:///{tmp_path}/shard2.db")
+    monkeypatch.setattr(settings, "TASK_SHARD_MOVE_SETTLE_SECONDS", 0)
+    dispose_task_shards()
+    shards = get_task_shards()
+    shards.create_schema()
+    yield shards
+    dispose_task_shards()
+
+def add_tasks(db_session, user_id, count):
+    service = TaskService(db_session)
+    return [service.create_task(TaskCreate(title=f"sharded {i}", user_id=user_id), ADMIN).id for i in range(count)]
+
+def tasks_on(shards, db_session, shard, user_id):
+    return [task.id for task in shards.on_shard(db_session, shard, lambda repo: repo.get_user_tasks(user_id))]
+
+def test_tasks_go_to_their_owners_shard(db_session, shards, add_user):
+    """Each user's tasks sit on one shard; cross-shard reads merge them in id order."""
+    users = [add_user().id for _ in range(3)]
+    created = {user_id: add_tasks(db_session, user_id, 2) for user_id in users}
+    service = TaskService(db_session)
+
+    for user_id, task_ids in created.items():
+        assert tasks_on(shards, db_session, user_id % shards.count, user_id) == task_ids
+        assert service.get_task_by_id(task_ids[0]).user_id == user_id
+    all_ids = sorted(task_id for task_ids in created.values() for task_id in task_ids)
+
+    paged, after = [], None
+    while True:
+        items, has_more = service.get_tasks_page(after, 2, status="Pending")
+        paged += [task.id for task in items if task.id in all_ids]
+        if not has_more:
+            break
+        after = items[-1].id
+    assert paged == all_ids
+    assert [task.id for task in service.get_all_tasks() if task.id in all_ids] == all_ids
+    assert service.get_task_summary()["by_user"][str(users[1])] == 2
+
+def test_move_user_keeps_their_tasks(db_session, shards, add_user):
+    user_id = add_user().id
+    task_ids = add_tasks(db_session, user_id, 3)
+    source = user_id % shards.count
+    target = (source + 1) % shards.count
+    total = TaskService(db_session).get_task_summary()["total"]
+
+    assert shards.move_user(db_session, user_id, target, batch_size=2) == 3
+    assert tasks_on(shards, db_session, source, user_id) == []
+    assert tasks_on(shards, db_session, target, user_id) == task_ids
+    owner = SimpleNamespace(id=user_id, role=UserRole.USER, username="mover")
+    service = TaskService(db_session)
+    assert service.update_task(task_ids[0], {"status": "Done"}, owner).status == "Done"
+    assert service.get_task_summary()["total"] == total
+
+def test_writes_wait_while_user_moves(db_session, shards, add_user):
+    """Task writes of a user being moved get 503 with Retry-After."""
+    user_id = add_user().id
+    task_id = add_tasks(db_session, user_id, 1)[0]
+    db_session.merge(TaskShardAssignment(user_id=user_id, shard=user_id % shards.count, moving=True))
+    db_session.commit()
+    with pytest.raises(HTTPException) as refused:
+        TaskService(db_session).update_task(task_id, {"status": "Done"}, ADMIN)
+    assert refused.value.status_code == 503 and "Retry-After" in refused.value.headers
+    assert TaskService(db_session).get_task_by_id(task_id).status == "Pending"
+
+def test_rebalance_plan_evens_out_shards(db_session, shards, add_user):
+    crowded = [user_id for user_id in (add_user().id for _ in range(6)) if user_id % shards.count == 0]
+    for user_id in crowded:
+        add_tasks(db_session, user_id, 4)
+    moves = shards.plan_rebalance(db_session)
+    assert moves and all(move.source == 0 for move in moves)
+
+def test_shard_zero_runs_on_the_callers_thread(db_session, shards):
+    """The request's session never leaves its thread; only shards 1..N use the pool."""
+    names = shards.on_every_shard(db_session, lambda repo: threading.current_thread().name)
+    assert names[0] == threading.current_thread().name
+    assert all(name.startswith("task-shard") for name in names[1:])
+
+def test_page_endpoint_walks_every_task(client, signin):
+    """/tasks/page hands out next_after until has_more is false; unsharded here."""
+    signin("test_reader")
+    seen, after = [], None
+    while True:
+        params = {"limit": 50} if after is None else {"limit": 50, "after": after}
+        page = client.get("/tasks/page", params=params).json()
+        seen += [task["id"] for task in page["items"]]
+        if not page["has_more"]:
+            break
+        after = page["next_after"]
+    assert seen == sorted(task["id"] for task in client.get("/tasks/").json())
+
+def test_single_database_features_answer_501(client, shards, signin):
+    signin("test_reader")
+    assert client.get("/tasks/search", params={"q": "sharded"}).status_code == 501
+    assert client.get("/tasks/changes").status_code == 501
+    client.cookies.clear()
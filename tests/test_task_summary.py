@@ -0,0 +1,80 @@
+from datetime import date, timedelta
+
+from sqlalchemy import event
+
+from app import manage
+from app.models import Task, TaskCounter
+from app.repository.task_repository import TaskRepository
+
+
+def summary(client):
+    resp = client.get("/tasks/summary")
+    assert resp.status_code == 200, resp.text
+    return resp.json()
+
+def test_summary_tracks_create_update_delete(client, db_session, signin, add_user):
+    owner = str(add_user().id)
+    signin("admin_test")
+    before = summary(client)
+
+    resp = client.post("/tasks/", json={"title": "counted", "user_id": int(owner), "status": "Pending"})
+    assert resp.status_code == 200, resp.text
+    task_id = resp.json()["id"]
+    after_create = summary(client)
+    assert after_create["total"] == before["total"] + 1
+    assert after_create["by_status"]["Pending"] == before["by_status"].get("Pending", 0) + 1
+    assert after_create["by_user"][owner] == before["by_user"].get(owner, 0) + 1
+
+    db_session.get(Task, task_id).status = "Done"
+    db_session.commit()
+    after_update = summary(client)
+    assert after_update["by_status"].get("Pending", 0) == after_create["by_status"]["Pending"] - 1
+    assert after_update["by_status"]["Done"] == after_create["by_status"].get("Done", 0) + 1
+    assert after_update["total"] == after_create["total"]
+
+    db_session.delete(db_session.get(Task, task_id))
+    db_session.commit()
+    after_delete = summary(client)
+    assert after_delete["total"] == before["total"]
+    assert after_delete["by_user"].get(owner, 0) == before["by_user"].get(owner, 0)
+
+def test_summary_counts_overdue(client, db_session, signin, add_task):
+    """Unfinished past-due tasks count at once, without waiting for the overdue scanner."""
+    signin("test_reader")
+    before = summary(client)["overdue"]
+    yesterday = date.today() - timedelta(days=1)
+    late = add_task(title="late", due_date=yesterday)
+    add_task(title="late but done", due_date=yesterday, status="Done")
+    assert summary(client)["overdue"] == before + 1
+
+    late.status = "Done"
+    db_session.commit()
+    assert summary(client)["overdue"] == before
+    client.cookies.clear()
+
+def test_overdue_count_reads_the_open_tasks_index(db_session):
+    statements = []
+    listener = lambda conn, cursor, statement, parameters, *args: statements.append((statement, parameters))
+    engine = db_session.get_bind()
+    event.listen(engine, "before_cursor_execute", listener)
+    try:
+        TaskRepository(db_session).count_overdue_tasks(date.today())
+    finally:
+        event.remove(engine, "before_cursor_execute", listener)
+    statement, parameters = statements[-1]
+    plan = db_session.connection().exec_driver_sql("EXPLAIN QUERY PLAN " + statement, parameters).all()
+    assert "ix_tasks_open_due" in " ".join(row[-1] for row in plan)
+
+def test_repair_rebuilds_counters(client, db_session, signin):
+    signin("admin_test")
+    expected = summary(client)
+    db_session.query(TaskCounter).filter_by(dimension="total").update({"count": 0})
+    db_session.commit()
+    assert summary(client)["total"] == 0
+
+    manage.main(["repair-task-counters"])
+    assert summary(client) == expected
+
+def test_summary_requires_token(client):
+    client.cookies.clear()
+    assert client.get("/tasks/summary").status_code == 401
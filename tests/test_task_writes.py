@@ -0,0 +1,78 @@
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import event
+from sqlalchemy.exc import IntegrityError
+
+from app.common.enums.user_roles import UserRole
+from app.database.database import SessionLocal, get_engine
+from app.models import Task
+from app.repository.task_repository import TaskRepository
+from app.services.task_service import TaskService
+
+
+def test_owner_update_is_one_statement(db_session, add_task):
+    task = add_task(title="write me")
+    task_id = task.id
+    owner = SimpleNamespace(id=task.user_id, role=UserRole.USER, username="owner")
+    statements = []
+    listener = lambda conn, cursor, statement, *args: statements.append(statement)
+    engine = db_session.get_bind()
+    event.listen(engine, "before_cursor_execute", listener)
+    try:
+        task = TaskService(db_session).update_task(task_id, {"status": "Done"}, owner)
+        assert task.status == "Done" and task.title == "write me"
+    finally:
+        event.remove(engine, "before_cursor_execute", listener)
+    assert len(statements) == 1
+    assert statements[0].startswith("UPDATE tasks") and "RETURNING" in statements[0]
+
+def test_task_for_missing_user_is_404(client, signin):
+    signin("admin_test")
+    resp = client.post("/tasks/", json={"title": "orphan", "user_id": 10**9})
+    assert resp.status_code == 404, resp.text
+    assert resp.json()["detail"] == "User not found"
+    client.cookies.clear()
+
+def test_app_engine_enforces_task_owner():
+    """The app engine turns foreign keys on, so the repository sees the violation."""
+    get_engine()
+    db = SessionLocal()
+    try:
+        with pytest.raises(IntegrityError):
+            TaskRepository(db).create_task(Task(title="orphan", user_id=10**9))
+    finally:
+        db.close()
+
+def test_partial_update_keeps_other_fields(client, signin, add_user, add_task):
+    owner = add_user()
+    task_id = add_task(user_id=owner.id).id
+    signin(owner.username)
+    resp = client.put(f"/tasks/{task_id}", json={"title": "renamed"})
+    assert resp.status_code == 200, resp.text
+    assert resp.json()["title"] == "renamed"
+    assert resp.json()["status"] == "Pending"
+
+def test_refused_writes_tell_403_from_404(client, signin, add_user, add_task):
+    others_task = add_task().id
+    signin(add_user().username)
+    assert client.put(f"/tasks/{others_task}", json={"title": "mine now"}).status_code == 403
+    assert client.delete(f"/tasks/{others_task}").status_code == 403
+    assert client.put("/tasks/999999", json={"title": "ghost"}).status_code == 404
+    assert client.delete("/tasks/999999").status_code == 404
+
+    signin("admin_test")
+    assert client.delete(f"/tasks/{others_task}").status_code == 200
+    assert client.delete(f"/tasks/{others_task}").status_code == 404
+
+def test_update_user_conditions(client, signin, add_user):
+    taken, user = add_user(), add_user()
+    signin("admin_test")
+    assert client.put("/users/999999", json={"name": "Nobody"}).status_code == 404
+    resp = client.put(f"/users/{user.id}", json={"username": taken.username})
+    assert resp.status_code == 400
+    assert resp.json()["detail"] == "Username already exists"
+    resp = client.put(f"/users/{user.id}", json={"address": "Greater Noida, India"})
+    assert resp.status_code == 200, resp.text
+    assert resp.json()["username"] == user.username
+    client.cookies.clear()
@@ -0,0 +1,78 @@
+from jose import jwt
+from sqlalchemy import event
+
+from app.config import settings
+from app.schema.user_schema import UserUpdate
+from app.services.user_service import UserService
+
+
+def claims(client):
+    return jwt.decode(client.cookies.get("access_token"), settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+
+def test_access_token_carries_user_claims(client, db_session, signin, add_user):
+    user = add_user()
+    signin(user.username)
+    payload = claims(client)
+    assert payload["sub"] == user.username
+    assert payload["uid"] == user.id
+    assert payload["role"] == "USER"
+    assert payload["ver"] == 0
+    assert payload["type"] == "access"
+
+def test_authorization_reads_no_user_row(client, db_session, signin):
+    """A read route is authorized from the token; the users table is never queried."""
+    signin("test_reader")
+    statements = []
+    listener = lambda conn, cursor, statement, *args: statements.append(statement)
+    engine = db_session.get_bind()
+    event.listen(engine, "before_cursor_execute", listener)
+    try:
+        assert client.get("/tasks/summary").status_code == 200
+        assert client.get("/users/").status_code == 200
+    finally:
+        event.remove(engine, "before_cursor_execute", listener)
+    users_lookups = [s for s in statements if "FROM users" in s and "WHERE users.username" in s]
+    assert users_lookups == []
+
+def test_role_change_takes_effect_after_signin(client, db_session, signin, add_user):
+    """Bumping the token version makes both old tokens stale; signing in again issues the new role."""
+    user = add_user()
+    signin(user.username)
+    assert client.get("/users/").status_code == 403
+
+    UserService(db_session).update_user(user.id, UserUpdate(role="reader"))
+    resp = client.get("/users/")
+    assert resp.status_code == 401
+    assert resp.json()["detail"] == "Token is out of date; sign in again."
+    assert client.post("/auth/refresh").status_code == 401
+
+    signin(user.username)
+    assert claims(client)["role"] == "READER"
+    assert claims(client)["ver"] == 1
+    assert client.get("/users/").status_code == 200
+
+def test_password_change_refuses_old_refresh_token(client, db_session, signin, add_user):
+    user = add_user()
+    signin(user.username)
+    assert client.post("/auth/refresh").status_code == 200
+
+    UserService(db_session).update_user(user.id, UserUpdate(password="New@12345"))
+    assert client.post("/auth/refresh").status_code == 401
+    signin(user.username, password="New@12345")
+    assert client.post("/auth/refresh").status_code == 200
+
+def test_refresh_rejects_missing_wrong_and_deleted(client, db_session, signin, add_user):
+    client.cookies.clear()
+    assert client.post("/auth/refresh").status_code == 401
+
+    user = add_user()
+    signin(user.username)
+    access_token = client.cookies.get("access_token")
+    client.cookies.set("refresh_token", access_token, path="/auth")
+    assert client.post("/auth/refresh").status_code == 401
+
+    signin(user.username)
+    UserService(db_session).delete_user(user.id)
+    assert client.get("/tasks/summary").status_code == 401
+    assert client.post("/auth/refresh").status_code == 401
+    client.cookies.clear()
@@ -0,0 +1,91 @@
+import asyncio
+import time
+import uuid
+
+from app.cache.token_revocations import InMemoryRevocationStore, RevocationChecker
+from app.utils.bloom import BloomFilter
+
+
+class CountingStore(InMemoryRevocationStore):
+    """Counts point lookups and full reloads reaching the store."""
+
+    def __init__(self):
+        super().__init__()
+        self.lookups = 0
+        self.reloads = 0
+
+    async def is_revoked(self, jti):
+        self.lookups += 1
+        return await super().is_revoked(jti)
+
+    async def active(self):
+        self.reloads += 1
+        return await super().active()
+
+def test_bloom_filter_has_no_false_negatives():
+    bloom = BloomFilter(10000, 0.01)
+    items = [uuid.uuid4().hex for _ in range(10000)]
+    for item in items:
+        bloom.add(item)
+    assert all(item in bloom for item in items)
+    false_positives = sum(uuid.uuid4().hex in bloom for _ in range(10000))
+    assert false_positives < 300
+
+def test_store_only_consulted_on_possible_hit():
+    """Unrevoked tokens are answered by the filter; revocations from another worker arrive incrementally."""
+    store = CountingStore()
+    ours = RevocationChecker(store, refresh_seconds=0, capacity=1000)
+    theirs = RevocationChecker(store, refresh_seconds=0, capacity=1000)
+    expires_at = time.time() + 60
+
+    async def scenario():
+        assert not await ours.is_revoked("fresh")
+        await theirs.revoke("leaked", expires_at)
+        assert await ours.is_revoked("leaked")
+        for _ in range(100):
+            await ours.is_revoked(uuid.uuid4().hex)
+
+    asyncio.run(scenario())
+    assert store.reloads == 1  # only the initial load; later refreshes are incremental
+    assert store.lookups < 10
+
+def test_expired_revocations_are_dropped():
+    store = InMemoryRevocationStore()
+
+    async def scenario():
+        await store.revoke("old", time.time() - 1)
+        await store.revoke("new", time.time() + 60)
+        return await store.is_revoked("old"), await store.active()
+
+    old_revoked, (active, _) = asyncio.run(scenario())
+    assert not old_revoked
+    assert active == ["new"]
+
+def test_logout_revokes_access_and_refresh_tokens(client, signin):
+    signin("test_reader")
+    access_token = client.cookies.get("access_token")
+    refresh_token = client.cookies.get("refresh_token")
+    assert client.post("/auth/logout").status_code == 200
+
+    client.cookies.clear()
+    client.cookies.set("access_token", access_token)
+    resp = client.get("/tasks/summary")
+    assert resp.status_code == 401
+    assert resp.json()["detail"] == "Token has been revoked."
+
+    client.cookies.clear()
+    client.cookies.set("refresh_token", refresh_token, path="/auth")
+    assert client.post("/auth/refresh").status_code == 401
+
+def test_refresh_token_is_single_use(client, signin):
+    signin("test_reader")
+    refresh_token = client.cookies.get("refresh_token")
+    assert client.post("/auth/refresh").status_code == 200
+    assert client.get("/tasks/summary").status_code == 200
+
+    client.cookies.clear()
+    client.cookies.set("refresh_token", refresh_token, path="/auth")
+    resp = client.post("/auth/refresh")
+    assert resp.status_code == 401
+    assert resp.json()["detail"] == "Refresh token has been revoked."
+    client.cookies.clear()
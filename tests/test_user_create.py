@@ -0,0 +1,82 @@
+import threading
+import uuid
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import event
+from sqlalchemy.orm import sessionmaker
+
+from app.models import User
+from app.schema.user_schema import UserCreate
+from app.services.auth_service import AuthService
+from app.services.user_service import UserService
+
+
+def new_user(username, email=None, phone_number=None):
+    return UserCreate(
+        name="Create Test",
+        username=username,
+        password="Strong@123",
+        role="user",
+        email=email or f"{username}@gmail.com",
+        phone_number=phone_number,
+    )
+
+def test_create_user_is_one_statement(db_session):
+    statements = []
+    listener = lambda conn, cursor, statement, *args: statements.append(statement)
+    engine = db_session.get_bind()
+    event.listen(engine, "before_cursor_execute", listener)
+    try:
+        user = UserService(db_session).create_user(new_user("one" + uuid.uuid4().hex[:6]))
+        assert user.id and user.created_at and user.updated_at
+    finally:
+        event.remove(engine, "before_cursor_execute", listener)
+    assert len(statements) == 1
+    assert statements[0].startswith("INSERT INTO users") and "RETURNING" in statements[0]
+
+def test_duplicates_map_to_existing_errors(db_session):
+    username = "dup" + uuid.uuid4().hex[:6]
+    service = UserService(db_session)
+    service.create_user(new_user(username, phone_number="+919" + str(uuid.uuid4().int)[:9]))
+    existing = db_session.query(User).filter_by(username=username).one()
+
+    with pytest.raises(HTTPException) as exc:
+        service.create_user(new_user(username, email=f"other{username}@gmail.com"))
+    assert exc.value.detail == "Username already exists"
+    with pytest.raises(HTTPException) as exc:
+        service.create_user(new_user("x" + username, email=existing.email))
+    assert exc.value.detail == "Email already in use"
+    with pytest.raises(HTTPException) as exc:
+        service.create_user(new_user("y" + username, phone_number=existing.phone_number))
+    assert exc.value.detail == "Phone number already in use"
+    with pytest.raises(HTTPException) as exc:
+        AuthService(db_session).create_user(new_user(username, email=f"auth{username}@gmail.com"))
+    assert exc.value.detail == "Username already exists"
+
+def test_concurrent_signups_create_one_user(db_session):
+    username = "race" + uuid.uuid4().hex[:6]
+    Session = sessionmaker(bind=db_session.get_bind())
+    workers = 8
+    barrier = threading.Barrier(workers)
+    outcomes = []
+
+    def signup(i):
+        db = Session()
+        try:
+            barrier.wait()
+            AuthService(db).create_user(new_user(username, email=f"{username}{i}@gmail.com"))
+            outcomes.append("created")
+        except HTTPException as e:
+            outcomes.append(e.detail)
+        finally:
+            db.close()
+
+    threads = [threading.Thread(target=signup, args=(i,)) for i in range(workers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert sorted(outcomes) == ["Username already exists"] * (workers - 1) + ["created"]
+    assert db_session.query(User).filter_by(username=username).count() == 1
@@ -0,0 +1,38 @@
+import pytest
+from sqlalchemy import event
+from sqlalchemy.exc import InvalidRequestError
+
+
+def test_include_tasks_on_one_user(client, signin, add_user, add_task):
+    owner_id = add_user().id
+    add_task(title="embedded", user_id=owner_id)
+    signin("test_reader")
+    plain = client.get(f"/users/{owner_id}")
+    assert "tasks" not in plain.json()
+
+    resp = client.get(f"/users/{owner_id}", params={"include": "tasks"})
+    assert resp.status_code == 200, resp.text
+    assert "embedded" in [task["title"] for task in resp.json()["tasks"]]
+    assert resp.headers["ETag"] != plain.headers["ETag"]
+    assert client.get(f"/users/{owner_id}", params={"include": "owner"}).status_code == 422
+
+def test_include_tasks_on_list_is_one_extra_query(client, db_session, signin):
+    signin("admin_test")
+    statements = []
+    listener = lambda conn, cursor, statement, *args: statements.append(statement)
+    engine = db_session.get_bind()
+    event.listen(engine, "before_cursor_execute", listener)
+    try:
+        resp = client.get("/users/", params={"include": "tasks"})
+    finally:
+        event.remove(engine, "before_cursor_execute", listener)
+    assert resp.status_code == 200, resp.text
+    assert len(resp.json()) >= 3 and all("tasks" in user for user in resp.json())
+    assert len([s for s in statements if "FROM tasks" in s]) == 1
+    client.cookies.clear()
+
+def test_lazy_loads_raise(db_session, add_user):
+    user = add_user()
+    db_session.expire(user)
+    with pytest.raises(InvalidRequestError):
+        user.tasks
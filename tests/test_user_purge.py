@@ -0,0 +1,88 @@
+import uuid
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import event
+
+from app.jobs.user_purge import purge_deleted_users
+from app.models import Task, User
+from app.schema.user_schema import UserCreate
+from app.services.task_service import TaskService
+from app.services.user_service import UserService
+
+
+def add_tasks(db_session, user_id, task_count):
+    db_session.bulk_save_objects([Task(title=f"t{i}", user_id=user_id) for i in range(task_count)])
+    db_session.commit()
+
+def test_deleted_user_is_hidden_before_purge(db_session, add_user):
+    user_id = add_user(is_verified=True).id
+    add_tasks(db_session, user_id, 3)
+    service = UserService(db_session)
+    assert service.delete_user(user_id)
+
+    assert user_id not in [u.id for u in service.get_all_users()]
+    assert service.get_user_etag(user_id) is None
+    assert db_session.query(Task).filter_by(user_id=user_id).count() == 3
+    purge_deleted_users(db_session)
+    assert db_session.query(Task).filter_by(user_id=user_id).count() == 0
+    assert db_session.get(User, user_id) is None
+
+def test_deleted_users_tasks_are_hidden_before_purge(db_session, add_user):
+    user_id = add_user().id
+    add_tasks(db_session, user_id, 2)
+    task_id = db_session.query(Task.id).filter_by(user_id=user_id).first()[0]
+    service = TaskService(db_session)
+    before = service.get_task_summary()
+    UserService(db_session).delete_user(user_id)
+
+    with pytest.raises(HTTPException):
+        service.get_task_by_id(task_id)
+    assert task_id not in [task.id for task in service.get_all_tasks()]
+    assert service.get_tasks_by_ids([task_id]) == ([], [task_id])
+    assert service.filter_tasks(10, 0, user_id=user_id) == ([], 0)
+    assert service.count_tasks("status", user_id=user_id)["total"] == 0
+    hidden = service.get_task_summary()
+    assert hidden["total"] == before["total"] - 2
+    assert str(user_id) not in hidden["by_user"]
+    purge_deleted_users(db_session)
+    assert service.get_task_summary() == hidden
+
+def test_deleted_users_details_can_sign_up_again(db_session, add_user):
+    phone_number = "+919" + str(uuid.uuid4().int)[:9]
+    user = add_user(phone_number=phone_number)
+    username, email = user.username, user.email
+    service = UserService(db_session)
+    service.delete_user(user.id)
+    again = service.create_user(UserCreate(
+        name="Back Again", username=username, password="Strong@123", role="user",
+        email=email, phone_number=phone_number,
+    ))
+    assert again.id != user.id and again.username == username
+    purge_deleted_users(db_session)
+
+def test_purge_deletes_tasks_in_chunks(db_session, add_user):
+    user_id = add_user(is_verified=True).id
+    add_tasks(db_session, user_id, 1200)
+    UserService(db_session).delete_user(user_id)
+
+    commits = []
+    listener = lambda conn: commits.append(1)
+    engine = db_session.get_bind()
+    event.listen(engine, "commit", listener)
+    try:
+        purge_deleted_users(db_session, chunk_size=500)
+    finally:
+        event.remove(engine, "commit", listener)
+    # 500 + 500 + 200 tasks, then the user row.
+    assert len(commits) == 4
+    assert db_session.query(Task).filter_by(user_id=user_id).count() == 0
+
+def test_delete_route_purges_in_background(client, db_session, signin, add_user):
+    user_id = add_user(is_verified=True).id
+    add_tasks(db_session, user_id, 5)
+    signin("admin_test")
+    assert client.delete(f"/users/{user_id}").status_code == 200
+    assert client.get(f"/users/{user_id}").status_code == 404
+    assert db_session.query(Task).filter_by(user_id=user_id).count() == 0
+    client.cookies.clear()